@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# 统一入口：子命令按需导入重依赖，多个阶段可用 + 串在同一个进程里跑（见 src/aekg/cli.py）
+#   python scripts/aekg.py --help
+#   python scripts/aekg.py map + rank + eval
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from aekg.cli import main  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# 药物之间的 AE 谱相似度：MinHash 签名 + LSH 分桶取候选对，再算精确 Jaccard / 加权相似度，输出每个药物的 Top-N 邻居
+#   python scripts/analysis/drug_similarity.py                       # 路径引擎：Drug→Protein→Gene→HPO 可达集合
+#   python scripts/analysis/drug_similarity.py --source ranked --top-k 50 --similarity weighted
+import argparse, csv, sys, time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, minhash, vocab  # noqa: E402
+from aekg.predictions import latest_ranked_dir  # noqa: E402
+from aekg.vocab import CSR  # noqa: E402
+
+FORMAL = Path("reports")/f"formal_{date.today()}"
+
+def sets_from_paths():
+    """(drug ids, CSR of HPO ints, weights=None) from the mapping tables (aekg.vocab)."""
+    E = vocab.encoded()
+    names = vocab.vocab("drug").values
+    rows = [E.hpo_ids[np.unique(E.gene_hpo.rows(E.protein_gene.rows(E.drug_protein.row(d))))] for d in E.drugs.tolist()]
+    return [names[d] for d in E.drugs.tolist()], _csr(rows), None
+
+def sets_from_ranked(ranked_dir, top_k):
+    """(drug ids, CSR of HPO ints, scores) from <drug>_ranked_hpo.csv; top_k > 0 keeps each list's head."""
+    drugs, rows, weights = [], [], []
+    for f in sorted(Path(ranked_dir).glob("*_ranked_hpo.csv")):
+        hs, ws = [], []
+        with open(f, encoding="utf-8-sig", newline="") as fi:
+            for i, r in enumerate(csv.DictReader(fi)):
+                if top_k and i >= top_k: break
+                h = vocab.hpo_int(r.get("hpo_id"))
+                if h >= 0:
+                    hs.append(h); ws.append(float(r.get("score") or 0.0))
+        h, first = np.unique(np.array(hs, dtype=np.int64), return_index=True)
+        drugs.append(f.name[:-len("_ranked_hpo.csv")]); rows.append(h); weights.append(np.array(ws)[first].clip(min=0.0))
+    return drugs, _csr(rows), weights
+
+def _csr(rows):
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    return CSR(indptr, np.concatenate(rows).astype(np.int64) if rows else np.zeros(0, dtype=np.int64))
+
+def top_neighbours(pairs, sims, n_drugs, top_n, min_sim):
+    """Both directions of each scored pair, best top_n per drug: (drug, neighbour, rank, sim, pair index)."""
+    keep = sims >= min_sim
+    p, s, k = pairs[keep], sims[keep], np.flatnonzero(keep)
+    a = np.concatenate([p[:, 0], p[:, 1]]); b = np.concatenate([p[:, 1], p[:, 0]])
+    s = np.concatenate([s, s]); k = np.concatenate([k, k])
+    order = np.lexsort((b, -s, a))
+    a, b, s, k = a[order], b[order], s[order], k[order]
+    start = np.searchsorted(a, np.arange(n_drugs))
+    rank = np.arange(len(a)) - start[a] + 1
+    sel = rank <= top_n
+    return a[sel], b[sel], rank[sel], s[sel], k[sel]
+
+def main():
+    ap = argparse.ArgumentParser(description="Top-N similar drugs by predicted AE (HPO) profile, via MinHash/LSH")
+    ap.add_argument("--source", choices=["paths", "ranked"], default="paths",
+                    help="paths: HPO terms reachable through targets; ranked: <drug>_ranked_hpo.csv lists")
+    ap.add_argument("--ranked-dir", help="default: newest reports/formal_* with ranked lists")
+    ap.add_argument("--top-k", type=int, default=0, help="ranked source: only the first K HPO terms per drug (0 = all)")
+    ap.add_argument("--similarity", choices=["jaccard", "weighted"], default="jaccard",
+                    help="exact score for candidates; weighted = sum(min)/sum(max) of ranked scores")
+    ap.add_argument("--num-perm", type=int, default=128)
+    ap.add_argument("--threshold", type=float, default=0.5, help="Jaccard at which a pair becomes a candidate with p~0.5")
+    ap.add_argument("--bands", type=int, help="LSH bands (must divide --num-perm); default: from --threshold")
+    ap.add_argument("--max-bucket", type=int, default=500, help="skip LSH buckets with more drugs than this")
+    ap.add_argument("--top-n", type=int, default=10)
+    ap.add_argument("--min-sim", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=4003)
+    ap.add_argument("--out", help="default: reports/formal_<today>/drug_neighbors.csv")
+    args = ap.parse_args()
+    if args.similarity == "weighted" and args.source != "ranked":
+        ap.error("--similarity weighted needs --source ranked (path sets carry no scores)")
+
+    t0 = time.perf_counter()
+    if args.source == "ranked":
+        ranked_dir = Path(args.ranked_dir) if args.ranked_dir else latest_ranked_dir()
+        if not ranked_dir:
+            sys.exit("No reports/formal_*/*_ranked_hpo.csv found; run the rankers first or use --source paths.")
+        drugs, sets, weights = sets_from_ranked(ranked_dir, args.top_k)
+    else:
+        drugs, sets, weights = sets_from_paths()
+    t1 = time.perf_counter()
+
+    sig = minhash.signatures(sets, args.num_perm, args.seed)
+    bands = args.bands or minhash.bands_for(args.num_perm, args.threshold)
+    pairs = minhash.candidate_pairs(sig, bands, args.max_bucket)
+    t2 = time.perf_counter()
+
+    # 候选对再算精确相似度（MinHash 估计值一并输出）
+    row = lambda i: sets.indices[sets.indptr[i]:sets.indptr[i + 1]]
+    if args.similarity == "weighted":
+        sims = np.array([minhash.weighted_jaccard(row(i), weights[i], row(j), weights[j]) for i, j in pairs.tolist()])
+    else:
+        sims = np.array([minhash.jaccard(row(i), row(j)) for i, j in pairs.tolist()])
+    est = minhash.estimate(sig, pairs[:, 0], pairs[:, 1]) if len(pairs) else np.zeros(0)
+    a, b, rank, s, k = top_neighbours(pairs, sims, len(drugs), args.top_n, args.min_sim)
+    t3 = time.perf_counter()
+
+    out = Path(args.out) if args.out else FORMAL/"drug_neighbors.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8", newline="") as fo:
+        w = csv.writer(fo); w.writerow(["drug_id", "rank", "neighbor_id", "similarity", "minhash_estimate"])
+        w.writerows([drugs[i], r, drugs[j], f"{x:.4f}", f"{e:.4f}"]
+                    for i, j, r, x, e in zip(a.tolist(), b.tolist(), rank.tolist(), s.tolist(), est[k].tolist()))
+
+    n_all = len(drugs) * (len(drugs) - 1) // 2
+    print(f"{len(drugs)} drugs, {args.num_perm} perms in {bands} bands: {len(pairs)} candidate pairs "
+          f"({len(pairs) / max(1, n_all):.2%} of all), {len(a)} neighbour rows")
+    print(f"load {t1 - t0:.2f}s, minhash+lsh {t2 - t1:.2f}s, exact {t3 - t2:.2f}s -> {out}")
+    return len(a)
+
+if __name__ == "__main__":
+    with instrument.stage("analysis.drug_similarity", FORMAL) as st:
+        st.rows = main()
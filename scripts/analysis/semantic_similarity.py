@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# HPO 语义相似度（Resnik / Lin，best-match average）：IC 来自 gene_hpo 注释频率，共同祖先来自 hp.obo 的 is_a
+#   python scripts/analysis/semantic_similarity.py drugs --limit 300 --top-k 20    # 药物两两之间
+#   python scripts/analysis/semantic_similarity.py gold                            # 预测 Top-K 对比 eval/gold
+import argparse, csv, sys, time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, mappings, semsim, vocab  # noqa: E402
+from aekg.predictions import latest_ranked_dir  # noqa: E402
+
+FORMAL = Path("reports")/f"formal_{date.today()}"
+GOLD = Path("eval")/"gold"
+GOLD_DRUGS = {"CHEMBL1064": "simvastatin", "CHEMBL108": "carbamazepine"}
+
+def ranked_hpos(path, top_k):
+    with open(path, encoding="utf-8-sig", newline="") as fi:
+        hs = [vocab.hpo_int(r.get("hpo_id")) for i, r in zip(range(top_k or 1 << 62), csv.DictReader(fi))]
+    return [h for h in hs if h >= 0]
+
+def gold_hpos(path, pt_hpos):
+    """HPO ints of a gold list: HPO ids as they are, PT names through the reverse HPO->PT map."""
+    out = []
+    for line in open(path, encoding="utf-8-sig"):
+        x = line.strip().lstrip("\ufeff")
+        if not x: continue
+        h = vocab.hpo_int(x) if x.upper().startswith("HP:") else -1
+        out.extend([h] if h >= 0 else pt_hpos.get(x.casefold(), ()))
+    return out
+
+def run_drugs(args, ont, ranked_dir):
+    files = sorted(ranked_dir.glob("*_ranked_hpo.csv"))
+    if args.drugs:
+        want = set(args.drugs.split(","))
+        files = [f for f in files if f.name[:-len("_ranked_hpo.csv")] in want]
+    files = files[:args.limit] if args.limit else files
+    drugs = [f.name[:-len("_ranked_hpo.csv")] for f in files]
+    profiles = [ont.positions(ranked_hpos(f, args.top_k)) for f in files]
+    t0 = time.perf_counter()
+    S = semsim.TermSims(ont, np.concatenate(profiles) if profiles else [])
+    t1 = time.perf_counter()
+    sims = {m: S.bma_matrix(profiles, m) for m in semsim.MEASURES}
+    t2 = time.perf_counter()
+
+    out = Path(args.out) if args.out else FORMAL/"drug_semsim.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    i, j = np.triu_indices(len(drugs), 1)
+    keep = sims[args.measure][i, j] >= args.min_sim
+    with open(out, "w", encoding="utf-8", newline="") as fo:
+        w = csv.writer(fo); w.writerow(["drug_a", "drug_b", "resnik_bma", "lin_bma"])
+        w.writerows([drugs[a], drugs[b], f"{sims['resnik'][a, b]:.4f}", f"{sims['lin'][a, b]:.4f}"]
+                    for a, b in zip(i[keep].tolist(), j[keep].tolist()))
+    print(f"{len(drugs)} drugs, {len(S.terms)} distinct terms: term pairs {t1 - t0:.2f}s "
+          f"({S.resnik.nbytes / 1e6:.0f} MB), {len(i)} drug pairs {t2 - t1:.2f}s -> {out}")
+    return int(keep.sum())
+
+def run_gold(args, ont, ranked_dir):
+    pt_hpos = {}
+    for h, p in mappings.hpo_pt().items():
+        pt_hpos.setdefault(p.casefold(), []).append(vocab.hpo_int(h))
+    rows = []
+    for chembl_id, name in GOLD_DRUGS.items():
+        pred_path, gold_path = ranked_dir/f"{chembl_id}_ranked_hpo.csv", GOLD/f"{name}.txt"
+        if not pred_path.exists() or not gold_path.exists():
+            continue
+        rows.append((name, ont.positions(ranked_hpos(pred_path, args.top_k)), ont.positions(gold_hpos(gold_path, pt_hpos))))
+    S = semsim.TermSims(ont, np.concatenate([np.concatenate([p, g]) for _, p, g in rows]) if rows else [])
+
+    out = Path(args.out) if args.out else ranked_dir/"eval_semsim.csv"
+    with open(out, "w", encoding="utf-8", newline="") as fo:
+        w = csv.writer(fo); w.writerow(["drug", "k", "n_pred", "n_gold", "resnik_bma", "lin_bma"])
+        for name, p, g in rows:
+            w.writerow([name, args.top_k, len(p), len(g), f"{S.bma(p, g, 'resnik'):.4f}", f"{S.bma(p, g, 'lin'):.4f}"])
+    print(f"{len(rows)} drugs with gold lists -> {out}")
+    return len(rows)
+
+def main():
+    ap = argparse.ArgumentParser(description="Resnik/Lin best-match-average similarity of HPO profiles")
+    ap.add_argument("mode", choices=["drugs", "gold"], help="drugs: all pairs of ranked drugs; gold: predictions vs eval/gold")
+    ap.add_argument("--ranked-dir", help="default: newest reports/formal_* with ranked lists")
+    ap.add_argument("--top-k", type=int, default=20, help="HPO terms per ranked list (0 = all)")
+    ap.add_argument("--drugs", help="drugs mode: comma-separated drug ids (default: every ranked list)")
+    ap.add_argument("--limit", type=int, default=0, help="drugs mode: only the first N ranked lists")
+    ap.add_argument("--measure", choices=semsim.MEASURES, default="lin", help="drugs mode: measure for --min-sim")
+    ap.add_argument("--min-sim", type=float, default=0.0)
+    ap.add_argument("--obo", help="default: data/raw/hpo/hp.obo")
+    ap.add_argument("--out", help="default: reports/formal_<today>/drug_semsim.csv or <ranked-dir>/eval_semsim.csv")
+    args = ap.parse_args()
+
+    ranked_dir = Path(args.ranked_dir) if args.ranked_dir else latest_ranked_dir()
+    if not ranked_dir:
+        sys.exit("No reports/formal_*/*_ranked_hpo.csv found; run the rankers first.")
+    t0 = time.perf_counter()
+    ont = semsim.load_ontology(args.obo)
+    print(f"ontology: {len(ont)} terms, IC over {ont.n_genes} genes ({time.perf_counter() - t0:.2f}s)")
+    return run_drugs(args, ont, ranked_dir) if args.mode == "drugs" else run_gold(args, ont, ranked_dir)
+
+if __name__ == "__main__":
+    with instrument.stage("analysis.semantic_similarity", FORMAL) as st:
+        st.rows = main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# 在各个合成规模上跑流水线基准：耗时、CPU、峰值内存、吞吐（行/秒）
+# 结果追加到 reports/bench/scaling.jsonl（带 commit），便于随时间追踪扩展曲线
+#   python scripts/bench/run_benchmarks.py --scales tiny small medium
+#   python scripts/bench/run_benchmarks.py --scales large --bench build_graph rank_r1_cpic
+import argparse, json, sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.bench import BENCHMARKS, git_commit, run_bench, select  # noqa: E402
+from aekg.synthetic import SCALES, ensure, generate  # noqa: E402
+
+def main():
+    ap = argparse.ArgumentParser(description="Time the pipeline scripts on synthetic data at several scales")
+    ap.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["small"])
+    ap.add_argument("--bench", nargs="+", default=None, help="subset of: " + ", ".join(b.name for b in BENCHMARKS))
+    ap.add_argument("--workdir", type=Path, default=Path("data/cache/bench"), help="one workspace per scale lives here")
+    ap.add_argument("--out", type=Path, default=Path("reports/bench/scaling.jsonl"))
+    ap.add_argument("--regen", action="store_true", help="regenerate workspaces even if present")
+    args = ap.parse_args()
+
+    try:
+        benches = select(args.bench)
+    except ValueError as e:
+        ap.error(str(e))
+    commit, stamp = git_commit(), datetime.now().isoformat(timespec="seconds")
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'scale':8s} {'bench':14s} {'rows':>9s} {'sec':>8s} {'cpu':>8s} {'rss MB':>8s} {'rows/s':>11s}")
+    failed = False
+    for scale in args.scales:
+        ws = args.workdir/scale
+        meta = generate(ws, scale) if args.regen else ensure(ws, scale)
+        for b in benches:
+            try:
+                r = run_bench(b, ws, log_dir=ws/"logs")
+            except RuntimeError as e:
+                print(f"{scale:8s} {b.name:14s} FAILED: {e}"); failed = True
+                continue
+            rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+            print(f"{scale:8s} {b.name:14s} {r['rows']:9d} {r['seconds']:8.2f} {r['cpu_s']:8.2f} {rss:>8s} {r['rows_per_s'] or 0:11.0f}")
+            rec = {"commit": commit, "time": stamp, "scale": scale, "params": meta["params"], **r}
+            with open(args.out, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+    print("Appended results to", args.out)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# 基准回归追踪：固定的一组流水线基准（排名端到端 / HPO→PT 映射 / 建图 / 评测），
+# 预热后重复多轮，每个 commit 存一份中位数与离散度；与基线比较，Mann-Whitney 单侧检验标出显著变慢。
+#   python scripts/bench/track.py run --repeat 5 --warmup 1     # 记录当前 commit
+#   python scripts/bench/track.py baseline                      # 把最新一次记录设为基线
+#   python scripts/bench/track.py compare                       # 最新记录 vs 基线 -> reports/bench/compare_*.md
+#   python scripts/bench/track.py history
+import argparse, json, platform, sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.bench import git_commit, mann_whitney_greater, run_bench, select, summarize  # noqa: E402
+from aekg.synthetic import SCALES, ensure  # noqa: E402
+
+HIST = Path("reports/bench/history")
+TRACKED = ["hpo2pt_map", "build_graph", "rank_r1_cpic", "rank_r1_paths", "eval"]
+
+def load(ref=None):
+    """历史记录：ref 为 commit 前缀 / 文件路径；None = 最新一次"""
+    if ref and Path(ref).is_file():
+        return json.loads(Path(ref).read_text(encoding="utf-8"))
+    runs = sorted(HIST.glob("*.json"), key=lambda p: json.loads(p.read_text(encoding="utf-8"))["time"])
+    if ref:
+        runs = [p for p in runs if p.stem.startswith(ref)]
+    if not runs:
+        raise SystemExit(f"No benchmark history{' for ' + ref if ref else ''} in {HIST}")
+    return json.loads(runs[-1].read_text(encoding="utf-8"))
+
+def cmd_run(args):
+    benches = select(args.bench or TRACKED)
+    ws = args.workdir/args.scale
+    ensure(ws, args.scale)
+    samples = {b.name: [] for b in benches}
+    rss = {b.name: [] for b in benches}
+    for i in range(args.warmup + args.repeat):
+        tag = "warmup" if i < args.warmup else f"round {i-args.warmup+1}/{args.repeat}"
+        # 轮次交错（每轮跑完整组）而不是一个基准连跑 N 次：机器负载漂移平均摊到所有基准
+        took = {}
+        for b in benches:
+            r = run_bench(b, ws, log_dir=ws/"logs")
+            took[b.name] = r["seconds"]
+            if i >= args.warmup:
+                samples[b.name].append(r["seconds"]); rss[b.name].append(r["peak_rss_mb"])
+        print(f"[{tag}] " + "  ".join(f"{n}={t:.2f}s" for n, t in took.items()))
+    commit = git_commit()
+    rec = {"commit": commit, "label": args.label, "time": datetime.now().isoformat(timespec="seconds"),
+           "scale": args.scale, "params": SCALES[args.scale], "warmup": args.warmup, "repeat": args.repeat,
+           "python": platform.python_version(), "platform": platform.platform(),
+           "results": {n: {**summarize(xs), "samples": xs,
+                           "peak_rss_mb": max((x for x in rss[n] if x is not None), default=None)}
+                       for n, xs in samples.items()}}
+    HIST.mkdir(parents=True, exist_ok=True)
+    out = HIST/f"{commit}{'_' + args.label if args.label else ''}_{args.scale}.json"
+    out.write_text(json.dumps(rec, indent=1), encoding="utf-8")
+    print("Saved", out)
+    if args.set_baseline:
+        (HIST/"BASELINE").write_text(str(out), encoding="utf-8")
+
+def cmd_baseline(args):
+    runs = sorted(HIST.glob(f"{args.ref or ''}*.json"), key=lambda p: json.loads(p.read_text(encoding="utf-8"))["time"])
+    if not runs:
+        raise SystemExit(f"No benchmark history{' for ' + args.ref if args.ref else ''} in {HIST}")
+    (HIST/"BASELINE").write_text(str(runs[-1]), encoding="utf-8")
+    print("Baseline:", runs[-1])
+
+def cmd_compare(args):
+    bpath = args.baseline or ((HIST/"BASELINE").read_text(encoding="utf-8").strip() if (HIST/"BASELINE").exists() else None)
+    if not bpath:
+        raise SystemExit("No baseline: run `track.py baseline` or pass --baseline")
+    base, cur = load(bpath), load(args.current)
+    lines = [f"# Benchmark comparison: {cur['commit']} vs baseline {base['commit']}", "",
+             f"scale `{cur['scale']}`, {cur['repeat']} rounds (baseline {base['repeat']}); "
+             f"flagged = one-sided Mann-Whitney p < {args.alpha} and median slower by more than {args.threshold:.0%}", "",
+             "| bench | baseline median (IQR) s | current median (IQR) s | change | p (slower) | |",
+             "|---|---|---|---|---|---|"]
+    flagged = []
+    if base["scale"] != cur["scale"]:
+        lines[2:2] = [f"**warning:** scales differ ({base['scale']} vs {cur['scale']})", ""]
+    for name, c in cur["results"].items():
+        b = base["results"].get(name)
+        if not b:
+            lines.append(f"| {name} | - | {c['median']:.3f} ({c['iqr']:.3f}) | new | | |"); continue
+        ratio = c["median"]/b["median"] - 1 if b["median"] else 0.0
+        p = mann_whitney_greater(c["samples"], b["samples"])
+        mark = ""
+        if p < args.alpha and ratio > args.threshold:
+            mark = "SLOWER"; flagged.append(name)
+        elif mann_whitney_greater(b["samples"], c["samples"]) < args.alpha and ratio < -args.threshold:
+            mark = "faster"
+        lines.append(f"| {name} | {b['median']:.3f} ({b['iqr']:.3f}) | {c['median']:.3f} ({c['iqr']:.3f}) | {ratio:+.1%} | {p:.3f} | {mark} |")
+    lines += ["", f"Significant slowdowns: {', '.join(flagged) if flagged else 'none'}"]
+    text = "\n".join(lines) + "\n"
+    out = Path("reports/bench")/f"compare_{base['commit']}_vs_{cur['commit']}.md"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(text, encoding="utf-8")
+    print(text + f"\nWrote {out}")
+    if flagged and args.fail:
+        sys.exit(1)
+
+def cmd_history(args):
+    runs = sorted((json.loads(p.read_text(encoding="utf-8")) for p in HIST.glob("*.json")), key=lambda r: r["time"])
+    names = TRACKED
+    print(f"{'time':19s} {'commit':14s} {'scale':7s} " + " ".join(f"{n:>13s}" for n in names))
+    for r in runs:
+        print(f"{r['time']:19s} {r['commit']:14s} {r['scale']:7s} " +
+              " ".join(f"{r['results'][n]['median']:13.3f}" if n in r["results"] else f"{'-':>13s}" for n in names))
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark history and regression checks (synthetic fixtures, local only)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="benchmark the working tree and store medians for this commit")
+    r.add_argument("--scale", choices=sorted(SCALES), default="small")
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--warmup", type=int, default=1)
+    r.add_argument("--bench", nargs="+", default=None, help="default: " + " ".join(TRACKED))
+    r.add_argument("--label", default="", help="suffix for the history file (e.g. a branch name)")
+    r.add_argument("--workdir", type=Path, default=Path("data/cache/bench"))
+    r.add_argument("--set-baseline", action="store_true")
+    b = sub.add_parser("baseline", help="mark the latest run (optionally of commit REF) as the baseline")
+    b.add_argument("ref", nargs="?")
+    c = sub.add_parser("compare", help="current run vs baseline; flags significant slowdowns")
+    c.add_argument("--baseline", default=None, help="history file or commit prefix (default: BASELINE)")
+    c.add_argument("--current", default=None, help="history file or commit prefix (default: latest run)")
+    c.add_argument("--alpha", type=float, default=0.05)
+    c.add_argument("--threshold", type=float, default=0.05, help="minimum relative slowdown to flag")
+    c.add_argument("--fail", action="store_true", help="exit 1 when something is flagged")
+    sub.add_parser("history", help="medians of every stored run")
+    args = ap.parse_args()
+    {"run": cmd_run, "baseline": cmd_baseline, "compare": cmd_compare, "history": cmd_history}[args.cmd](args)
+
+if __name__ == "__main__":
+    main()
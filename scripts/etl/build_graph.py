@@ -7,37 +7,100 @@ Inputs (place into data/interim/mappings/):
 - gene_hpo.csv:      columns [gene_id, hpo_id]
 
 Output: rdf/ae_kg.ttl
+
+--hpo-closure also writes rdf/hpo_closure.nt, a separate graph holding the
+reflexive is_a closure of every phenotype in ae_kg.ttl as
+<phenotype> :hasAncestor <ancestor> (itself included), read from hp.obo alone
+(aekg.obo.is_a_closure). An alt or obsolete id gets its replacement's ancestors
+and itself. Roll-ups then need a single join instead of an rdfs:subClassOf*
+path (see queries/rollup_ancestor.sparql).
 """
-import pandas as pd
+import argparse
+import csv
+import sys
+from pathlib import Path
+
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument  # noqa: E402
+
 A = Namespace("http://example.org/ae-kg#")
 
 def uri(kind, id_):
     return URIRef(f"http://example.org/{kind}/{id_}")
 
+def read_rows(path, *cols):
+    """Rows of a mapping CSV that have every column in cols; csv instead of pandas keeps startup light."""
+    with open(path, newline="", encoding="utf-8-sig") as f:   # -sig: several mapping tables carry a BOM
+        rdr = csv.DictReader(f)
+        missing = [c for c in cols if c not in (rdr.fieldnames or [])]
+        if missing:
+            raise SystemExit(f"{path}: missing column(s) {', '.join(missing)} (header: {rdr.fieldnames})")
+        for r in rdr:
+            if all((r.get(c) or "").strip() for c in cols):
+                yield {c: r[c].strip() for c in cols}
+
+def write_hpo_closure(hpo_ids, obo=None, out="rdf/hpo_closure.nt"):
+    """Stream :hasAncestor triples for the given phenotype ids; returns the number of triples."""
+    from aekg import vocab
+    from aekg.obo import is_a_closure
+    # 只依赖 hp.obo：不走 semsim 的缓存（它的键还含 gene_hpo.csv 的哈希）
+    canon = {h: vocab.hpo_str(vocab.hpo_int(h)) for h in hpo_ids}
+    closure = is_a_closure(str(obo), set(canon.values()))
+    has_anc, rdf_type, phen = f"<{A.hasAncestor}>", f"<{RDF.type}>", f"<{A.Phenotype}>"
+    n, typed = 0, set()
+    with open(out, "w", encoding="utf-8", newline="\n") as fo:
+        for h in sorted(hpo_ids):
+            if canon[h] not in closure:
+                continue  # 不在 hp.obo 里
+            s = f"<{uri('phenotype', h)}>"
+            for a in closure[canon[h]]:
+                o = f"<{uri('phenotype', a)}>"
+                if a not in typed:
+                    typed.add(a)
+                    fo.write(f"{o} {rdf_type} {phen} .\n")
+                fo.write(f"{s} {has_anc} {o} .\n")
+                n += 1
+    return n
+
 def main():
+    ap = argparse.ArgumentParser(description="mappings -> rdf/ae_kg.ttl")
+    ap.add_argument("--hpo-closure", action="store_true", help="also write the HPO is_a closure to rdf/hpo_closure.nt")
+    ap.add_argument("--hpo-obo", help="default: data/raw/hpo/hp.obo")
+    args = ap.parse_args()
     g = Graph()
     g.bind("", A)
     # Load mappings
-    dt = pd.read_csv("data/interim/mappings/drug_targets.csv")
-    pg = pd.read_csv("data/interim/mappings/protein_gene.csv")
-    gh = pd.read_csv("data/interim/mappings/gene_hpo.csv")
+    dt = read_rows("data/interim/mappings/drug_targets.csv", "drug_id", "protein_id")
+    pg = read_rows("data/interim/mappings/protein_gene.csv", "protein_id", "gene_id")
+    gh = read_rows("data/interim/mappings/gene_hpo.csv", "gene_id", "hpo_id")
     # Types
-    for _, r in dt.iterrows():
+    for r in dt:
         g.add((uri("drug", r["drug_id"]),    RDF.type, A.Drug))
         g.add((uri("protein", r["protein_id"]), RDF.type, A.Protein))
         g.add((uri("drug", r["drug_id"]), A.actsOn, uri("protein", r["protein_id"])))
-    for _, r in pg.iterrows():
+    for r in pg:
         g.add((uri("protein", r["protein_id"]), RDF.type, A.Protein))
         g.add((uri("gene", r["gene_id"]), RDF.type, A.Gene))
         g.add((uri("protein", r["protein_id"]), A.encodedBy, uri("gene", r["gene_id"])))
-    for _, r in gh.iterrows():
+    for r in gh:
         g.add((uri("gene", r["gene_id"]), RDF.type, A.Gene))
         g.add((uri("phenotype", r["hpo_id"]), RDF.type, A.Phenotype))
         g.add((uri("gene", r["gene_id"]), A.hasPhenotype, uri("phenotype", r["hpo_id"])))
     g.serialize("rdf/ae_kg.ttl", format="turtle")
     print("Wrote rdf/ae_kg.ttl")
+    if args.hpo_closure:
+        from aekg.raw_store import raw_path
+        obo = Path(args.hpo_obo) if args.hpo_obo else raw_path("hpo", "hp.obo")
+        if not obo.exists():
+            print(f"{obo} not found; skipped rdf/hpo_closure.nt")
+            return len(g)
+        phenotypes = {str(o)[len(str(uri("phenotype", ""))):] for o in g.objects(None, A.hasPhenotype)}
+        n = write_hpo_closure(phenotypes, obo)
+        print(f"Wrote rdf/hpo_closure.nt ({n} :hasAncestor triples for {len(phenotypes)} phenotypes)")
+    return len(g)
 if __name__ == "__main__":
-    main()
+    with instrument.stage("graph.build") as st:
+        st.rows = main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Write ranked predictions back into the graph.
+
+Reads <drug>_ranked_hpo.csv from the newest reports/formal_* (or --ranked-dir)
+and writes, in one streaming pass (src/aekg/predictions.py):
+- rdf/ae_predictions.nt:     :mayCause edges and :Evidence nodes (:about, :weight, :source)
+- rdf/ae_predictions.sqlite: per-drug top-K index used by scripts/query_local.py --topk
+
+Load next to the graph with e.g. g.parse("rdf/ae_predictions.nt", format="nt").
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, predictions  # noqa: E402
+
+def main():
+    ap = argparse.ArgumentParser(description="Ranked HPO lists -> :Evidence / :mayCause triples + top-K index")
+    ap.add_argument("--ranked-dir", help="default: newest reports/formal_* with ranked lists")
+    ap.add_argument("--top-k", type=int, default=50, help="predictions kept per drug (0 = all)")
+    ap.add_argument("--min-weight", type=float, help="drop predictions scored below this")
+    ap.add_argument("--source", default="rule_r1_with_cpic", help=":source literal of every :Evidence node")
+    ap.add_argument("--nt", default=str(predictions.NT_PATH))
+    ap.add_argument("--db", default=str(predictions.DB_PATH))
+    args = ap.parse_args()
+
+    ranked_dir = Path(args.ranked_dir) if args.ranked_dir else predictions.latest_ranked_dir()
+    if not ranked_dir:
+        sys.exit("No reports/formal_*/*_ranked_hpo.csv found; run the rankers first.")
+    t0 = time.perf_counter()
+    rows = predictions.iter_ranked(ranked_dir, args.top_k, args.min_weight)
+    n = predictions.export(rows, args.nt, args.db, args.source,
+                           meta={"ranked_dir": ranked_dir.as_posix(), "top_k": args.top_k, "min_weight": args.min_weight})
+    print(f"Wrote {n} predictions from {ranked_dir} to {args.nt} and {args.db} ({time.perf_counter() - t0:.2f}s)")
+    return n
+
+if __name__ == "__main__":
+    with instrument.stage("graph.export_predictions") as st:
+        st.rows = main()
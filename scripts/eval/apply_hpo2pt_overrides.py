@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
-import csv
+import csv, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import mappings  # noqa: E402
+
 BASE = Path("data/interim/mappings/hpo_meddra_map.tsv")
 OVR  = Path("data/interim/mappings/hpo_meddra_overrides.tsv")
 
 def load_map(p):
-    m={}
-    if p.exists():
-        for r in csv.DictReader(open(p,encoding="utf-8-sig"), delimiter="\t"):
-            h=(r.get("hpo_id") or "").strip().upper()
-            pt=(r.get("meddra_pt") or "").strip()
-            if h and pt: m[h]=pt
-    return m
+    # 共享加载器返回的是进程内共享对象，这里要改写，先复制
+    return dict(mappings.hpo_pt(p, pt_cols=("meddra_pt",)))
 
 def write_map(p, m):
     p.parent.mkdir(parents=True, exist_ok=True)
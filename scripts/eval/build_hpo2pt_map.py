@@ -4,25 +4,31 @@ Build HPO -> MedDRA PT mapping for AE-KG.
 
 Inputs (matching your 4003 repo):
 - gene_hpo.csv: gene_id, hpo_id (list of HPO terms actually used)
-- hp.obo: full HPO ontology in OBO format (for labels and synonyms)
+- hp.obo: full HPO ontology in OBO format (labels, synonyms, alt_id / replaced_by)
 - pt_synonyms.tsv: mapping from LLT to PT
     columns: llt, pt
     (we treat 'pt' as both PT code and PT name for now)
 - hpo_meddra_overrides.tsv: manual overrides (hpo_id, pt_code)
 
 Outputs:
-- hpo_meddra_map.tsv: final mapping per HPO
+- hpo_meddra_map.tsv: final mapping per HPO (one row per gene_hpo ID; merged or
+  obsolete IDs are matched through their primary term, see canonical_hpo_id)
 - coverage txt file with summary stats (JSON text)
 """
 
 import argparse
 import json
-import re
+import sys
 from collections import defaultdict
-from typing import Dict, List, Set
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument  # noqa: E402
+from aekg.obo import build_redirects, iter_obo_terms  # noqa: E402
+
 
 # ---------- Text utilities ----------
 
@@ -51,78 +57,25 @@ def split_synonyms(s: str) -> List[str]:
 
 # ---------- HPO side: parse hp.obo ----------
 
-def load_hpo_terms_from_obo(obo_path: str) -> Dict[str, Dict[str, List[str]]]:
+def load_hpo_terms_from_obo(
+    obo_path: str,
+) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, str]]:
     """
-    Parse hp.obo and return:
-        dict[hpo_id] = {"label": name, "synonyms": [syn1, syn2, ...]}
-    Only uses [Term] blocks with 'id:' and 'name:'.
+    Stream hp.obo once and return:
+        hpo_terms: dict[hpo_id] = {"label": name, "synonyms": [syn1, syn2, ...]}
+        redirects: dict[alt_id or obsolete id] = primary hpo_id
+    Only [Term] blocks with 'id:' and 'name:' are kept in hpo_terms.
     """
     hpo_terms: Dict[str, Dict[str, List[str]]] = {}
 
-    current_id = None
-    current_name = None
-    current_syns: List[str] = []
-    in_term = False
-
-    id_prefix = "id: "
-    name_prefix = "name: "
-    syn_prefix = "synonym: "
-
-    syn_re = re.compile(r'^synonym: "(.+?)"')
-
-    with open(obo_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip("\n")
-
-            if line == "[Term]":
-                # flush previous term
-                if in_term and current_id and current_name:
-                    hpo_terms[current_id] = {
-                        "label": current_name,
-                        "synonyms": current_syns,
-                    }
-                # start new term
-                in_term = True
-                current_id = None
-                current_name = None
-                current_syns = []
-                continue
+    def _keep(terms):
+        for t in terms:
+            if t.name:
+                hpo_terms[t.id] = {"label": t.name, "synonyms": list(t.synonyms)}
+            yield t
 
-            if not line or line.startswith("[Typedef]"):
-                # end of a [Term] block
-                if in_term and current_id and current_name:
-                    hpo_terms[current_id] = {
-                        "label": current_name,
-                        "synonyms": current_syns,
-                    }
-                in_term = False
-                current_id = None
-                current_name = None
-                current_syns = []
-                continue
-
-            if not in_term:
-                continue
-
-            if line.startswith(id_prefix):
-                current_id = line[len(id_prefix):].strip()
-            elif line.startswith(name_prefix):
-                current_name = line[len(name_prefix):].strip()
-            elif line.startswith(syn_prefix):
-                m = syn_re.match(line)
-                if m:
-                    syn_txt = m.group(1).strip()
-                    if syn_txt:
-                        current_syns.append(syn_txt)
-
-    # flush last term if file did not end with blank/[Typedef]
-    if in_term and current_id and current_name:
-        hpo_terms[current_id] = {
-            "label": current_name,
-            "synonyms": current_syns,
-        }
-
-    return hpo_terms
+    redirects = build_redirects(_keep(iter_obo_terms(obo_path)))
+    return hpo_terms, redirects
 
 
 def build_hpo_strings(
@@ -261,7 +214,7 @@ def load_overrides(
 
 # ---------- Main ----------
 
-def main() -> None:
+def main() -> int:
     parser = argparse.ArgumentParser(
         description="Build HPO -> MedDRA PT mapping for AE-KG."
     )
@@ -352,8 +305,10 @@ def main() -> None:
         .tolist()
     )
 
-    hpo_terms = load_hpo_terms_from_obo(args.hpo_obo)
-    hpo_strings = build_hpo_strings(hpo_ids, hpo_terms)
+    hpo_terms, redirects = load_hpo_terms_from_obo(args.hpo_obo)
+    # alt_id / replaced_by -> primary ID, one dict lookup per gene_hpo ID
+    canon: Dict[str, str] = {hid: redirects.get(hid, hid) for hid in hpo_ids}
+    hpo_strings = build_hpo_strings(sorted(set(canon.values())), hpo_terms)
 
     # ---- Load PT synonyms and build index ----
     df_pt = pd.read_csv(
@@ -397,19 +352,22 @@ def main() -> None:
 
     # ---- Build final table ----
     rows: List[dict] = []
-    n_total = len(hpo_strings)
+    n_total = len(canon)
     n_override = n_unique = n_ambiguous = n_no = 0
+    n_redirected = sum(1 for hid, cid in canon.items() if hid != cid)
 
-    for hid, strings in hpo_strings.items():
-        candidates = sorted(hpo_to_pts.get(hid, set()))
+    for hid, cid in canon.items():
+        strings = hpo_strings.get(cid, [])
+        candidates = sorted(hpo_to_pts.get(cid, set()))
         cand_names = [pt_code_to_name.get(c, "") for c in candidates]
 
         method = ""
         chosen_code = ""
         chosen_name = ""
 
-        if hid in overrides:
-            chosen_code = overrides[hid]
+        override = overrides.get(hid) or overrides.get(cid)
+        if override:
+            chosen_code = override
             chosen_name = pt_code_to_name.get(chosen_code, chosen_code)
             method = "override"
             n_override += 1
@@ -436,6 +394,7 @@ def main() -> None:
                 "n_candidates": len(candidates),
                 "candidate_pt_codes": "|".join(candidates),
                 "candidate_pt_names": "|".join(cand_names),
+                "canonical_hpo_id": cid,
             }
         )
 
@@ -449,6 +408,7 @@ def main() -> None:
         "n_unique_auto": n_unique,
         "n_ambiguous": n_ambiguous,
         "n_no_match": n_no,
+        "n_redirected": n_redirected,
         "covered_hpo": n_total - n_no,
         "coverage_ratio": (n_total - n_no) / n_total if n_total else 0.0,
     }
@@ -459,7 +419,9 @@ def main() -> None:
     if args.coverage_txt:
         with open(args.coverage_txt, "w", encoding="utf-8") as f:
             f.write(txt + "\n")
+    return n_total
 
 
 if __name__ == "__main__":
-    main()
+    with instrument.stage("mappings.hpo2pt_map") as st:
+        st.rows = main()
@@ -1,21 +1,15 @@
 #!/usr/bin/env python3
-import csv
+import csv, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import mappings  # noqa: E402
+
 ROOT = Path(".")
 
 def load_hpo2pt(path):
-    """Load HPO -> MedDRA PT mapping from TSV."""
-    mapping = {}
-    with open(path, encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        for r in reader:
-            h = (r.get("hpo_id") or "").strip().upper()
-            # be robust to column naming: pt_name or meddra_pt
-            pt = (r.get("pt_name") or r.get("meddra_pt") or "").strip()
-            if h and pt:
-                mapping[h] = pt.casefold()
-    return mapping
+    """HPO -> casefolded MedDRA PT (pt_name or meddra_pt column, via the shared loader)."""
+    return {h: pt.casefold() for h, pt in mappings.hpo_pt(path).items()}
 
 def pt_rank(pred_path, target_pts, hpo2pt):
     """Print the rank of given PT names in a ranked HPO prediction file."""
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # 汇总最新 formal_* 下每个药的 Top-10 HPO，并映射到 MedDRA PT，便于放 PPT
-import csv
+import csv, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import mappings  # noqa: E402
+
 ROOT=Path(".")
 MAP = ROOT/"data/interim/mappings/hpo_meddra_map.tsv"
 OUTFOLDER = Path("reports")/("midterm_"+__import__("datetime").datetime.now().strftime("%Y-%m-%d_%H%M"))
@@ -15,12 +18,7 @@ def latest_formal():
 def main():
     formal = latest_formal()
     assert formal, "No formal_* dir found."
-    h2pt = {}
-    if MAP.exists():
-        for r in csv.DictReader(open(MAP,encoding="utf-8-sig"), delimiter="\t"):
-            h=(r.get("hpo_id") or "").strip().upper()
-            pt=(r.get("meddra_pt") or "").strip()
-            if h and pt: h2pt[h]=pt
+    h2pt = mappings.hpo_pt(MAP, pt_cols=("meddra_pt",))
     rows=[]
     for f in sorted(formal.glob("CHEMBL*_ranked_hpo.csv")):
         drug = f.stem.split("_")[0]
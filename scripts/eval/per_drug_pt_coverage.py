@@ -1,20 +1,18 @@
 #!/usr/bin/env python3
 # Report per-drug coverage: among top-K HPO, how many map to a MedDRA PT.
-import csv
+import csv, sys
 from pathlib import Path
 from datetime import date
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import mappings  # noqa: E402
+
 K = 10
 MAP = Path("data/interim/mappings/hpo_meddra_map.tsv")
 OUTDIR = Path("reports")/f"formal_{date.today()}"; OUTDIR.mkdir(parents=True, exist_ok=True)
 
 def read_map():
-    d = {}
-    with MAP.open("r",encoding="utf-8") as f:
-        r = csv.DictReader(f, delimiter="\t")
-        for row in r:
-            d[row["hpo_id"]] = row["meddra_pt"]
-    return d
+    return mappings.hpo_pt(MAP, pt_cols=("meddra_pt",))
 
 def main():
     h2pt = read_map()
@@ -27,7 +25,7 @@ def main():
             for i,row in enumerate(rd, start=1):
                 top.append(row["hpo_id"])
                 if i>=K: break
-        cov = sum(1 for h in top if h in h2pt)
+        cov = sum(1 for h in top if h.strip().upper() in h2pt)
         rows.append({"drug":drug,"K":K,"mapped":cov,"coverage":f"{cov/K:.3f}"})
 
     with (OUTDIR/"pt_coverage.csv").open("w",encoding="utf-8",newline="") as fo:
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
-import csv, gzip
+import csv, gzip, sys
 from pathlib import Path
 from collections import defaultdict
 
-RAW=Path("data/raw/sider"); OUT=Path("eval/gold")
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.raw_store import raw_path  # noqa: E402
+
+OUT=Path("eval/gold")
 
 def open_any(p): 
     return gzip.open(p, "rt", encoding="utf-8") if str(p).endswith(".gz") else open(p,"r",encoding="utf-8")
@@ -14,7 +17,7 @@ def main():
     # 名称→STITCH ID
     name_to_ids=defaultdict(set)
     for fn in ["drug_names.tsv","drug_names.tsv.gz"]:
-        p=RAW/fn
+        p=raw_path("sider", fn)
         if not p.exists(): continue
         for row in csv.reader(open_any(p), delimiter="\t"):
             if len(row)>=2: name_to_ids[row[1].lower()].add(row[0])
@@ -25,7 +28,7 @@ def main():
     # 收集 AE 词
     drug_to_terms={t:set() for t in targets}
     for fn in ["meddra_all_se.tsv","meddra_all_se.tsv.gz"]:
-        p=RAW/fn
+        p=raw_path("sider", fn)
         if not p.exists(): continue
         for row in csv.reader(open_any(p), delimiter="\t"):
             if len(row)<2: continue
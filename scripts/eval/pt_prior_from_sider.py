@@ -1,14 +1,12 @@
 #!/usr/bin/env python3
 # Build PT prior from SIDER meddra_all_se.tsv.gz (robust name/type detection; avoid CID/UMLS IDs)
-import gzip, csv, math, re
+import gzip, csv, math, re, sys
 from pathlib import Path
 
-RAW = Path("data/raw/sider/meddra_all_se.tsv.gz")
-OUT = Path("data/interim/mappings/pt_prior.csv")
-OUT.parent.mkdir(parents=True, exist_ok=True)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.raw_store import raw_path  # noqa: E402
 
-if not RAW.exists():
-    raise SystemExit(f"Missing {RAW}")
+OUT = Path("data/interim/mappings/pt_prior.csv")
 
 TYPES = {"PT","LLT","HLT","HLGT","SOC"}
 
@@ -61,30 +59,39 @@ def sniff_cols(path, max_scan=8000):
         name_idx = max(name_cands, key=lambda j: name_votes[j]) if name_cands else None
         return name_idx, type_idx, False
 
-name_idx, type_idx, used_header = sniff_cols(RAW)
-if name_idx is None or type_idx is None:
-    raise SystemExit("Could not detect name/type columns in SIDER.")
-
-pt_count = {}
-with gzip.open(RAW, "rt", encoding="utf-8", errors="ignore") as f:
-    _ = f.readline()  # header or first row, already used for sniffing
-    for line in f:
-        r = line.rstrip("\n").split("\t")
-        if type_idx >= len(r) or name_idx >= len(r):
-            continue
-        ctype = r[type_idx].strip().upper()
-        name  = r[name_idx].strip()
-        if ctype == "PT" and name:
-            pt_count[name] = pt_count.get(name, 0) + 1
-
-vals = [math.log1p(c) for c in pt_count.values()]
-mx = max(vals) if vals else 1.0
-rows = [{"meddra_pt": pt, "prior": round(math.log1p(cnt)/mx, 6)}
-        for pt, cnt in pt_count.items()]
-rows.sort(key=lambda x: -x["prior"])
-
-with open(OUT, "w", encoding="utf-8", newline="") as fo:
-    w = csv.DictWriter(fo, fieldnames=["meddra_pt","prior"])
-    w.writeheader(); w.writerows(rows)
-
-print(f"Wrote PT prior: {OUT} ({len(rows)} PTs) | used_header={used_header} name_idx={name_idx} type_idx={type_idx}")
+def main():
+    raw = raw_path("sider", "meddra_all_se.tsv.gz")
+    if not raw.exists():
+        raise SystemExit(f"Missing {raw}")
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+
+    name_idx, type_idx, used_header = sniff_cols(raw)
+    if name_idx is None or type_idx is None:
+        raise SystemExit("Could not detect name/type columns in SIDER.")
+
+    pt_count = {}
+    with gzip.open(raw, "rt", encoding="utf-8", errors="ignore") as f:
+        _ = f.readline()  # header or first row, already used for sniffing
+        for line in f:
+            r = line.rstrip("\n").split("\t")
+            if type_idx >= len(r) or name_idx >= len(r):
+                continue
+            ctype = r[type_idx].strip().upper()
+            name  = r[name_idx].strip()
+            if ctype == "PT" and name:
+                pt_count[name] = pt_count.get(name, 0) + 1
+
+    vals = [math.log1p(c) for c in pt_count.values()]
+    mx = max(vals) if vals else 1.0
+    rows = [{"meddra_pt": pt, "prior": round(math.log1p(cnt)/mx, 6)}
+            for pt, cnt in pt_count.items()]
+    rows.sort(key=lambda x: -x["prior"])
+
+    with open(OUT, "w", encoding="utf-8", newline="") as fo:
+        w = csv.DictWriter(fo, fieldnames=["meddra_pt","prior"])
+        w.writeheader(); w.writerows(rows)
+
+    print(f"Wrote PT prior: {OUT} ({len(rows)} PTs) | used_header={used_header} name_idx={name_idx} type_idx={type_idx}")
+
+if __name__ == "__main__":
+    main()
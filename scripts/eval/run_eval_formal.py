@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
-import csv, math, re
+import csv, math, re, sys
 from pathlib import Path
 from datetime import date
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, mappings, vocab  # noqa: E402
+
 ROOT = Path(".")
 GOLD = ROOT / "eval" / "gold"
 MAP  = ROOT / "data" / "interim" / "mappings" / "hpo_meddra_map.tsv"
@@ -30,42 +33,37 @@ def ndcg(ranked, gold, k=10):
     return (_dcg(ranked)/ideal) if ideal>0 else 0.0
 
 def load_map_tsv(p):
-    m = {}
+    # 兼容旧列名 "meddra_pt" 和新列名 "pt_name"（共享加载器内处理）；键值都编码成整数：HPO 整数 -> PT 编码
     if not p.exists():
-        return m
-    with open(p, encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        for r in reader:
-            h = (r.get("hpo_id") or "").strip().upper()
-            # 兼容旧列名 "meddra_pt" 和新列名 "pt_name"
-            pt = (r.get("pt_name") or r.get("meddra_pt") or "").strip()
-            if h and pt:
-                m[h] = pt
-    return m
+        return {}
+    pt = vocab.vocab("pt")
+    return {vocab.hpo_int(h): pt.code(name) for h, name in mappings.hpo_pt(p).items()}
 
 
 def project_ranked_to_gold_space(ranked_hpo_ids, gold_items, hpo2pt, prefer_pt=True):
+    """Ranked HPO ids and gold items as int lists/sets in one space: HPO ints or PT codes."""
     gold_norm = [x.lstrip("\ufeff").strip() for x in gold_items]
     is_all_hpo = all(HP_PAT.match(x.upper()) for x in gold_norm)
+    ranked = [vocab.hpo_int(h) for h in ranked_hpo_ids]
 
     if prefer_pt and is_all_hpo:
         # 尝试把 gold 的 HPO→PT
-        gold_pts = { (hpo2pt.get(x.upper()) or "").casefold() for x in gold_norm if hpo2pt.get(x.upper()) }
-        ranked_pts = [ (hpo2pt.get(h.upper()) or "").casefold() for h in ranked_hpo_ids if hpo2pt.get(h.upper()) ]
+        gold_pts = {hpo2pt[h] for h in map(vocab.hpo_int, gold_norm) if h in hpo2pt}
+        ranked_pts = [hpo2pt[h] for h in ranked if h in hpo2pt]
         if gold_pts and ranked_pts:
             return ranked_pts, gold_pts, "PT"  # 覆盖到 PT 空间
 
     # 回退：HPO 空间
     if is_all_hpo:
-        return [h.upper() for h in ranked_hpo_ids], {x.upper() for x in gold_norm}, "HPO"
+        return ranked, {vocab.hpo_int(x) for x in gold_norm}, "HPO"
 
     # gold 不是 HPO（认为是 PT 文本）
-    ranked_pts = []
-    for h in ranked_hpo_ids:
-        pt = hpo2pt.get(h.upper())
-        if pt: ranked_pts.append(pt.casefold())
-    gold_pts = {x.casefold() for x in gold_norm}
-    return ranked_pts, gold_pts, "PT"
+    pt = vocab.vocab("pt")
+    return [hpo2pt[h] for h in ranked if h in hpo2pt], {pt.code(x) for x in gold_norm if x}, "PT"
+
+
+def decode(items, space):
+    return [vocab.hpo_str(x) if space == "HPO" else vocab.vocab("pt").value(x).casefold() for x in items]
 
 
 def find_pred_dir():
@@ -78,8 +76,8 @@ def find_pred_dir():
     today.mkdir(parents=True, exist_ok=True)
     return today
 
-def main():
-    out = find_pred_dir()
+def main(out=None):
+    out = out or find_pred_dir()
     out.mkdir(parents=True, exist_ok=True)
     drugs = [("CHEMBL1064","simvastatin"), ("CHEMBL108","carbamazepine")]
 
@@ -88,8 +86,10 @@ def main():
         d.write(f"Pred dir: {out}\n")
         d.write(f"Loaded HPO->PT mappings: {len(hpo2pt)}\n")
         for probe in ["HP:0003198","HP:0012384","HP:0000988","HP:0016266","HP:0005558"]:
-            d.write(f"{probe} -> {hpo2pt.get(probe)}\n")
+            c = hpo2pt.get(vocab.hpo_int(probe))
+            d.write(f"{probe} -> {None if c is None else vocab.vocab('pt').value(c)}\n")
 
+    n_eval = 0
     with open(out/"eval_metrics.csv","w",encoding="utf-8",newline="") as fo:
         w = csv.writer(fo); w.writerow(["drug","k","P@10","nDCG@10","gold_space"])
         for chembl_id, disp in drugs:
@@ -104,11 +104,16 @@ def main():
 
             with open(out/f"debug_{disp}.txt","w",encoding="utf-8") as dd:
                 dd.write("ranked (HPO) top3: "+", ".join(ranked_hpo[:3])+"\n")
-                dd.write("ranked_proj (eval space) top3: "+", ".join(ranked_proj[:3])+"\n")
-                dd.write("gold_proj sample: "+", ".join(list(gold_proj)[:5])+"\n")
+                dd.write("ranked_proj (eval space) top3: "+", ".join(decode(ranked_proj[:3], space))+"\n")
+                dd.write("gold_proj sample: "+", ".join(decode(list(gold_proj)[:5], space))+"\n")
 
             k=10
             w.writerow([disp, k, f"{p_at_k(ranked_proj,gold_proj,k):.3f}", f"{ndcg(ranked_proj,gold_proj,k):.3f}", space])
+            n_eval += len(ranked_hpo)
     print("Wrote eval_metrics.csv to", out)
+    return n_eval
 
-if __name__=="__main__": main()
+if __name__=="__main__":
+    out = find_pred_dir()
+    with instrument.stage("eval.formal", out) as st:
+        st.rows = main(out)
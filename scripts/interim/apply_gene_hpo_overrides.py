@@ -9,12 +9,14 @@ import csv, json, os, sys
 from pathlib import Path
 
 BASE = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE / "src"))
+from aekg.raw_store import raw_path  # noqa: E402
+
 MAPP = BASE / "data" / "interim" / "mappings"
-RAWHPO = BASE / "data" / "raw" / "hpo"
+RAW = BASE / "data" / "raw"
 OVR = MAPP / "gene_hpo_overrides.tsv"
 OUT = MAPP / "gene_hpo.csv"
 HPO2PT = MAPP / "hpo_meddra_map.tsv"  # for resolving PT names -> HPO IDs
-HP_JSON = RAWHPO / "hp.json"          # optional for resolving HPO labels -> IDs
 
 def read_tsv(path):
     # Use utf-8-sig to swallow BOM if present
@@ -30,16 +32,20 @@ def write_csv(path, rows, fieldnames):
             w.writerow(r)
 
 def load_gene_hpo():
+    """Return (rows, header); header keeps optional columns such as n_annotations."""
     if not OUT.exists():
-        return []
+        return [], ["gene_id","hpo_id"]
     with open(OUT, "r", encoding="utf-8", newline="") as f:
-        return list(csv.DictReader(f))
+        rdr = csv.DictReader(f)
+        rows = list(rdr)
+        return rows, list(rdr.fieldnames or ["gene_id","hpo_id"])
 
 def load_hpo_label_index():
     """Return dict: lowercase HPO label -> HPO ID (from hp.json if available)."""
     idx = {}
-    if HP_JSON.exists():
-        data = json.load(open(HP_JSON, "r", encoding="utf-8"))
+    hp_json = raw_path("hpo", "hp.json", root=os.environ.get("AEKG_RAW_ROOT") or RAW)  # optional
+    if hp_json.exists():
+        data = json.load(open(hp_json, "r", encoding="utf-8"))
         for node in data.get("graphs",[{}])[0].get("nodes",[]):
             if node.get("id","").startswith("HP:"):
                 lbl = node.get("lbl")
@@ -99,7 +105,7 @@ def main():
                 return row[k]
         return None
 
-    base = load_gene_hpo()
+    base, header = load_gene_hpo()
     base_pairs = {(r["gene_id"].upper().strip(), r["hpo_id"].upper().strip())
                   for r in base if r.get("gene_id") and r.get("hpo_id")}
 
@@ -122,7 +128,7 @@ def main():
             base_pairs.add(pair)
             added += 1
 
-    write_csv(OUT, base, fieldnames=["gene_id","hpo_id"])
+    write_csv(OUT, base, fieldnames=header)
     print(f"Applied overrides: +{added} pairs. Total rows now: {len(base)}")
     print(f"Wrote {OUT}")
 
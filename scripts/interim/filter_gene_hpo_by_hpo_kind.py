@@ -2,20 +2,22 @@
 # Keep only HPO terms under "Phenotypic abnormality" (HP:0000118).
 # Optionally keep leaf-only terms to avoid very broad parents.
 
-import json, csv
+import json, csv, sys
 from pathlib import Path
 from collections import defaultdict, deque
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.raw_store import raw_path  # noqa: E402
+
 BASE = Path("data/interim/mappings")
 INP  = BASE/"gene_hpo.csv"
 OUT  = BASE/"gene_hpo.filtered.csv"
-HPJSON = Path("data/raw/hpo/hp.json")
 
 KEEP_ROOT = "HP:0000118"  # Phenotypic abnormality
 LEAF_ONLY = True          # set False if you want parents too (no discount in this script)
 
-def build_graph():
-    obj = json.loads(HPJSON.read_text(encoding="utf-8"))
+def build_graph(hp_json):
+    obj = json.loads(hp_json.read_text(encoding="utf-8"))
     nodes = obj["graphs"][0]["nodes"]; edges = obj["graphs"][0]["edges"]
     parents = defaultdict(list); children = defaultdict(list)
     for e in edges:
@@ -39,8 +41,9 @@ def is_descendant_of(parents, node, root):
     return False
 
 def main():
-    parents, children = build_graph()
-    rows = list(csv.DictReader(INP.open("r",encoding="utf-8")))
+    parents, children = build_graph(raw_path("hpo", "hp.json"))
+    rdr = csv.DictReader(INP.open("r",encoding="utf-8"))
+    rows = list(rdr)
     keep = []
     # precompute leafs
     non_leaf = set()
@@ -56,7 +59,7 @@ def main():
         keep.append(r)
 
     with OUT.open("w",encoding="utf-8",newline="") as fo:
-        w = csv.DictWriter(fo, fieldnames=["gene_id","hpo_id"])
+        w = csv.DictWriter(fo, fieldnames=rdr.fieldnames or ["gene_id","hpo_id"])
         w.writeheader(); w.writerows(keep)
 
     print(f"Filtered {len(rows)} -> {len(keep)} rows. Output: {OUT}")
@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
-# 将 HPO 的 genes_to_phenotype.txt 转成 gene_hpo.csv
+# 将 HPO 的 genes_to_phenotype.txt（或 .gz）转成 gene_hpo.csv
 # 保留：结构路径基因（来自 protein_gene.csv）∪ CPIC 基因（来自 drug_gene_pgx.csv）
+# 全量注释文件：pandas 分块读取 + 向量化 isin 过滤；每块排序去重后写临时 run，
+# 最后 heapq 归并输出（内存只与 chunksize 有关，与文件总行数无关）
 
-import csv
+import argparse, csv, heapq, os, sys, tempfile
+from itertools import groupby
 from pathlib import Path
 
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument  # noqa: E402
+from aekg.raw_store import raw_path  # noqa: E402
+
 ROOT = Path(".")
-G2P = ROOT/"data/raw/hpo/genes_to_phenotype.txt"
 PG  = ROOT/"data/interim/mappings/protein_gene.csv"
 PGX = ROOT/"data/interim/mappings/drug_gene_pgx.csv"
 OUT = ROOT/"data/interim/mappings/gene_hpo.csv"
 
+# genes_to_phenotype 两种版本列序一致：1=gene symbol, 2=HPO ID（旧版 # 开头表头，新版无 #）
+COL_GENE, COL_HPO = 1, 2
+
 def upper_set_from_csv_col(p: Path, col: str):
     s=set()
     if p.exists():
@@ -20,33 +31,87 @@ def upper_set_from_csv_col(p: Path, col: str):
                 if v: s.add(v)
     return s
 
+def default_input():
+    g2p = raw_path("hpo", "genes_to_phenotype.txt")
+    if g2p.exists(): return g2p
+    gz = raw_path("hpo", "genes_to_phenotype.txt.gz")
+    return gz if gz.exists() else g2p
+
+def iter_chunks(path: Path, chunksize: int):
+    """Yield DataFrames [gene, hpo] (strings, stripped/upper-cased); .gz handled by pandas."""
+    reader = pd.read_csv(
+        path, sep="\t", header=None, usecols=[COL_GENE, COL_HPO],
+        dtype=str, na_filter=False, quoting=csv.QUOTE_NONE, engine="c",
+        compression="infer", chunksize=chunksize, on_bad_lines="skip",
+    )
+    for chunk in reader:
+        chunk.columns = ["gene", "hpo"]
+        chunk["gene"] = chunk["gene"].str.strip().str.upper()
+        chunk["hpo"]  = chunk["hpo"].str.strip().str.upper()
+        yield chunk
+
+def write_run(df: pd.DataFrame, tmpdir: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="gene_hpo_run_", suffix=".tsv", dir=tmpdir)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as fo:
+        df.to_csv(fo, sep="\t", header=False, index=False)
+    return path
+
+def read_run(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            g, h, n = line.rstrip("\n").split("\t")
+            yield g, h, int(n)
+
+def merge_runs(paths):
+    """k-way merge of sorted runs; equal (gene, hpo) keys are collapsed and counts summed."""
+    merged = heapq.merge(*(read_run(p) for p in paths))
+    for (g, h), grp in groupby(merged, key=lambda t: (t[0], t[1])):
+        yield g, h, sum(t[2] for t in grp)
+
 def main():
+    ap = argparse.ArgumentParser(description="genes_to_phenotype(.gz) -> gene_hpo.csv (struct ∪ CPIC genes)")
+    ap.add_argument("--input", type=Path, default=None, help="default: current raw snapshot of hpo/genes_to_phenotype.txt (or .gz)")
+    ap.add_argument("--out", type=Path, default=OUT)
+    ap.add_argument("--chunksize", type=int, default=1_000_000, help="rows per chunk (bounds memory)")
+    ap.add_argument("--with-evidence", action="store_true",
+                    help="add n_annotations column (number of annotation rows supporting the pair)")
+    ap.add_argument("--all-genes", action="store_true", help="do not filter by struct ∪ CPIC genes")
+    ap.add_argument("--tmp-dir", default=None, help="where sorted runs are spilled (default: system temp)")
+    args = ap.parse_args()
+
+    src = args.input or default_input()
     struct_genes = upper_set_from_csv_col(PG,  "gene_id")
     cpic_genes   = upper_set_from_csv_col(PGX, "gene_id")
-    keep_genes   = struct_genes | cpic_genes
+    keep_genes   = set() if args.all_genes else (struct_genes | cpic_genes)
+    keep_index   = pd.Index(sorted(keep_genes))
 
-    pairs=set()
-    with open(G2P, encoding="utf-8") as f:
-        for line in f:
-            if not line.strip() or line.startswith("#"):
-                continue
-            # entrez-id, gene-symbol, HPO-ID, HPO-name, ...
-            parts = line.rstrip("\n").split("\t")
-            if len(parts) < 3: continue
-            gene = (parts[1] or "").strip().upper()
-            hpo  = (parts[2] or "").strip().upper()
-            if not hpo.startswith("HP:"): continue
-            if keep_genes and gene not in keep_genes: continue
-            pairs.add((gene, hpo))
-
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUT, "w", encoding="utf-8", newline="") as fo:
-        w = csv.writer(fo)
-        w.writerow(["gene_id","hpo_id"])
-        for g,h in sorted(pairs):
-            w.writerow([g,h])
-
-    print(f"Wrote {OUT} ({len(pairs)} rows). Included CPIC genes: {len(cpic_genes)}")
+    runs = []
+    n_rows = 0
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmpdir:
+        for chunk in iter_chunks(src, args.chunksize):
+            n_rows += len(chunk)
+            mask = chunk["hpo"].str.startswith("HP:")
+            if len(keep_index):
+                mask &= chunk["gene"].isin(keep_index)
+            sel = chunk.loc[mask, ["gene", "hpo"]]
+            if sel.empty: continue
+            run = (sel.groupby(["gene", "hpo"], sort=True).size()
+                      .rename("n").reset_index())
+            runs.append(write_run(run, tmpdir))
+
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        n_out = 0
+        with open(args.out, "w", encoding="utf-8", newline="") as fo:
+            w = csv.writer(fo)
+            w.writerow(["gene_id","hpo_id","n_annotations"] if args.with_evidence else ["gene_id","hpo_id"])
+            for g, h, n in merge_runs(runs):
+                w.writerow([g, h, n] if args.with_evidence else [g, h])
+                n_out += 1
+
+    print(f"Wrote {args.out} ({n_out} rows from {n_rows} annotations, {len(runs)} runs). "
+          f"Included CPIC genes: {len(cpic_genes)}")
+    return n_rows
 
 if __name__ == "__main__":
-    main()
+    with instrument.stage("mappings.gene_hpo_from_hpo") as st:
+        st.rows = main()
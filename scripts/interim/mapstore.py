@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# data/interim/mappings/*.csv|tsv <-> data/interim/mappings.sqlite（字典编码 + 索引，见 src/aekg/mapstore.py）
+#   import : 读 CSV/TSV，写入时统一规范化（BOM/空白/大小写/列名），重建 SQLite
+#   export : 按导入时的列顺序写回 CSV/TSV（兼容尚未迁移的脚本）
+#   info   : 每张表行数、每类 ID 字典大小
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.mapstore import DEFAULT_DB, KINDS, MAPPINGS_DIR, TABLES, MapStore  # noqa: E402
+
+def main():
+    ap = argparse.ArgumentParser(description="Mapping tables <-> SQLite mapping store")
+    ap.add_argument("cmd", choices=["import", "export", "info"])
+    ap.add_argument("--db", type=Path, default=DEFAULT_DB)
+    ap.add_argument("--dir", type=Path, default=MAPPINGS_DIR, help="CSV/TSV directory (source for import, target for export)")
+    ap.add_argument("--tables", nargs="*", choices=sorted(TABLES), default=None)
+    args = ap.parse_args()
+
+    if args.cmd == "import":
+        counts = MapStore.import_csv(args.dir, args.db, args.tables)
+        for t, n in counts.items(): print(f"  {t:16s} {n} rows")
+        print("Wrote", args.db, "(aekg.mappings reads it instead of the CSV files when AEKG_MAPSTORE=1)")
+        return
+    store = MapStore(args.db)
+    if not store.exists():
+        sys.exit(f"Missing {args.db}; run: python scripts/interim/mapstore.py import")
+    if args.cmd == "export":
+        for t, p in store.export_csv(args.dir).items(): print(f"  {t:16s} -> {p}")
+    else:
+        for t in TABLES: print(f"  {t:16s} {len(store.codes(t))} rows")
+        for k in KINDS: print(f"  dict_{k:11s} {len(store.dictionary(k))} ids")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# 按指纹增量重跑整条流水线（阶段定义见 src/aekg/pipeline.py）
+#   python scripts/pipeline.py                 # 只跑过期的阶段，互不依赖的并行
+#   python scripts/pipeline.py rankers eval    # 指定阶段（连同其上游）
+#   python scripts/pipeline.py --dry-run       # 只列出会跑什么、为什么
+import argparse, os, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from aekg.pipeline import STAGES, Pipeline  # noqa: E402
+
+def main():
+    names = [s.name for s in STAGES]
+    ap = argparse.ArgumentParser(description="Run the stale build stages (fingerprint-driven DAG)")
+    ap.add_argument("stages", nargs="*", metavar="stage", help="default: all; one of " + ", ".join(names))
+    ap.add_argument("--network", action="store_true", help="also run stages that download (fetch_chembl, UniProt REST fallback)")
+    ap.add_argument("--force", action="store_true", help="run the selected stages even if up to date")
+    ap.add_argument("--dry-run", action="store_true", help="print what would run and why")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 2, help="stages run concurrently")
+    ap.add_argument("--list", action="store_true", help="list stages with their dependencies")
+    ap.add_argument("--profile", nargs="?", const="1", default=None, metavar="MODE",
+                    help="instrument every stage (AEKG_PROFILE=MODE: 1, cprofile or pyinstrument; see src/aekg/instrument.py)")
+    args = ap.parse_args()
+    bad = [x for x in args.stages if x not in names]
+    if bad:
+        ap.error("unknown stage(s): " + ", ".join(bad))
+
+    if args.profile:
+        os.environ["AEKG_PROFILE"] = args.profile  # 子进程继承
+    pl = Pipeline(network=args.network, jobs=args.jobs)
+    if args.list:
+        for s in STAGES:
+            deps = ", ".join(d for d in names if d in pl.deps[s.name]) or "-"
+            print(f"{s.name:28s} {'[network] ' if s.network else ''}after: {deps}")
+        return
+
+    t0 = time.perf_counter()
+    status = pl.run(args.stages or None, force=args.force, dry_run=args.dry_run)
+    counts = {}
+    for v in status.values(): counts[v] = counts.get(v, 0) + 1
+    print(f"Pipeline {time.perf_counter()-t0:.2f}s: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+    if any(v in ("failed", "blocked") for v in status.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
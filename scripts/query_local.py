@@ -1,10 +1,61 @@
-﻿from rdflib import Graph
-qfile = "queries/r1_paths.sparql"
-g = Graph()
-g.parse("rdf/schema.ttl", format="turtle")
-g.parse("rdf/ae_kg.ttl",  format="turtle")
-with open(qfile, "r", encoding="utf-8") as f:
-    q = f.read()
-print("Running:", qfile)
-for row in g.query(q):
-    print([str(x) for x in row])
+﻿#!/usr/bin/env python3
+# SPARQL over rdf/*.ttl with rdflib; --topk answers "top k AEs of drug X above weight w" from the
+# per-drug index written by scripts/etl/export_predictions.py instead of scanning every :Evidence node.
+#   python scripts/query_local.py                                   # queries/r1_paths.sparql
+#   python scripts/query_local.py --query queries/rollup_ancestor.sparql   # + rdf/hpo_closure.nt
+#   python scripts/query_local.py --topk CHEMBL1064 --k 10 --min-weight 0.5
+#   python scripts/query_local.py --topk CHEMBL1064 --scan          # same answer via queries/topk_may_cause.sparql
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from aekg import predictions  # noqa: E402
+
+CLOSURE = "rdf/hpo_closure.nt"
+
+def sparql(qfile, extra=(), substitute=None):
+    from rdflib import Graph
+    g = Graph()
+    g.parse("rdf/schema.ttl", format="turtle")
+    g.parse("rdf/ae_kg.ttl",  format="turtle")
+    with open(qfile, "r", encoding="utf-8") as f:
+        q = f.read()
+    # HPO 祖先闭包单独成文件（build_graph.py --hpo-closure），只有用到 :hasAncestor 的查询才加载
+    if ":hasAncestor" in q and Path(CLOSURE).exists():
+        extra = [*extra, CLOSURE]
+    for f in extra:
+        g.parse(f, format="nt")
+    # 变量直接替换成常量：rdflib 的 initBindings 在这里会先把整个模式求出来再过滤，慢两个数量级
+    for var, value in (substitute or {}).items():
+        q = q.replace(var, value)
+    print("Running:", qfile)
+    return g.query(q)
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a SPARQL query locally, or read a drug's top-K predictions")
+    ap.add_argument("--query", default="queries/r1_paths.sparql")
+    ap.add_argument("--topk", metavar="DRUG", help="top predictions of one drug (needs export_predictions.py)")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--min-weight", type=float, default=float("-inf"))
+    ap.add_argument("--scan", action="store_true", help="--topk through SPARQL over rdf/ae_predictions.nt")
+    ap.add_argument("--db", default=str(predictions.DB_PATH))
+    args = ap.parse_args()
+
+    if not args.topk:
+        for row in sparql(args.query):
+            print([str(x) for x in row])
+        return
+    if args.scan:
+        rows = sparql("queries/topk_may_cause.sparql", [predictions.NT_PATH],
+                      {"?drug": predictions.iri("drug", args.topk), "?minWeight": repr(max(args.min_weight, -3.4e38))})
+        rows = [(i, str(h).rsplit("/", 1)[-1], float(w)) for i, (h, w) in enumerate(rows, 1)][:args.k]
+    else:
+        idx = predictions.TopKIndex(args.db)
+        if not idx.exists():
+            sys.exit(f"{args.db} not found; run scripts/etl/export_predictions.py first.")
+        rows = idx.top(args.topk, args.k, args.min_weight)
+    for rank, h, w in rows:
+        print(f"{rank}\t{h}\t{w:.6f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,24 @@
 #!/usr/bin/env python3
 # Sum over all Drug→Protein→Gene→HPO paths with action weights, then add β·CPIC and λ·PT prior.
 
-import csv, math
+import csv, sys
 from pathlib import Path
-from collections import defaultdict
 from datetime import date
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, mappings, vocab  # noqa: E402
+
 BETA   = 0.6   # CPIC prior weight
 LAMBDA = 0.3   # PT frequency prior weight
 
 BASE = Path("data/interim/mappings")
-DT = BASE/"drug_targets.csv"
-PG = BASE/"protein_gene.csv"
-GH = BASE/"gene_hpo.csv"
 ACTIONS = BASE/"drug_target_actions.tsv"
-PGX = BASE/"drug_gene_pgx.csv"
-HPO2PT = BASE/"hpo_meddra_map.tsv"
-PTPRIOR = BASE/"pt_prior.csv"
 
 OUTDIR = Path("reports")/f"formal_{date.today()}"; OUTDIR.mkdir(parents=True, exist_ok=True)
 
-def read_csv(p): return list(csv.DictReader(p.open("r",encoding="utf-8")))
-def read_tsv(p): return list(csv.DictReader(p.open("r",encoding="utf-8"), delimiter="\t"))
+def read_tsv(p): return list(csv.DictReader(p.open("r",encoding="utf-8-sig"), delimiter="\t"))
 
 def action_weight(a: str) -> float:
     if not a: return 1.0
@@ -33,77 +30,75 @@ def action_weight(a: str) -> float:
     return 1.0
 
 def main():
-    dt = read_csv(DT)
-    pg = read_csv(PG)
-    gh = read_csv(GH)
-
-    # maps
-    drug2prot = defaultdict(list)
-    for r in dt:
-        drug2prot[r["drug_id"]].append(r["protein_id"])
-
-    prot2gene = defaultdict(list)
-    for r in pg:
-        prot2gene[r["protein_id"]].append(r["gene_id"].upper())
-
-    gene2hpo = defaultdict(list)
-    for r in gh:
-        gene2hpo[r["gene_id"].upper()].append(r["hpo_id"])
+    # maps as int arrays (src/aekg/vocab.py); path lists keep every file row, in file order
+    E = vocab.encoded()
+    drug_protein, protein_gene, gene_hpo = vocab.file_order(E)
+    V_drug, V_prot, V_gene = vocab.vocab("drug"), vocab.vocab("protein"), vocab.vocab("gene")
+    n_hpo = len(E.hpo_ids)
+
+    # HPO→PT (meddra_pt column) + PT prior, looked up by the exact PT spelling
+    hpo2pt = mappings.hpo_pt(pt_cols=("meddra_pt",))
+    pt_prior = {pt: v for pt, v in mappings.iter_rows("pt_prior", None, ("prior",), key_cols=(("meddra_pt",),), strict=True)
+                if pt and v is not None}
+    prior = np.array([pt_prior.get(hpo2pt.get(h, ""), 0.0) for h in E.hpo_names])
+
+    # CPIC drug→gene prior: max over duplicate rows, never below 0 (no cpic_weight column → 0.0)
+    pgx = {}
+    for d, g, w in mappings.cpic_rows():
+        d, g = V_drug.code(d, False), V_gene.code(g, False)
+        gw = pgx.setdefault(d, {})
+        gw[g] = max(gw.get(g, 0.0), 0.0 if w is None else w)
 
     actions = {}
     if ACTIONS.exists():
         for r in read_tsv(ACTIONS):
-            actions[(r["drug_id"], r["protein_id"])] = r.get("action","")
-
-    # HPO→PT + PT prior
-    hpo2pt = {}
-    for r in read_tsv(HPO2PT):
-        hpo2pt[r["hpo_id"]] = r["meddra_pt"]
-    pt_prior = { r["meddra_pt"]: float(r["prior"]) for r in read_csv(PTPRIOR) } if PTPRIOR.exists() else {}
-
-    # CPIC drug→gene prior
-    pgx = defaultdict(float)
-    if PGX.exists():
-        for r in read_csv(PGX):
-            key = (r["drug_id"], r["gene_id"].upper())
-            pgx[key] = max(pgx[key], float(r.get("cpic_weight", 0.0)))
-
-    # score per drug per HPO
-    for drug in sorted(set(r["drug_id"] for r in dt)):
-        scores = defaultdict(float)
-
-        # accumulate path weights
-        for p in drug2prot[drug]:
-            w_act = action_weight(actions.get((drug,p), ""))
-            for g in prot2gene[p]:
-                for h in gene2hpo[g]:
-                    scores[h] += 1.0 * w_act
+            d, p = V_drug.code(r.get("drug_id"), False), V_prot.code(r.get("protein_id"), False)
+            if d >= 0 and p >= 0: actions[(d, p)] = r.get("action","")
+
+    # score per drug per HPO; scores/touched are scratch arrays over all HPO terms, reset after each drug
+    scores = np.zeros(n_hpo)
+    touched = np.zeros(n_hpo, dtype=bool)
+    n_rows = 0
+    for drug in E.drugs.tolist():
+        # accumulate path weights: every Drug→Protein→Gene→HPO path adds the action weight
+        hpos, wts = [np.zeros(0, dtype=np.int32)], [np.zeros(0)]
+        for p in drug_protein.row(drug).tolist():
+            h = gene_hpo.rows(protein_gene.row(p))
+            hpos.append(h); wts.append(np.full(len(h), action_weight(actions.get((drug,p), ""))))
+        hpos, inv = np.unique(np.concatenate(hpos), return_inverse=True)
+        scores[hpos] = np.bincount(inv, weights=np.concatenate(wts), minlength=len(hpos))
+        touched[hpos] = True
 
         # add CPIC contribution
-        for (d,g), w in pgx.items():
-            if d != drug: continue
-            for h in gene2hpo.get(g,[]):
-                scores[h] += BETA * w
+        for g, w in pgx.get(drug, {}).items():
+            h = gene_hpo.row(g)
+            np.add.at(scores, h, BETA * w)
+            touched[h] = True
 
         # add PT prior
-        for h in list(scores.keys()):
-            pt = hpo2pt.get(h)
-            if pt:
-                scores[h] += LAMBDA * pt_prior.get(pt, 0.0)
+        idx = np.flatnonzero(touched)
+        s = scores[idx] + LAMBDA * prior[idx]
+        scores[idx] = 0.0
+        touched[idx] = False
+        order = np.lexsort((idx, -s))          # score desc, then HPO id
+        ranked = E.hpo_strs(idx[order])
+        s = s[order].tolist()
 
         # dump results
-        out = OUTDIR/f"{drug}_ranked_hpo.csv"
+        name = V_drug.value(drug)
+        out = OUTDIR/f"{name}_ranked_hpo.csv"
         with out.open("w",encoding="utf-8",newline="") as fo:
             w = csv.writer(fo); w.writerow(["hpo_id","score"])
-            for h, s in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0])):
-                w.writerow([h, f"{s:.6f}"])
+            w.writerows([h, f"{x:.6f}"] for h, x in zip(ranked, s))
+        n_rows += len(ranked)
 
         # small debug
-        top3 = [h for h,_ in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:3]]
-        with (OUTDIR/f"debug_{drug}.txt").open("w",encoding="utf-8") as f:
-            f.write("top3 HPO: " + ", ".join(top3) + "\n")
+        with (OUTDIR/f"debug_{name}.txt").open("w",encoding="utf-8") as f:
+            f.write("top3 HPO: " + ", ".join(ranked[:3]) + "\n")
 
     print(f"Wrote ranked HPO lists to {OUTDIR}")
+    return n_rows
 
 if __name__=="__main__":
-    main()
+    with instrument.stage("rankers.r1_paths_plus_weights", OUTDIR) as st:
+        st.rows = main()
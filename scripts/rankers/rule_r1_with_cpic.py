@@ -1,91 +1,74 @@
 ﻿#!/usr/bin/env python3
 # R1 with CPIC + multi-path support + lambda * PT prior
-import csv
+import argparse, csv, sys
 from pathlib import Path
-from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg import instrument, vocab  # noqa: E402
+from aekg.bitsets import MODES, SupportCounter  # noqa: E402
 
 BETA   = 0.6   # CPIC 鏉冮噸锛堝悗缁彲璋冨弬锛?
 LAMBDA = 0.3   # PT 鍏堥獙鏉冮噸锛堝悗缁彲璋冨弬锛?
 K      = 10
 
 ROOT = Path(".")
-M    = ROOT/"data"/"interim"/"mappings"
 RPT  = ROOT/"reports"/f"formal_{__import__('datetime').datetime.now():%Y-%m-%d}"
 RPT.mkdir(parents=True, exist_ok=True)
 
-def read_csv(path, delim=","):
-    with open(path, encoding="utf-8-sig") as f:
-        return list(csv.DictReader(f, delimiter=delim))
-
-def write_rank(drug_id, hpo2score):
-    rows = sorted(hpo2score.items(), key=lambda x:-x[1])
+def write_rank(drug_id, hpo_ids, scores):
+    rows = sorted(zip(hpo_ids, scores), key=lambda x:-x[1])
     with open(RPT/f"{drug_id}_ranked_hpo.csv","w",encoding="utf-8",newline="") as fo:
         w=csv.writer(fo); w.writerow(["hpo_id","score"]); w.writerows(rows)
+    return len(rows)
 
 def main():
-    dt  = read_csv(M/"drug_targets.csv")            # drug_id, protein_id
-    pg  = read_csv(M/"protein_gene.csv")            # protein_id, gene_id
-    gh  = read_csv(M/"gene_hpo.csv")                # gene_id, hpo_id
-    pgx = read_csv(M/"drug_gene_pgx.csv")           # drug_id, gene_id, cpic_weight
-    hm  = read_csv(M/"hpo_meddra_map.tsv", "\t")    # hpo_id, meddra_pt
-
-    # PT prior
-    pt_prior = {r["meddra_pt"].lower(): float(r["prior"]) for r in read_csv(M/"pt_prior.csv")} if (M/"pt_prior.csv").exists() else {}
-
-    # indices
-    drug2prot = defaultdict(set)
-    for r in dt: drug2prot[r["drug_id"]].add(r["protein_id"])
-
-    prot2gene = defaultdict(set)
-    for r in pg: prot2gene[r["protein_id"]].add(r["gene_id"].upper())
-
-    gene2hpo  = defaultdict(set)
-    for r in gh: gene2hpo[r["gene_id"].upper()].add(r["hpo_id"])
-
-    hpo2pt    = {}
-    for r in hm:
-        if r.get("hpo_id") and r.get("meddra_pt"):
-            hpo2pt[r["hpo_id"]] = r["meddra_pt"]
-
-    drug2pgxgenes = defaultdict(list)
-    for r in pgx:
-        try:
-            drug2pgxgenes[r["drug_id"]].append((r["gene_id"].upper(), float(r.get("cpic_weight",1.0))))
-        except: pass
-
-    # rank per drug
-    for drug in sorted({r["drug_id"] for r in dt}):
+    ap = argparse.ArgumentParser(description="R1 + CPIC + PT prior ranking for every drug")
+    ap.add_argument("--supports", choices=MODES, default="auto",
+                    help="count unique-gene supports with per-HPO gene bitsets, CSR lists, or per drug whichever is cheaper")
+    args = ap.parse_args()
+
+    # 映射表编码成整数数组（src/aekg/vocab.py），同一进程内只构建一次
+    E = vocab.encoded()
+    drug_names = vocab.vocab("drug").values
+    n_hpo = len(E.hpo_ids)
+    counter = SupportCounter(E.gene_hpo, n_hpo, args.supports)
+
+    # rank per drug; score/touched are scratch arrays over all HPO terms, reset after each drug
+    score = np.zeros(n_hpo)
+    touched = np.zeros(n_hpo, dtype=bool)
+    n_rows = 0
+    for drug in E.drugs.tolist():
         # collect reachable genes via structure
-        genes_struct = set()
-        for p in drug2prot[drug]:
-            genes_struct |= prot2gene[p]
-
-        # accumulate supports per HPO锛氱敱澶氬皯 unique genes 鏀寔
-        hpo_supports = defaultdict(int)
-        for g in genes_struct:
-            for h in gene2hpo.get(g, []):
-                hpo_supports[h] += 1
+        genes_struct = np.unique(E.protein_gene.rows(E.drug_protein.row(drug)))
 
-        # 褰掍竴鍖栵紙閬垮厤鍏?1.0锛?
-        max_sup = max(hpo_supports.values()) if hpo_supports else 1
-        hpo_score = {h: s/max_sup for h,s in hpo_supports.items()}
+        # accumulate supports per HPO: number of unique genes supporting it (src/aekg/bitsets.py)
+        hpos, supports = counter.supports(genes_struct)
 
-        # CPIC 鍙犲姞锛堜笉鏄?max锛?
-        for g, w in drug2pgxgenes.get(drug, []):
-            for h in gene2hpo.get(g, []):
-                hpo_score[h] = hpo_score.get(h, 0.0) + BETA * w
+        # normalize by the max support
+        max_sup = supports.max() if len(supports) else 1
+        score[hpos] = supports / max_sup
+        touched[hpos] = True
 
-        # PT prior 鍙犲姞
-        for h in list(hpo_score.keys()):
-            pt = hpo2pt.get(h, "")
-            if pt:
-                hpo_score[h] += LAMBDA * pt_prior.get(pt.lower(), 0.0)
+        # CPIC is added on top (not max)
+        pgx = E.drug_gene_pgx
+        for g, w in zip(pgx.row(drug).tolist(), pgx.row_weights(drug).tolist()):
+            h = E.gene_hpo.row(g)
+            score[h] += BETA * w
+            touched[h] = True
 
-        write_rank(drug, hpo_score)
+        # PT prior
+        idx = np.flatnonzero(touched)
+        n_rows += write_rank(drug_names[drug], E.hpo_strs(idx), (score[idx] + LAMBDA * E.hpo_prior[idx]).tolist())
+        score[idx] = 0.0
+        touched[idx] = False
 
-    print(f"Wrote ranked HPO lists to {RPT}")
+    print(f"Wrote ranked HPO lists to {RPT} (supports: {counter.used['bitset']} drugs via bitsets, {counter.used['csr']} via lists)")
+    return n_rows
 
 if __name__ == "__main__":
-    main()
+    with instrument.stage("rankers.r1_cpic", RPT) as st:
+        st.rows = main()
 
 
@@ -2,6 +2,9 @@
 import os, sys, requests, certifi
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.http_cache import HttpCache  # noqa: E402
+
 URLS = {
     "meddra_all_se.tsv.gz": "https://sideeffects.embl.de/download/meddra_all_se.tsv.gz",
     "drug_names.tsv.gz":    "https://sideeffects.embl.de/download/drug_names.tsv.gz",  # 可选
@@ -9,26 +12,23 @@ URLS = {
 
 OUTDIR = Path("data/raw/sider")
 
+def _cache(verify):
+    sess = requests.Session()
+    sess.verify = verify
+    return HttpCache(session=sess)
+
 def download(url: str, out: Path, allow_insecure_fallback: bool = True):
+    # 走共享 HTTP 缓存：ETag/Last-Modified 未变则不重新下载
     out.parent.mkdir(parents=True, exist_ok=True)
-    def _save(resp):
-        resp.raise_for_status()
-        with open(out, "wb") as f:
-            for chunk in resp.iter_content(1<<20):
-                if chunk: f.write(chunk)
-        print(f"OK  {out}  ({out.stat().st_size} bytes)")
-
     try:
         print(f"Downloading (verified): {url}")
-        with requests.get(url, stream=True, timeout=60, verify=certifi.where()) as r:
-            _save(r)
-            return
+        sha, cached = _cache(certifi.where()).download(url, out, source="sider")
     except requests.exceptions.SSLError as e:
         if not allow_insecure_fallback:
             raise
         print(f"[SSL error] {e}; trying insecure fallback (verify=False)...")
-        with requests.get(url, stream=True, timeout=60, verify=False) as r:
-            _save(r)
+        sha, cached = _cache(False).download(url, out, source="sider")
+    print(f"OK  {out}  ({out.stat().st_size} bytes{', unchanged/cached' if cached else ''})  sha256={sha[:12]}")
 
 def main():
     # 如果在代理环境，requests 会自动读取 HTTPS_PROXY/http_proxy 环境变量；也可手动设置：
@@ -1,49 +1,97 @@
 #!/usr/bin/env python3
-import sys, csv, hashlib, os, datetime, requests
+# Download every source in configs/raw_sources.yml into the raw snapshot store
+# (src/aekg/raw_store.py): blobs are deduplicated by sha256, today's manifest
+# carries forward unchanged files, and data/raw/<source>/<date>/ holds read-only hard links.
+# - sources are fetched concurrently (--workers); each transfer is hashed while it
+#   streams (4 MiB buffers), and the HTTP cache blob is adopted into the store as a
+#   hard link (no copy), so a multi-GB file costs one write and no re-read
+# - interrupted transfers resume with HTTP Range (partial files live in the HTTP cache)
+# - a file whose sha256 equals the current snapshot (or the last hash logged in
+#   docs/data_sources.tsv) is not re-linked or re-logged; the hash is only known once
+#   the body is on disk, so the transfer itself is saved only by the HTTP cache
+#   (fresh entry, or 304 to If-None-Match / If-Modified-Since)
+import sys, csv, os, datetime, argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.http_cache import HttpCache  # noqa: E402
+from aekg.raw_store import RawStore  # noqa: E402
+
 ROOT = Path("."); RAW = ROOT/"data"/"raw"; DOCS = ROOT/"docs"
 LOG = DOCS/"data_sources.tsv"
 
-def sha256_of(path):
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""): h.update(chunk)
-    return h.hexdigest()
-
 def ensure_log():
     LOG.parent.mkdir(parents=True, exist_ok=True)
     if not LOG.exists():
         LOG.write_text("source\tname\turl\taccessed_on\tversion\tlicense\thash_sha256\tnotes\n", encoding="utf-8")
 
+def last_hashes():
+    """(source, name) -> last hash_sha256 recorded in the log."""
+    last = {}
+    with open(LOG, encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f, delimiter="\t"):
+            sha = (r.get("hash_sha256") or "").strip()
+            if len(sha) == 64:
+                last[((r.get("source") or "").strip(), (r.get("name") or "").strip())] = sha
+    return last
+
 def append_log(source, name, url, sha, notes="snapshot"):
     accessed = datetime.date.today().isoformat()
     with open(LOG, "a", encoding="utf-8", newline="") as f:
         w = csv.writer(f, delimiter="\t")
         w.writerow([source, name, url, accessed, "", "", sha, notes])
 
-def main(cfg_path):
+def main(cfg_path, workers=4):
     ensure_log()
     cfg = yaml.safe_load(open(cfg_path, "r", encoding="utf-8"))
     day = datetime.date.today().isoformat()
+    http = HttpCache()
+    store = RawStore(RAW)
+    prev = last_hashes()
+    changed = {}
+
+    jobs = []
     for source, files in cfg.items():
-        dest_dir = RAW/source/day; dest_dir.mkdir(parents=True, exist_ok=True)
-        print(f"== {source} => {dest_dir}")
         for item in files or []:
             url = item.get("url"); name = item.get("name") or os.path.basename(url or "file")
             if not url or url.startswith("<PUT_"):
-                print(f"   - SKIP (fill url later): {name}"); continue
-            out = dest_dir/name; print(f"   - GET {url} -> {out}")
-            with requests.get(url, stream=True, timeout=120) as r:
-                r.raise_for_status()
-                with open(out, "wb") as f:
-                    for chunk in r.iter_content(8192):
-                        if chunk: f.write(chunk)
-            sha = sha256_of(out); append_log(source, name, url, sha)
-            print(f"     SHA256: {sha}")
-    print("Done.")
+                print(f"   - SKIP (fill url later): {source}/{name}"); continue
+            jobs.append((source, name, url))
+
+    def fetch(job):
+        source, name, url = job
+        sha, cached = http.download(url, None, source="snapshot")  # always revalidated (TTL 0)
+        return job, sha, cached
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futs = [pool.submit(fetch, j) for j in jobs]
+        for fut in as_completed(futs):
+            try:
+                (source, name, url), sha, cached = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"   - FAIL {e}")
+                continue
+            if store.blob_sha(source, name) == sha:
+                print(f"   - UNCHANGED {source}/{name}  SHA256: {sha}")
+                continue
+            store.add_blob(http.blob_path(sha), sha, link=True)
+            changed[f"{source}/{name}"] = {"sha256": sha, "size": store.blob_path(sha).stat().st_size, "url": url}
+            if prev.get((source, name)) != sha:
+                append_log(source, name, url, sha, notes="snapshot (cached)" if cached else "snapshot")
+            print(f"   - GET {url} -> {RAW/source/day/name}\n     SHA256: {sha}")
+    if changed:
+        store.commit(day, changed)
+        print(f"Snapshot {day}: {len(changed)} new/changed file(s); current -> {day}")
+    print("Done." if not failed else f"Done with {failed} failures.")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    cfg = sys.argv[1] if len(sys.argv)>1 else "configs/raw_sources.yml"
-    main(cfg)
+    ap = argparse.ArgumentParser(description="Fetch raw snapshots listed in a sources YAML.")
+    ap.add_argument("config", nargs="?", default="configs/raw_sources.yml")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent downloads")
+    args = ap.parse_args()
+    sys.exit(main(args.config, args.workers))
@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
-import csv, gzip, json, re
+# 数据清单（reports/inventory）：实体规模 / 边数 / 柱状图
+# - 每个映射表只读一遍（去重列 + 边数一起统计）
+# - hp.json 流式解析（有 ijson 用 ijson，否则分块正则扫描），不整体载入内存
+# - 每个文件的统计按 sha256 缓存在 reports/inventory/.stats_cache.json；
+#   文件 size/mtime 未变时连哈希都不算，重跑只会重新扫描改动过的文件
+# - 缓存里只放计数：跨文件的量（基因并集、HPO→PT ∩ SIDER）按两边文件的哈希
+#   单独缓存成一个数，不缓存去重值列表
+import argparse, csv, gzip, re, sys
 from pathlib import Path
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.fingerprint import StatsCache  # noqa: E402
+from aekg.raw_store import raw_path  # noqa: E402
 
 ROOT = Path(".")
 OUTD = ROOT/"reports"/"inventory"
-OUTD.mkdir(parents=True, exist_ok=True)
+CACHE = OUTD/".stats_cache.json"
 
 P = {
     "drug_targets": ROOT/"data/interim/mappings/drug_targets.csv",
@@ -13,77 +23,82 @@ P = {
     "gene_hpo":    ROOT/"data/interim/mappings/gene_hpo.csv",
     "hpo_pt_map":  ROOT/"data/interim/mappings/hpo_meddra_map.tsv",
     "pgx":         ROOT/"data/interim/mappings/drug_gene_pgx.csv",
-    "hp_json":     ROOT/"data/raw/hpo/hp.json",
-    "hp_obo":      ROOT/"data/raw/hpo/hp.obo",
-    "sider_se":    ROOT/"data/raw/sider/meddra_all_se.tsv.gz",
-    "sider_drugs": ROOT/"data/raw/sider/drug_names.tsv.gz",
     "ttl":         ROOT/"rdf/ae_kg.ttl",
     "triple_counts": ROOT/"triple_counts.txt",
 }
+# data/raw 下的文件在 main() 里按当前快照解析（raw_path 每次读 CURRENT）
+RAW_FILES = {
+    "hp_json":     ("hpo", "hp.json"),
+    "hp_obo":      ("hpo", "hp.obo"),
+    "sider_se":    ("sider", "meddra_all_se.tsv.gz"),
+    "sider_drugs": ("sider", "drug_names.tsv.gz"),
+}
+
+# 每个表：要计去重数的列 + 计边所需的列（两列都非空才算一条边）；upper=基因名大小写不敏感
+TABLES = {
+    "drug_targets": dict(distinct=["drug_id","protein_id"], edge=["drug_id","protein_id"]),
+    "protein_gene": dict(distinct=["gene_id"],              edge=["protein_id","gene_id"], upper=True),
+    "gene_hpo":     dict(distinct=["hpo_id"],               edge=["gene_id","hpo_id"]),
+    "hpo_pt_map":   dict(distinct=[],                       edge=["hpo_id","meddra_pt"], delimiter="\t"),
+    "pgx":          dict(distinct=["gene_id"],              edge=["drug_id","gene_id"], upper=True),
+}
+
+HP_ID = re.compile(rb'"id"\s*:\s*"[^"]*?HP[_:](\d{7})"')
 
-def read_csv_unique(path: Path, col: str, delimiter=","):
+# ---------- 单文件统计（结果可 JSON 序列化，进缓存） ----------
+
+def table_stats(path: Path, distinct, edge, delimiter=",", upper=False):
+    """一遍扫描：{"distinct": {col: 去重数}, "edges": n}"""
+    seen = {c: set() for c in distinct}
+    edges = 0
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f, delimiter=delimiter):
+            for c in distinct:
+                v = (r.get(c) or "").strip()
+                if v: seen[c].add(v.upper() if upper else v)
+            if all((r.get(c) or "").strip() for c in edge):
+                edges += 1
+    return {"distinct": {c: len(s) for c, s in seen.items()}, "edges": edges}
+
+def column_values(path: Path, col, delimiter=",", fold=None):
+    """某列去重值（只在算跨文件计数时临时用，不进缓存）"""
     if not path.exists(): return set()
-    out=set()
-    with open(path, encoding="utf-8-sig") as f:
-        rdr = csv.DictReader(f, delimiter=delimiter)
-        for r in rdr:
-            v=(r.get(col) or "").strip()
-            if v: out.add(v)
-    return out
-
-def read_edges(path: Path, cols, delimiter=","):
-    if not path.exists(): return 0
-    cnt=0
-    with open(path, encoding="utf-8-sig") as f:
-        rdr = csv.DictReader(f, delimiter=delimiter)
-        for r in rdr:
-            if all((r.get(c) or "").strip() for c in cols):
-                cnt+=1
-    return cnt
-
-def count_hpo_total():
-    """优先 hp.json；否则 hp.obo；若都失败，回退到 gene_hpo.csv 的去重"""
-    # hp.json
-    try:
-        if P["hp_json"].exists():
-            data = json.load(open(P["hp_json"], encoding="utf-8"))
-            def walk(obj):
-                if isinstance(obj, dict):
-                    for k,v in obj.items():
-                        if k=="id" and isinstance(v,str) and v.startswith("HP:"):
-                            yield v
-                        else:
-                            yield from walk(v)
-                elif isinstance(obj, list):
-                    for x in obj: yield from walk(x)
-            s=set(walk(data))
-            if s: return len(s)
-    except Exception:
-        pass
-    # hp.obo
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        vals = ((r.get(col) or "").strip() for r in csv.DictReader(f, delimiter=delimiter))
+        return {fold(v) if fold else v for v in vals if v}
+
+def hp_json_ids(path: Path, chunk=4 << 20):
+    """hp.json 中节点 id（URI 形如 .../HP_0000001 或 HP:0000001）去重计数，流式。"""
+    ids = set()
     try:
-        if P["hp_obo"].exists():
-            n=0
-            for line in open(P["hp_obo"], encoding="utf-8", errors="ignore"):
-                if line.startswith("id: HP:"): n+=1
-            if n>0: return n
-    except Exception:
-        pass
-    # 兜底：gene_hpo.csv
-    s = read_csv_unique(P["gene_hpo"], "hpo_id")
-    return len(s)
-
-def count_sider_pt():
-    """统计 SIDER 的 PT 数量和涉及的 drug 数；自动适配 有表头/无表头 两种布局。"""
-    import gzip
-    se_path = P["sider_se"]
-    if not se_path.exists():
-        return 0, 0
-
-    uniq_pt=set()
-    uniq_drugs=set()
-
-    with gzip.open(se_path, "rt", encoding="utf-8", errors="ignore") as f:
+        import ijson
+    except ImportError:
+        ijson = None
+    if ijson is not None:
+        with open(path, "rb") as f:
+            for v in ijson.items(f, "graphs.item.nodes.item.id"):
+                m = re.search(r"HP[_:](\d{7})$", v or "")
+                if m: ids.add(m.group(1))
+        return len(ids)
+    # 无 ijson：分块正则，块间保留尾部避免截断
+    tail = b""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            buf = tail + block
+            ids.update(m.group(1) for m in HP_ID.finditer(buf))
+            tail = buf[-512:]
+    return len(ids)
+
+def hp_obo_ids(path: Path):
+    n = 0
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith("id: HP:"): n += 1
+    return n
+
+def sider_rows(path: Path):
+    """逐行 (drug, 是否 PT, 术语名)；自动适配有表头/无表头两种布局。"""
+    with gzip.open(path, "rt", encoding="utf-8", errors="ignore") as f:
         first = f.readline().rstrip("\n").split("\t")
 
         # —— 识别是否为“无表头”版本：
@@ -93,22 +108,8 @@ def count_sider_pt():
         if headerless:
             # 无表头固定列位：0=drug, 3=type, 5=name
             i_drug, i_type, i_name = 0, 3, 5
-
-            def handle_row(cols):
-                if len(cols) <= max(i_drug, i_type, i_name): 
-                    return
-                drug = cols[i_drug].strip()
-                typ  = cols[i_type].strip().upper()
-                name = cols[i_name].strip()
-                if drug: uniq_drugs.add(drug)
-                if name and typ == "PT": uniq_pt.add(name)
-
-            # 先处理“第一行数据”
-            handle_row(first)
-            # 再流式处理剩余各行
-            for line in f:
-                handle_row(line.rstrip("\n").split("\t"))
-
+            is_pt = lambda s: s.strip().upper() == "PT"
+            rows = [first]
         else:
             # 有表头：按列名兼容多版本
             hdr = [h.strip() for h in first]
@@ -126,83 +127,163 @@ def count_sider_pt():
                 if not s: return False
                 u = s.strip().upper()
                 return (u == "PT") or (u.startswith("PT")) or ("PREFERRED" in u and "TERM" in u)
+            rows = []
+
+        def split(r):
+            ctype = (r[i_type] if i_type < len(r) else "")
+            cname = (r[i_name] if i_name < len(r) else "").strip()
+            drug  = (r[i_drug] if i_drug < len(r) else "").strip()
+            return drug, is_pt(ctype), cname
+
+        for r in rows:
+            yield split(r)
+        for line in f:
+            yield split(line.rstrip("\n").split("\t"))
+
+def sider_stats(path: Path):
+    """SIDER PT 数、药物数、全部术语数（小写去重）"""
+    uniq_pt=set(); uniq_drugs=set(); uniq_all=set()
+    for drug, pt, cname in sider_rows(path):
+        if drug: uniq_drugs.add(drug)
+        if cname:
+            uniq_all.add(cname.lower())
+            if pt: uniq_pt.add(cname)
+    return {"pt": len(uniq_pt), "drugs": len(uniq_drugs), "all": len(uniq_all)}
+
+def sider_map_overlap(path: Path, map_path: Path):
+    """hpo_meddra_map 的 PT（小写）里在 SIDER 术语名中出现的个数"""
+    map_pts = column_values(map_path, "meddra_pt", delimiter="\t", fold=str.lower)
+    hit = set()
+    for _, _, cname in sider_rows(path):
+        c = cname.lower()
+        if c in map_pts: hit.add(c)
+    return len(hit)
 
-            for line in f:
-                r = line.rstrip("\n").split("\t")
-                ctype = (r[i_type] if i_type is not None and i_type < len(r) else "")
-                cname = (r[i_name] if i_name is not None and i_name < len(r) else "")
-                drug  = (r[i_drug] if i_drug is not None and i_drug < len(r) else "")
-                if drug: uniq_drugs.add(drug.strip())
-                if cname and is_pt(ctype): uniq_pt.add(cname.strip())
-
-    return len(uniq_pt), len(uniq_drugs)
-
-
-# — 实体规模 —
-drug_ids     = read_csv_unique(P["drug_targets"], "drug_id")
-proteins     = read_csv_unique(P["drug_targets"], "protein_id")
-genes_pg     = {g.upper() for g in read_csv_unique(P["protein_gene"], "gene_id")}
-genes_pgx    = {g.upper() for g in read_csv_unique(P["pgx"], "gene_id")}
-genes_total  = genes_pg | genes_pgx
-hpo_total    = count_hpo_total()
-pt_total, sider_drug_total = count_sider_pt()
-triples      = count_triples()
-
-# — 边 —
-edges_dt  = read_edges(P["drug_targets"], ["drug_id","protein_id"])
-edges_pg  = read_edges(P["protein_gene"], ["protein_id","gene_id"])
-edges_gh  = read_edges(P["gene_hpo"],    ["gene_id","hpo_id"])
-edges_hppt= read_edges(P["hpo_pt_map"],  ["hpo_id","meddra_pt"], delimiter="\t")
-
-pt_total, sider_drug_total, se_all_total, pt_lower = count_sider_pt()
-
-inv_rows = [
-    {"entity":"Drugs (MVP)",      "count":len(drug_ids),    "source":"You selected (CHEMBL IDs)",      "files":str(P["drug_targets"].relative_to(ROOT))},
-    {"entity":"Proteins",         "count":len(proteins),    "source":"UniProt (via ChEMBL/DrugCentral)","files":str(P["drug_targets"].relative_to(ROOT))},
-    {"entity":"Genes (struct)",   "count":len(genes_pg),    "source":"HGNC (via UniProt mapping)",      "files":str(P["protein_gene"].relative_to(ROOT))},
-    {"entity":"Genes (CPIC)",     "count":len(genes_pgx),   "source":"CPIC prior",                      "files":str(P["pgx"].relative_to(ROOT))},
-    {"entity":"Genes (union)",    "count":len(genes_total), "source":"struct + CPIC",                   "files":"protein_gene.csv + drug_gene_pgx.csv"},
-    {"entity":"HPO terms (total)","count":hpo_total,        "source":"HPO hp.json / hp.obo / fallback", "files":"data/raw/hpo/hp.json | hp.obo | gene_hpo.csv"},
-    {"entity":"MedDRA PT (SIDER)","count":pt_total,         "source":"SIDER (meddra_all_se.tsv.gz)",    "files":str(P["sider_se"].relative_to(ROOT)) if P["sider_se"].exists() else "N/A"},
-]
-# 若严格 PT 仍为 0，则附加两行“回退统计”避免 PPT 空缺
-if pt_total == 0:
-    inv_rows += [
-        {"entity":"SIDER terms (all types)","count":se_all_total, "source":"SIDER (fallback all names)","files":str(P["sider_se"].relative_to(ROOT))},
-        {"entity":"PT (≥ HPO↔SIDER lower bound)","count":pt_lower,"source":"Intersection with HPO→PT","files":"hpo_meddra_map.tsv ∩ SIDER"},
+def triple_count(path: Path):
+    m = re.search(r"Total triples:\s*(\d+)", path.read_text(encoding="utf-8", errors="ignore"))
+    return int(m.group(1)) if m else None
+
+# ---------- 汇总 ----------
+
+def count_triples(cache):
+    """triple_counts.txt（根目录，或最近一次 reports/midterm_*/）里的总三元组数"""
+    cands = [P["triple_counts"]] + sorted((ROOT/"reports").glob("midterm_*/triple_counts.txt"), reverse=True)
+    for p in cands:
+        n = cache.get(p, "triples:v1", triple_count)
+        if n is not None: return n
+    return "N/A"
+
+def count_hpo_total(cache, n_gene_hpo_ids):
+    """优先 hp.json；否则 hp.obo；若都失败，回退到 gene_hpo.csv 的去重数"""
+    n = cache.get(P["hp_json"], "hpo_ids:v1", hp_json_ids, default=0)
+    if n: return n
+    n = cache.get(P["hp_obo"], "hpo_ids:v1", hp_obo_ids, default=0)
+    if n: return n
+    return n_gene_hpo_ids
+
+def rel(p: Path):
+    return str(p.relative_to(ROOT))
+
+def plot(inv_rows, out_png):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    labels = [r["entity"] for r in inv_rows]
+    values = [r["count"]  for r in inv_rows]
+    plt.figure()
+    plt.bar(labels, values)
+    plt.xticks(rotation=45, ha="right")
+    plt.ylabel("Count")
+    plt.title("Project data inventory")
+    plt.tight_layout()
+    plt.savefig(out_png, dpi=160)
+    plt.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Data inventory (reports/inventory) with per-file stats cache")
+    ap.add_argument("--no-cache", action="store_true", help="ignore and rebuild the stats cache")
+    ap.add_argument("--no-plot", action="store_true", help="skip data_inventory.png")
+    args = ap.parse_args()
+    P.update({k: raw_path(*sn) for k, sn in RAW_FILES.items()})
+
+    OUTD.mkdir(parents=True, exist_ok=True)
+    if args.no_cache and CACHE.exists(): CACHE.unlink()
+    cache = StatsCache(CACHE)
+
+    empty = {"distinct": {}, "edges": 0}
+    T = {}
+    for key, spec in TABLES.items():
+        kind = "table:v2:" + ",".join(spec["distinct"]) + "|" + ",".join(spec["edge"])
+        T[key] = cache.get(P[key], kind, lambda p, s=spec: table_stats(p, **s), default=empty)
+    n_distinct = lambda key, c: T[key]["distinct"].get(c, 0)
+
+    # — 实体规模 —
+    n_drugs      = n_distinct("drug_targets", "drug_id")
+    n_proteins   = n_distinct("drug_targets", "protein_id")
+    n_genes_pg   = n_distinct("protein_gene", "gene_id")
+    n_genes_pgx  = n_distinct("pgx", "gene_id")
+    genes = lambda p: column_values(p, "gene_id", fold=str.upper)
+    n_genes_all  = cache.get_with(P["protein_gene"], [P["pgx"]], "genes_union:v1",
+                                  lambda p: len(genes(p) | genes(P["pgx"])), default=n_genes_pgx)
+    hpo_total    = count_hpo_total(cache, n_distinct("gene_hpo", "hpo_id"))
+    triples      = count_triples(cache)
+
+    sider = cache.get(P["sider_se"], "sider:v2", sider_stats, default={"pt": 0, "drugs": 0, "all": 0})
+    pt_total, se_all_total = sider["pt"], sider["all"]
+
+    # — 边 —
+    edges_dt  = T["drug_targets"]["edges"]
+    edges_pg  = T["protein_gene"]["edges"]
+    edges_gh  = T["gene_hpo"]["edges"]
+    edges_hppt= T["hpo_pt_map"]["edges"]
+
+    inv_rows = [
+        {"entity":"Drugs (MVP)",      "count":n_drugs,          "source":"You selected (CHEMBL IDs)",      "files":rel(P["drug_targets"])},
+        {"entity":"Proteins",         "count":n_proteins,       "source":"UniProt (via ChEMBL/DrugCentral)","files":rel(P["drug_targets"])},
+        {"entity":"Genes (struct)",   "count":n_genes_pg,       "source":"HGNC (via UniProt mapping)",      "files":rel(P["protein_gene"])},
+        {"entity":"Genes (CPIC)",     "count":n_genes_pgx,      "source":"CPIC prior",                      "files":rel(P["pgx"])},
+        {"entity":"Genes (union)",    "count":n_genes_all,      "source":"struct + CPIC",                   "files":"protein_gene.csv + drug_gene_pgx.csv"},
+        {"entity":"HPO terms (total)","count":hpo_total,        "source":"HPO hp.json / hp.obo / fallback", "files":"data/raw/hpo/hp.json | hp.obo | gene_hpo.csv"},
+        {"entity":"MedDRA PT (SIDER)","count":pt_total,         "source":"SIDER (meddra_all_se.tsv.gz)",    "files":rel(P["sider_se"]) if P["sider_se"].exists() else "N/A"},
     ]
+    # 若严格 PT 仍为 0，则附加两行“回退统计”避免 PPT 空缺
+    if pt_total == 0:
+        pt_lower = cache.get_with(P["sider_se"], [P["hpo_pt_map"]], "map_pt_overlap:v1",
+                                  lambda p: sider_map_overlap(p, P["hpo_pt_map"]), default=0)
+        inv_rows += [
+            {"entity":"SIDER terms (all types)","count":se_all_total, "source":"SIDER (fallback all names)","files":rel(P["sider_se"])},
+            {"entity":"PT (≥ HPO↔SIDER lower bound)","count":pt_lower,"source":"Intersection with HPO→PT","files":"hpo_meddra_map.tsv ∩ SIDER"},
+        ]
+
+    cache.save()
+
+    with open(OUTD/"data_inventory.csv","w",encoding="utf-8",newline="") as fo:
+        w=csv.DictWriter(fo, fieldnames=["entity","count","source","files"])
+        w.writeheader(); w.writerows(inv_rows)
+
+    with open(OUTD/"edge_counts.csv","w",encoding="utf-8",newline="") as fo:
+        w=csv.DictWriter(fo, fieldnames=["mapping","edges","files"])
+        w.writeheader()
+        w.writerow({"mapping":"Drug→Protein","edges":edges_dt,"files":rel(P["drug_targets"])})
+        w.writerow({"mapping":"Protein→Gene","edges":edges_pg,"files":rel(P["protein_gene"])})
+        w.writerow({"mapping":"Gene→HPO","edges":edges_gh,"files":rel(P["gene_hpo"])})
+        w.writerow({"mapping":"HPO→PT","edges":edges_hppt,"files":rel(P["hpo_pt_map"])})
+
+    with open(OUTD/"SUMMARY.txt","w",encoding="utf-8") as f:
+        f.write("Data inventory summary\n")
+        f.write(f"- Drugs (MVP): {n_drugs}\n")
+        f.write(f"- Proteins: {n_proteins}\n")
+        f.write(f"- Genes (struct ∪ CPIC): {n_genes_all}\n")
+        f.write(f"- HPO terms (total): {hpo_total}\n")
+        f.write(f"- MedDRA PT (SIDER): {pt_total}\n")
+        f.write(f"- RDF triples: {triples}\n")
+
+    outs = [OUTD/"data_inventory.csv", OUTD/"edge_counts.csv", OUTD/"SUMMARY.txt"]
+    if not args.no_plot:
+        plot(inv_rows, OUTD/"data_inventory.png")
+        outs.append(OUTD/"data_inventory.png")
+    print("Wrote:", *outs)
+    print(f"stats cache: {cache.hits} hit(s), {cache.misses} recomputed")
 
-with open(OUTD/"data_inventory.csv","w",encoding="utf-8",newline="") as fo:
-    w=csv.DictWriter(fo, fieldnames=["entity","count","source","files"])
-    w.writeheader(); w.writerows(inv_rows)
-
-with open(OUTD/"edge_counts.csv","w",encoding="utf-8",newline="") as fo:
-    w=csv.DictWriter(fo, fieldnames=["mapping","edges","files"])
-    w.writeheader()
-    w.writerow({"mapping":"Drug→Protein","edges":edges_dt,"files":str(P["drug_targets"].relative_to(ROOT))})
-    w.writerow({"mapping":"Protein→Gene","edges":edges_pg,"files":str(P["protein_gene"].relative_to(ROOT))})
-    w.writerow({"mapping":"Gene→HPO","edges":edges_gh,"files":str(P["gene_hpo"].relative_to(ROOT))})
-    w.writerow({"mapping":"HPO→PT","edges":edges_hppt,"files":str(P["hpo_pt_map"].relative_to(ROOT))})
-
-with open(OUTD/"SUMMARY.txt","w",encoding="utf-8") as f:
-    f.write("Data inventory summary\n")
-    f.write(f"- Drugs (MVP): {len(drug_ids)}\n")
-    f.write(f"- Proteins: {len(proteins)}\n")
-    f.write(f"- Genes (struct ∪ CPIC): {len(genes_total)}\n")
-    f.write(f"- HPO terms (total): {hpo_total}\n")
-    f.write(f"- MedDRA PT (SIDER): {pt_total}\n")
-    f.write(f"- RDF triples: {triples}\n")
-
-# 简单柱状图
-labels = [r["entity"] for r in inv_rows]
-values = [r["count"]  for r in inv_rows]
-plt.figure()
-plt.bar(labels, values)
-plt.xticks(rotation=45, ha="right")
-plt.ylabel("Count")
-plt.title("Project data inventory")
-plt.tight_layout()
-plt.savefig(OUTD/"data_inventory.png", dpi=160)
-plt.close()
-
-print("Wrote:", OUTD/"data_inventory.csv", OUTD/"edge_counts.csv", OUTD/"data_inventory.png", OUTD/"SUMMARY.txt")
+if __name__ == "__main__":
+    main()
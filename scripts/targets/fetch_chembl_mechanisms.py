@@ -3,14 +3,37 @@
 """
 Fetch protein actions (mechanisms) from ChEMBL and resolve UniProt accessions.
 Inputs:
-  - drugs from CLI args or env CHEMBL_DRUGS="CHEMBL1064,CHEMBL108"
+  - drugs from CLI args, --drugs-file, or env CHEMBL_DRUGS="CHEMBL1064,CHEMBL108"
 Outputs:
   - data/raw/chembl/chembl_mechanisms.csv                (raw enriched)
   - data/interim/mappings/drug_targets_enriched.csv      (drug_id, protein_id, action_type, is_moa, source)
   - data/interim/mappings/drug_targets.csv               (drug_id, protein_id)  # minimal for R1
+  - data/raw/chembl/chembl_mechanisms.checkpoint.jsonl   (one line per finished molecule; used to resume,
+                                                          deleted once the outputs are written)
+
+Molecules are fetched by a thread pool sharing one pooled requests.Session.
+All requests go through a token bucket (--rate req/s), and target -> accession
+lookups are memoized for the run (concurrent lookups of one target wait for
+the first). --base-url lets the script run against a local stub server
+(tests/test_fetch_chembl.py). Responses go through the shared HTTP cache
+(data/cache/http); with --offline the run is served from that cache only.
+
+429/5xx are retried by the session (Retry-After respected). A request that
+still fails makes its molecule fail: it is neither memoized nor written to the
+checkpoint, the other molecules finish, no output CSV is written and the exit
+code is 1, so the next run (which resumes from the checkpoint unless --fresh)
+retries exactly the failed ones. After a complete run the checkpoint is
+removed, so the next run fetches every molecule again.
+Only a 404 from the target endpoint counts as "no accessions".
 """
-import os, sys, time, csv, requests
+import os, sys, time, csv, json, argparse, threading, requests
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.http_cache import HttpCache  # noqa: E402
 
 ROOT = Path(".")
 RAW  = ROOT/"data"/"raw"/"chembl"
@@ -18,48 +41,117 @@ OUTM = ROOT/"data"/"interim"/"mappings"
 RAW.mkdir(parents=True, exist_ok=True)
 OUTM.mkdir(parents=True, exist_ok=True)
 
-MECH_API   = "https://www.ebi.ac.uk/chembl/api/data/mechanism.json"
-TARGET_API = "https://www.ebi.ac.uk/chembl/api/data/target/{}.json"
+BASE_URL   = "https://www.ebi.ac.uk/chembl/api/data"
+MECH_PATH   = "/mechanism.json"
+TARGET_PATH = "/target/{}.json"
+CHECKPOINT  = RAW/"chembl_mechanisms.checkpoint.jsonl"
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
 
-def drugs_from_args_env():
-    if len(sys.argv) > 1:
-        return [x.strip() for x in sys.argv[1:] if x.strip()]
+class ChemblClient:
+    """Pooled session + rate limit + per-run target accession memo."""
+    def __init__(self, base_url=BASE_URL, workers=8, rate=10.0, timeout=60, offline=None, retries=5, backoff=0.5):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # cache hits skip the token bucket; only real requests are throttled
+        self.http = HttpCache(session=self.session, throttle=self.bucket.acquire, offline=offline)
+        self.memo = {}
+        self._memo_lock = threading.Lock()
+        self.memo_hits = 0
+
+    def get(self, path, params=None):
+        return self.http.get(self.base_url + path, params=params, source="chembl", timeout=self.timeout)
+
+    def accessions(self, target_chembl_id):
+        """Memoized resolve_accessions(); a target is looked up at most once per run unless the lookup fails."""
+        with self._memo_lock:
+            fut = self.memo.get(target_chembl_id)
+            owner = fut is None
+            if owner:
+                fut = self.memo[target_chembl_id] = Future()
+            else:
+                self.memo_hits += 1
+        if owner:
+            try:
+                fut.set_result(resolve_accessions(target_chembl_id, self))
+            except BaseException as e:
+                # 失败不记忆：当前等待者收到同一异常，之后的调用重新查询
+                with self._memo_lock:
+                    self.memo.pop(target_chembl_id, None)
+                fut.set_exception(e)
+        return fut.result()
+
+def drugs_from_args_env(args):
+    drugs = [x.strip() for x in args.drugs if x.strip()]
+    if args.drugs_file:
+        with open(args.drugs_file, encoding="utf-8-sig") as f:
+            drugs += [ln.strip() for ln in f if ln.strip() and not ln.startswith("#")]
+    if drugs:
+        return list(dict.fromkeys(drugs))
     env = os.environ.get("CHEMBL_DRUGS", "")
     if env:
         return [x.strip() for x in env.split(",") if x.strip()]
     # 默认用辛伐他汀+卡马西平
     return ["CHEMBL1064","CHEMBL108"]
 
-def fetch_mechanisms(chembl_id, limit=200):
+def fetch_mechanisms(chembl_id, client, limit=200):
     out=[]
     offset=0
     while True:
-        r = requests.get(MECH_API, params={"molecule_chembl_id": chembl_id, "limit": limit, "offset": offset}, timeout=60)
+        r = client.get(MECH_PATH, params={"molecule_chembl_id": chembl_id, "limit": limit, "offset": offset})
         r.raise_for_status()
         data = r.json()
         mechs = data.get("mechanisms") or data.get("mechanism") or []
         out.extend(mechs)
         if len(mechs) < limit: break
-        offset += limit; time.sleep(0.1)
+        offset += limit
     return out
 
-def resolve_accessions(target_chembl_id):
-    """Fallback: query target endpoint to get target_components[].accession"""
-    try:
-        r = requests.get(TARGET_API.format(target_chembl_id), timeout=60)
-        if r.status_code != 200:
-            return []
-        j = r.json()
-        comps = j.get("target_components") or []
-        accs=[]
-        for c in comps:
-            acc = (c.get("accession") or c.get("component_accession") or "").strip()
-            if acc: accs.append(acc)
-        return list(dict.fromkeys(accs))
-    except Exception:
+def resolve_accessions(target_chembl_id, client):
+    """
+    Fallback: query target endpoint to get target_components[].accession.
+    404 -> [] (no such target); any other failure raises, so that it is not
+    memoized or checkpointed as "no accessions".
+    """
+    r = client.get(TARGET_PATH.format(target_chembl_id))
+    if r.status_code == 404:
         return []
+    r.raise_for_status()
+    j = r.json()
+    comps = j.get("target_components") or []
+    accs=[]
+    for c in comps:
+        acc = (c.get("accession") or c.get("component_accession") or "").strip()
+        if acc: accs.append(acc)
+    return list(dict.fromkeys(accs))
 
-def flatten_rows(mechs):
+def flatten_rows(mechs, client):
     rows=[]
     for m in mechs:
         d = (m.get("molecule_chembl_id") or "").strip()
@@ -77,7 +169,7 @@ def flatten_rows(mechs):
 
         # 若没有 accession，回查 target 接口
         if not accs and tchembl:
-            accs = resolve_accessions(tchembl)
+            accs = client.accessions(tchembl)
 
         if accs:
             for acc in accs:
@@ -108,15 +200,76 @@ def write_csv(path, rows, header):
         w = csv.DictWriter(f, fieldnames=header)
         w.writeheader(); w.writerows(rows)
 
+def load_checkpoint(path):
+    """drug_id -> rows for molecules finished by an earlier (possibly killed) run."""
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a killed run
+            done[rec["drug_id"]] = rec["rows"]
+    return done
+
 def main():
-    drugs = drugs_from_args_env()
+    ap = argparse.ArgumentParser(description="Fetch ChEMBL mechanisms -> drug_targets*.csv")
+    ap.add_argument("drugs", nargs="*", help="ChEMBL molecule IDs")
+    ap.add_argument("--drugs-file", help="file with one ChEMBL ID per line")
+    ap.add_argument("--base-url", default=os.environ.get("CHEMBL_API", BASE_URL))
+    ap.add_argument("--workers", type=int, default=8, help="concurrent molecules / pooled connections")
+    ap.add_argument("--rate", type=float, default=10.0, help="max requests per second (all threads)")
+    ap.add_argument("--checkpoint", type=Path, default=CHECKPOINT)
+    ap.add_argument("--fresh", action="store_true", help="ignore and truncate an existing checkpoint")
+    ap.add_argument("--offline", action="store_true", default=None, help="serve from the HTTP cache only")
+    args = ap.parse_args()
+
+    drugs = drugs_from_args_env(args)
+    if args.fresh and args.checkpoint.exists():
+        args.checkpoint.unlink()
+    done = load_checkpoint(args.checkpoint)
+    todo = [d for d in drugs if d not in done]
+    if len(todo) < len(drugs):
+        print(f"Resuming: {len(drugs)-len(todo)} molecules already in {args.checkpoint}")
+
+    client = ChemblClient(args.base_url, workers=args.workers, rate=args.rate, offline=args.offline)
+    ck_lock = threading.Lock()
+    args.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+
+    def work(d):
+        mechs = fetch_mechanisms(d, client)
+        rows  = flatten_rows(mechs, client)
+        with ck_lock, open(args.checkpoint, "a", encoding="utf-8") as ck:
+            ck.write(json.dumps({"drug_id": d, "rows": rows}, ensure_ascii=False) + "\n")
+        return d, mechs, rows
+
+    t0 = time.time()
+    failed = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futs = {pool.submit(work, d): d for d in todo}
+        for i, fut in enumerate(as_completed(futs), 1):
+            try:
+                d, mechs, rows = fut.result()
+            except Exception as e:
+                failed[futs[fut]] = e
+                print(f"[{i}/{len(todo)}] {futs[fut]} FAILED: {e}")
+                continue
+            done[d] = rows
+            if len(todo) <= 20 or i % 100 == 0 or i == len(todo):
+                print(f"[{i}/{len(todo)}] {d} mechanisms: {len(mechs)}  -> resolved rows: {sum(1 for r in rows if r['protein_id'])}")
+    print(f"Fetched {len(todo)-len(failed)} molecules in {time.time()-t0:.1f}s "
+          f"(target lookups: {len(client.memo)}, memo hits: {client.memo_hits}, "
+          f"cache hits: {client.http.hits + client.http.revalidated}, network: {client.http.fetched})")
+    if failed:
+        # 不写出不完整的映射表；已完成的分子在 checkpoint 里，重跑只补失败的
+        print(f"{len(failed)} molecules failed (not checkpointed); outputs not written. Re-run to retry them.")
+        return 1
+
     all_rows=[]
     for d in drugs:
-        mechs = fetch_mechanisms(d)
-        rows  = flatten_rows(mechs)
-        print(f"[{d}] mechanisms: {len(mechs)}  -> resolved rows: {sum(1 for r in rows if r['protein_id'])}")
-        all_rows.extend(rows)
-        time.sleep(0.2)
+        all_rows.extend(done.get(d, []))
 
     raw_path = RAW/"chembl_mechanisms.csv"
     write_csv(raw_path, all_rows, ["drug_id","protein_id","target_chembl_id","action_type","is_moa","mechanism_of_action","source"])
@@ -141,6 +294,9 @@ def main():
     print("Wrote:", raw_path)
     print("Wrote:", OUTM/"drug_targets_enriched.csv")
     print("Wrote:", OUTM/"drug_targets.csv")
+    # 输出已完整写出，checkpoint 只用于续跑中断/失败的那一次
+    args.checkpoint.unlink(missing_ok=True)
+    return 0
 
 if __name__=="__main__":
-    main()
+    sys.exit(main())
@@ -1,17 +1,32 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Fill missing UniProt -> gene_symbol mappings by querying UniProt REST API.
+Fill missing UniProt -> gene_symbol mappings.
 - Reads proteins from data/interim/mappings/drug_targets.csv
 - Reads existing data/interim/mappings/protein_gene.csv
-- Fills ONLY missing accessions
+- Fills ONLY missing accessions: first from the offline index built from
+  data/raw/uniprot/idmapping_selected.tab (one batched lookup), then from the
+  UniProt REST API for accessions the index does not know (responses are kept
+  in the shared HTTP cache)
+- --offline makes no network requests: REST answers already in the HTTP cache
+  are still used, anything else stays unresolved
 Outputs:
 - Overwrites data/interim/mappings/protein_gene.csv with merged rows
 - Writes a short report of unresolved accessions
+
+Build / refresh the index once after downloading the bulk files:
+  python scripts/targets/fill_missing_protein_gene.py --build-index
+(the pipeline's uniprot_index stage runs it with --index-only whenever the
+bulk files change)
 """
-import csv, time, requests
+import argparse, csv, sys, time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+from aekg.http_cache import HttpCache  # noqa: E402
+from aekg.raw_store import raw_path  # noqa: E402
+from aekg.uniprot_index import DEFAULT_INDEX, UniProtIndex, build_index  # noqa: E402
+
 M = Path("data/interim/mappings")
 DT = M/"drug_targets.csv"
 PG = M/"protein_gene.csv"
@@ -29,9 +44,9 @@ def write_csv(p, rows, header):
     with open(p, "w", encoding="utf-8", newline="") as f:
         w=csv.DictWriter(f, fieldnames=header); w.writeheader(); w.writerows(rows)
 
-def fetch_gene_from_item(acc):
+def fetch_gene_from_item(acc, http):
     try:
-        r = requests.get(UNIPROT_ITEM.format(acc), timeout=30)
+        r = http.get(UNIPROT_ITEM.format(acc), source="uniprot", timeout=30)
         if r.status_code != 200: return ""
         j = r.json()
         genes = j.get("genes") or []
@@ -47,9 +62,9 @@ def fetch_gene_from_item(acc):
     except Exception:
         return ""
 
-def fetch_gene_from_tsv(acc):
+def fetch_gene_from_tsv(acc, http):
     try:
-        r = requests.get(UNIPROT_TSV.format(acc), timeout=30)
+        r = http.get(UNIPROT_TSV.format(acc), source="uniprot", timeout=30)
         if r.status_code != 200: return ""
         lines = r.text.strip().splitlines()
         if len(lines) >= 2:
@@ -64,7 +79,32 @@ def fetch_gene_from_tsv(acc):
     except Exception:
         return ""
 
+def first_existing(p: Path):
+    gz = p.with_name(p.name + ".gz")
+    return p if p.exists() or not gz.exists() else gz
+
 def main():
+    ap = argparse.ArgumentParser(description="Fill missing protein -> gene rows in protein_gene.csv")
+    ap.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="SQLite accession -> gene index")
+    ap.add_argument("--build-index", action="store_true", help="(re)build the index from the bulk files first")
+    ap.add_argument("--idmapping", type=Path, default=None, help="default: raw uniprot/idmapping_selected.tab (or .gz)")
+    ap.add_argument("--hgnc", type=Path, default=None, help="default: raw hgnc/hgnc_complete_set.txt (or .gz)")
+    ap.add_argument("--index-only", action="store_true", help="only (re)build the index, leave protein_gene.csv alone")
+    ap.add_argument("--offline", action="store_true", help="no network requests; REST fallback answers come from the HTTP cache only")
+    args = ap.parse_args()
+
+    if args.build_index:
+        idm = args.idmapping or first_existing(raw_path("uniprot", "idmapping_selected.tab"))
+        hgnc = args.hgnc or first_existing(raw_path("hgnc", "hgnc_complete_set.txt"))
+        t0 = time.time()
+        try:
+            n = build_index(idm, args.index, hgnc_path=hgnc)
+        except (FileNotFoundError, ValueError) as e:
+            raise SystemExit(f"Cannot build {args.index}: {e}")
+        print(f"Built {args.index} ({n} accessions) in {time.time()-t0:.1f}s")
+    if args.index_only:
+        return
+
     dt = read_csv(DT)
     pg = read_csv(PG)
     have = {(r["protein_id"] or "").strip(): (r["gene_id"] or "").strip() for r in pg if r.get("protein_id")}
@@ -72,29 +112,40 @@ def main():
     new_rows=[]
     unresolved=[]
 
-    for i,acc in enumerate(need, 1):
-        gene = fetch_gene_from_item(acc)
+    idx = UniProtIndex(args.index)
+    local = idx.lookup(need)
+    idx.close()
+    # polite rate limit, applied only to requests that actually hit the network
+    http = HttpCache(offline=args.offline, throttle=lambda: time.sleep(0.1))
+    n_fallback = 0
+    for acc in need:
+        gene = local.get(acc, "")
         if not gene:
-            gene = fetch_gene_from_tsv(acc)
+            n_fallback += 1
+            gene = fetch_gene_from_item(acc, http)
+            if not gene:
+                gene = fetch_gene_from_tsv(acc, http)
         if gene:
             new_rows.append({"protein_id": acc, "gene_id": gene})
         else:
             unresolved.append(acc)
-        time.sleep(0.1)  # polite rate limit
 
     # merge & dedup
     merged = { (r["protein_id"], r["gene_id"]) for r in pg if r.get("protein_id") and r.get("gene_id") }
     for r in new_rows: merged.add((r["protein_id"], r["gene_id"]))
     out_rows = [{"protein_id":p, "gene_id":g} for (p,g) in sorted(merged)]
 
-    write_csv(PG, out_rows, ["protein_id","gene_id"])
+    if new_rows:   # 没有补到新行就不重写，保持已提交文件原样
+        write_csv(PG, out_rows, ["protein_id","gene_id"])
 
     REPORT.parent.mkdir(parents=True, exist_ok=True)
     with open(REPORT, "w", encoding="utf-8") as f:
-        f.write(f"Filled {len(new_rows)} accessions.\n")
+        f.write(f"Filled {len(new_rows)} accessions ({len(local)} from offline index; {n_fallback} REST fallbacks: "
+                f"{http.hits} cached answers, {http.fetched + http.revalidated} network requests"
+                f"{', offline' if http.offline else ''}).\n")
         if unresolved:
             f.write("Unresolved:\n" + "\n".join(unresolved) + "\n")
-    print(f"Updated {PG} ({len(out_rows)} rows). Unresolved: {len(unresolved)}")
+    print(f"{'Updated' if new_rows else 'Unchanged'} {PG} ({len(out_rows)} rows). Unresolved: {len(unresolved)}")
     if unresolved:
         print("Unresolved list written to", REPORT)
 
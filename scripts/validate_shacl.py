@@ -1,7 +1,48 @@
-﻿from pyshacl import validate
+﻿import argparse, sys
+from pathlib import Path
 from rdflib import Graph
-data = Graph().parse("rdf/ae_kg.ttl", format="turtle")
-sh   = Graph().parse("shacl/shapes.ttl", format="turtle")
-conforms, results_graph, results_text = validate(data, shacl_graph=sh, inference="rdfs", abort_on_first=False)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from aekg import instrument  # noqa: E402
+from aekg.shacl_fast import validate  # noqa: E402
+
+ap = argparse.ArgumentParser(description="Validate rdf/ae_kg.ttl against shacl/shapes.ttl")
+ap.add_argument("--data", default="rdf/ae_kg.ttl")
+ap.add_argument("--shapes", default="shacl/shapes.ttl")
+ap.add_argument("--pyshacl", action="store_true", help="full pyshacl run instead of the compiled fast path")
+ap.add_argument("--incremental", action="store_true",
+                help="re-check only focus nodes touched since the last validated graph; "
+                     "report persisted in --state-dir")
+ap.add_argument("--added", default=None, help="N-Triples of added triples (default: diff vs last_validated.nt)")
+ap.add_argument("--removed", default=None, help="N-Triples of removed triples")
+ap.add_argument("--state-dir", default="reports/shacl")
+args = ap.parse_args()
+
+with instrument.stage("shacl.validate") as st:
+    hit = None
+    if args.incremental:
+        from aekg.fingerprint import sha256_file
+        from aekg.shacl_incremental import stored_report, validate_incremental
+        shapes_sha, data_sha = sha256_file(args.shapes), sha256_file(args.data)
+        # 数据文件与上次验证的一字不差：直接用存下的报告，图既不解析也不序列化
+        hit = stored_report(shapes_sha, data_sha, args.state_dir)
+    if hit is not None:
+        conforms, results_text = hit
+        print("[unchanged] data file identical to the last validated one; stored report reused")
+    else:
+        data = Graph().parse(args.data, format="turtle")
+        sh   = Graph().parse(args.shapes, format="turtle")
+        st.rows = len(data)
+        if args.incremental:
+            delta = lambda p: Graph().parse(p, format="nt") if p else None
+            conforms, results_text, info = validate_incremental(
+                data, sh, shapes_sha, args.state_dir,
+                added=delta(args.added), removed=delta(args.removed), data_sha256=data_sha)
+            print(f"[{info['mode']}] +{info['added']} / -{info['removed']} triples, "
+                  f"focus nodes re-checked: {info['focus_checked'] if info['focus_checked'] is not None else 'all'}")
+        else:
+            if args.pyshacl:
+                from pyshacl import validate
+            conforms, results_graph, results_text = validate(data, shacl_graph=sh, inference="rdfs", abort_on_first=False)
 print("Conforms:", conforms)
 print(results_text)
@@ -0,0 +1,7 @@
+"""Shared helpers for the AE-KG scripts under scripts/.
+
+Scripts add ``<repo>/src`` to ``sys.path`` and import from here, e.g.:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+    from aekg.obo import iter_obo_terms
+"""
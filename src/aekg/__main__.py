@@ -0,0 +1,7 @@
+"""python -m aekg (with src/ on sys.path): same as scripts/aekg.py."""
+
+import sys
+
+from aekg.cli import main
+
+sys.exit(main())
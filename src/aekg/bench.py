@@ -0,0 +1,192 @@
+"""
+Benchmarks of the pipeline scripts on synthetic workspaces (aekg.synthetic).
+
+Each benchmark runs one script exactly as the pipeline does, as a separate
+interpreter with cwd set to the workspace root, and reports:
+
+    seconds        wall time of the process
+    cpu_s          user + system CPU of the process
+    peak_rss_mb    the process's own high-water RSS (os.wait4; None on Windows)
+    rows           data rows in the benchmark's main input files
+    rows_per_s     rows / seconds
+
+BENCHMARKS is ordered so that every script finds the files it needs: the
+HPO -> PT map is rebuilt before the rankers read it, and run_eval_formal reads
+the ranked lists the rankers just wrote.
+"""
+
+import glob
+import math
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+M = "data/interim/mappings/"
+
+
+class Bench(NamedTuple):
+    name: str
+    script: str
+    rows: Tuple[str, ...]          # globs (workspace-relative) whose data lines count as rows
+    args: Tuple[str, ...] = ()
+
+
+BENCHMARKS: List[Bench] = [
+    Bench("hpo2pt_map", "scripts/eval/build_hpo2pt_map.py", (M + "gene_hpo.csv",),
+          ("--gene-hpo", M + "gene_hpo.csv", "--hpo-obo", "data/raw/hpo/hp.obo",
+           "--pt-synonyms", M + "pt_synonyms.tsv",
+           "--overrides", M + "hpo_meddra_overrides.tsv", "--overrides-pt-col", "meddra_pt",
+           "--out-tsv", M + "hpo_meddra_map.tsv")),
+    Bench("pt_prior", "scripts/eval/pt_prior_from_sider.py", ("data/raw/sider/meddra_all_se.tsv.gz",)),
+    Bench("build_graph", "scripts/etl/build_graph.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv")),
+    Bench("rank_r1_cpic", "scripts/rankers/rule_r1_with_cpic.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv")),
+    Bench("rank_r1_paths", "scripts/rankers/rule_r1_paths_plus_weights.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv")),
+    Bench("eval", "scripts/eval/run_eval_formal.py", ("reports/formal_*/CHEMBL1064_ranked_hpo.csv",
+                                                     "reports/formal_*/CHEMBL108_ranked_hpo.csv")),
+]
+
+
+def count_rows(root: Path, patterns: Sequence[str]) -> int:
+    """Data lines (newlines minus one header line) over every matching file; .gz is decompressed."""
+    import gzip
+    n = 0
+    for pat in patterns:
+        for p in glob.glob(str(root / pat)):
+            opener = gzip.open if p.endswith(".gz") else open
+            with opener(p, "rb") as f:
+                n += sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+            n -= 0 if p.endswith(".gz") else 1   # SIDER has no header
+    return n
+
+
+def git_commit(root=ROOT) -> str:
+    """Short HEAD hash, '+dirty' when tracked files are modified; 'unknown' outside git."""
+    try:
+        head = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--"], cwd=root).returncode != 0
+        return head + ("+dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    for k in ("AEKG_PROFILE", "AEKG_PROFILE_DIR", "AEKG_RAW_ROOT"):
+        env.pop(k, None)
+    return env
+
+
+def run_process(cmd: Sequence[str], cwd: Path, log: Optional[Path] = None) -> Tuple[int, float, float, Optional[float]]:
+    """(returncode, wall seconds, cpu seconds, peak RSS MB) of one child process."""
+    out = open(log, "w", encoding="utf-8") if log else subprocess.DEVNULL
+    try:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(list(cmd), cwd=cwd, stdout=out, stderr=subprocess.STDOUT, env=_child_env())
+        if hasattr(os, "wait4"):
+            _, status, ru = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - t0
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+            return proc.returncode, wall, ru.ru_utime + ru.ru_stime, round(ru.ru_maxrss / scale, 1)
+        proc.wait()
+        return proc.returncode, time.perf_counter() - t0, float("nan"), None
+    finally:
+        if log:
+            out.close()
+
+
+def run_bench(b: Bench, workspace, log_dir: Optional[Path] = None) -> dict:
+    """Run one benchmark in workspace; raises RuntimeError if the script fails."""
+    workspace = Path(workspace)
+    rows = count_rows(workspace, b.rows)
+    log = (Path(log_dir) / f"{b.name}.log") if log_dir else None
+    if log:
+        log.parent.mkdir(parents=True, exist_ok=True)
+    rc, wall, cpu, rss = run_process([sys.executable, str(ROOT / b.script)] + list(b.args), workspace, log)
+    if rc != 0:
+        raise RuntimeError(f"{b.name} exited with {rc}" + (f" (log: {log})" if log else ""))
+    return {"bench": b.name, "seconds": round(wall, 4), "cpu_s": round(cpu, 4), "peak_rss_mb": rss,
+            "rows": rows, "rows_per_s": round(rows / wall, 1) if wall > 0 else None}
+
+
+def select(names: Optional[Sequence[str]]) -> List[Bench]:
+    if not names:
+        return list(BENCHMARKS)
+    known = {b.name for b in BENCHMARKS}
+    bad = [n for n in names if n not in known]
+    if bad:
+        raise ValueError("unknown benchmark(s): " + ", ".join(bad))
+    return [b for b in BENCHMARKS if b.name in names]
+
+
+# ---------- statistics for regression tracking ----------
+
+def summarize(samples: Sequence[float]) -> dict:
+    """median, interquartile range, min, max of repeated timings."""
+    xs = sorted(samples)
+    n = len(xs)
+
+    def q(p):
+        k = (n - 1) * p
+        lo, hi = int(k), min(int(k) + 1, n - 1)
+        return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+    return {"n": n, "median": round(q(0.5), 4), "iqr": round(q(0.75) - q(0.25), 4),
+            "min": round(xs[0], 4), "max": round(xs[-1], 4)}
+
+
+def _u_distribution(n: int, m: int) -> List[int]:
+    """Number of arrangements giving each U value (0..n*m) for samples of size n and m without ties."""
+    # f[i][j] is the count list for sizes (i, j); f(i, j, u) = f(i-1, j, u-j) + f(i, j-1, u)
+    f = [[[1] for _ in range(m + 1)] for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            a, b = f[i - 1][j], f[i][j - 1]
+            out = [0] * (i * j + 1)
+            for u, c in enumerate(b):
+                out[u] += c
+            for u, c in enumerate(a):
+                out[u + j] += c
+            f[i][j] = out
+    return f[n][m]
+
+
+def mann_whitney_greater(a: Sequence[float], b: Sequence[float]) -> float:
+    """
+    One-sided Mann-Whitney U p-value for 'a tends to be larger than b'.
+    Exact for small samples without ties, normal approximation (tie-corrected,
+    continuity-corrected) otherwise.
+    """
+    n, m = len(a), len(b)
+    if not n or not m:
+        return 1.0
+    pooled = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    ranks, i, ties = [0.0] * len(pooled), 0, []
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        if j > i:
+            ties.append(j - i + 1)
+        i = j + 1
+    r_a = sum(r for r, (_, g) in zip(ranks, pooled) if g == 0)
+    u = r_a - n * (n + 1) / 2          # pairs (x in a, y in b) with x > y, ties count 1/2
+    if not ties and n * m <= 400:
+        dist = _u_distribution(n, m)
+        return sum(dist[int(math.ceil(u)):]) / sum(dist)
+    mu = n * m / 2
+    tie_term = sum(t ** 3 - t for t in ties) / ((n + m) * (n + m - 1))
+    sigma = math.sqrt(n * m / 12 * ((n + m + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - mu - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
@@ -0,0 +1,140 @@
+"""
+Single entry point for the pipeline scripts:
+
+    python scripts/aekg.py rank                  # = scripts/rankers/rule_r1_with_cpic.py
+    python scripts/aekg.py map + rank + eval     # three stages, one interpreter
+    PYTHONPATH=src python -m aekg validate --pyshacl
+
+Only this module and the standard library are imported at startup. A
+subcommand runs its script in-process (runpy, as __main__), so pandas, rdflib,
+pyshacl or matplotlib are imported by the commands that use them, and only
+then. Stages chained with "+" share the interpreter: heavy modules are
+imported once, and the memoized loaders in aekg.mappings parse each mapping
+table once for the whole chain. Arguments after a command go to its script
+unchanged; a command with no arguments uses the same defaults as
+scripts/pipeline.py.
+"""
+
+import os
+import runpy
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+class Command(NamedTuple):
+    script: str
+    help: str
+    stage: Optional[str] = None   # aekg.pipeline stage whose arguments are the defaults
+
+
+COMMANDS: Dict[str, Command] = {
+    "rank":       Command("scripts/rankers/rule_r1_with_cpic.py", "R1 + CPIC + PT prior ranking"),
+    "rank-paths": Command("scripts/rankers/rule_r1_paths_plus_weights.py", "path-sum ranking with action weights"),
+    "rank-combo": Command("scripts/rankers/rule_r1_combo.py", "R1 + CPIC ranking for drug pairs / sets"),
+    "map":        Command("scripts/eval/build_hpo2pt_map.py", "build hpo_meddra_map.tsv (HPO -> MedDRA PT)",
+                          stage="build_hpo2pt_map"),
+    "similar":    Command("scripts/analysis/drug_similarity.py", "top-N similar drugs by AE profile (MinHash/LSH)"),
+    "semsim":     Command("scripts/analysis/semantic_similarity.py", "Resnik/Lin BMA similarity of HPO profiles (drugs | gold)"),
+    "prior":      Command("scripts/eval/pt_prior_from_sider.py", "PT prior from SIDER"),
+    "build":      Command("scripts/etl/build_graph.py", "mappings -> rdf/ae_kg.ttl"),
+    "export":     Command("scripts/etl/export_predictions.py", "ranked lists -> :mayCause/:Evidence triples + top-K index"),
+    "eval":       Command("scripts/eval/run_eval_formal.py", "P@10 / nDCG@10 of the latest ranked lists"),
+    "validate":   Command("scripts/validate_shacl.py", "SHACL validation of rdf/ae_kg.ttl"),
+    "inventory":  Command("scripts/reports/make_data_inventory.py", "data inventory report"),
+    "figs":       Command("scripts/figs/make_midterm_figs.py", "midterm figures"),
+    "pipeline":   Command("scripts/pipeline.py", "fingerprint-driven rebuild of stale stages"),
+}
+
+USAGE = """usage: aekg [--profile[=MODE]] COMMAND [ARGS...] [+ COMMAND [ARGS...]]...
+
+Run pipeline stages; chain several with '+' to run them in one process.
+ARGS go to the stage's script (try `aekg COMMAND --help`).
+
+commands:
+{commands}
+
+options:
+  -h, --help        show this message
+  --profile[=MODE]  set AEKG_PROFILE (1, cprofile or pyinstrument) for the stages
+"""
+
+
+def usage() -> str:
+    width = max(map(len, COMMANDS))
+    return USAGE.format(commands="\n".join(f"  {n:{width}s}  {c.help}" for n, c in COMMANDS.items()))
+
+
+def split_chain(argv: List[str]) -> List[List[str]]:
+    chain, cur = [], []
+    for a in argv:
+        if a == "+":
+            if cur:
+                chain.append(cur)
+            cur = []
+        else:
+            cur.append(a)
+    if cur:
+        chain.append(cur)
+    return chain
+
+
+def default_args(cmd: Command) -> List[str]:
+    if not cmd.stage:
+        return []
+    from aekg.pipeline import STAGES, expand
+    stage = next(s for s in STAGES if s.name == cmd.stage)
+    return [expand(a) for a in stage.args]
+
+
+def run_script(script: Path, args: List[str]) -> int:
+    """Run script as __main__ with sys.argv = [script, *args]; returns its exit status."""
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [str(script)] + list(args)
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    while argv and argv[0].startswith("-"):
+        opt = argv.pop(0)
+        if opt in ("-h", "--help"):
+            print(usage())
+            return 0
+        if opt == "--profile" or opt.startswith("--profile="):
+            os.environ["AEKG_PROFILE"] = opt.partition("=")[2] or "1"
+        else:
+            print(f"aekg: unknown option {opt}\n\n{usage()}", file=sys.stderr)
+            return 2
+    chain = split_chain(argv)
+    if not chain:
+        print(usage(), file=sys.stderr)
+        return 2
+    unknown = [seg[0] for seg in chain if seg[0] not in COMMANDS]
+    if unknown:
+        print(f"aekg: unknown command(s): {', '.join(unknown)}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    for seg in chain:
+        name, args = seg[0], seg[1:]
+        cmd = COMMANDS[name]
+        t0 = time.perf_counter()
+        rc = run_script(ROOT / cmd.script, args or default_args(cmd))
+        if len(chain) > 1:
+            print(f"[aekg] {name} {'ok' if rc == 0 else f'exit {rc}'} {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+        if rc != 0:
+            return rc
+    return 0
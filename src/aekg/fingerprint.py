@@ -0,0 +1,111 @@
+"""
+File fingerprints and a small per-file statistics cache.
+
+A fingerprint is (size, mtime_ns, sha256). Checking whether a file changed is
+a stat() call; the file is only hashed when size or mtime moved, and a touched
+but identical file keeps its cached value.
+
+    cache = StatsCache("reports/inventory/.stats_cache.json")
+    stats = cache.get(path, "csv_stats:v1", lambda p: expensive_scan(p))
+    both = cache.get_with(path, [other], "overlap:v1", lambda p: overlap(p, other))
+    cache.save()
+
+Store counts and other small results, not value lists: the cache is one JSON
+file that is loaded and rewritten whole.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+def sha256_file(path, bufsize: int = 4 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stat_key(path) -> Optional[Dict[str, int]]:
+    """{"size", "mtime_ns"} or None if the file does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class StatsCache:
+    """
+    JSON file mapping path -> {size, mtime_ns, sha256, stats: {kind: value}}.
+    kind names the computation (bump its version suffix when the function changes).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.hits = self.misses = 0
+        self._dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.data: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def sha256(self, path) -> Optional[str]:
+        """Hash of path, reusing the cached one while size and mtime are unchanged."""
+        key = str(path)
+        st = stat_key(path)
+        if st is None:
+            return None
+        ent = self.data.get(key)
+        if ent and ent.get("size") == st["size"] and ent.get("mtime_ns") == st["mtime_ns"]:
+            return ent["sha256"]
+        sha = sha256_file(path)
+        if not ent or ent.get("sha256") != sha:
+            ent = {"sha256": sha, "stats": {}}
+        ent.update(st)
+        self.data[key] = ent
+        self._dirty = True
+        return sha
+
+    def get(self, path, kind: str, compute: Callable[[Path], object], default=None):
+        """Cached compute(path) for the current file content; default if path is missing."""
+        if self.sha256(path) is None:
+            return default
+        stats = self.data[str(path)]["stats"]
+        if kind in stats:
+            self.hits += 1
+            return stats[kind]
+        self.misses += 1
+        stats[kind] = compute(Path(path))
+        self._dirty = True
+        return stats[kind]
+
+    def get_with(self, path, deps, kind: str, compute: Callable[[Path], object], default=None):
+        """
+        get() for a value that also depends on the files in deps (e.g. an
+        intersection count): their hashes are part of the kind, and the value
+        cached for earlier versions of deps is dropped.
+        """
+        full = kind + "@" + ",".join(self.sha256(d) or "-" for d in deps)
+        if self.sha256(path) is None:
+            return default
+        stats = self.data[str(path)]["stats"]
+        for k in [k for k in stats if k.startswith(kind + "@") and k != full]:
+            del stats[k]
+            self._dirty = True
+        return self.get(path, full, compute, default)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,340 @@
+"""
+Content-addressed on-disk HTTP cache shared by the fetch scripts.
+
+Layout under the cache root (default data/cache/http, env AEKG_HTTP_CACHE):
+
+    entries/<kk>/<key>.json   key = sha256("GET <url>?<sorted params>")
+                              {url, params, status, etag, last_modified,
+                               content_type, sha256, size, fetched_at}
+    blobs/<ss>/<sha256>       response body, stored once per distinct content
+    partial/<key>.part        interrupted download, resumed with a Range request
+
+A request is served from disk while the entry is younger than the TTL of its
+source; after that it is revalidated with If-None-Match / If-Modified-Since
+and a 304 just refreshes fetched_at. Offline mode (offline=True or env
+AEKG_OFFLINE=1) never touches the network and raises CacheMiss for unknown
+URLs, so a directory of captured responses doubles as a test fixture:
+
+    AEKG_OFFLINE=1 AEKG_HTTP_CACHE=path/to/fixture python scripts/targets/...
+
+Blobs are never handed out by reference: download(dest=...) and materialize()
+copy them, so editing a materialized file cannot change the cache. An entry
+whose blob no longer has the recorded size is treated as missing.
+
+One HttpCache may be shared by worker threads; the hits / revalidated /
+fetched counters are updated under a lock.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+
+def default_root() -> Path:
+    """Cache root: env AEKG_HTTP_CACHE (read per HttpCache), else data/cache/http."""
+    return Path(os.environ.get("AEKG_HTTP_CACHE") or "data/cache/http")
+
+
+DAY = 24 * 3600
+# seconds an entry is trusted without revalidation; 0 = always revalidate
+DEFAULT_TTL: Dict[str, float] = {
+    "chembl": 30 * DAY,     # REST API answers (fetch_chembl_mechanisms)
+    "uniprot": 30 * DAY,    # REST API answers (fill_missing_protein_gene)
+    "sider": 0,
+    "snapshot": 0,          # bulk files of scripts/raw/fetch_snapshots.py
+    "default": 0,
+}
+
+
+class CacheMiss(RuntimeError):
+    """Offline mode and the URL has never been fetched."""
+
+
+def _env_offline() -> bool:
+    return os.environ.get("AEKG_OFFLINE", "").strip().lower() in {"1", "true", "yes"}
+
+
+def cache_key(url: str, params: Optional[dict] = None) -> str:
+    qs = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"GET {url}?{qs}".encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """The subset of requests.Response the fetch scripts use."""
+
+    def __init__(self, url: str, status_code: int, content: bytes, headers: dict, from_cache: bool):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=None)
+
+
+class HttpCache:
+    def __init__(
+        self,
+        root=None,
+        ttl: Optional[Dict[str, float]] = None,
+        offline: Optional[bool] = None,
+        session: Optional[requests.Session] = None,
+        throttle: Optional[Callable[[], None]] = None,
+    ):
+        self.root = Path(root) if root else default_root()
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.offline = _env_offline() if offline is None else offline
+        self.session = session or requests.Session()
+        self.throttle = throttle  # called before every real network request
+        self.hits = self.revalidated = self.fetched = 0
+        self._lock = threading.Lock()
+
+    # ---------- storage ----------
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / "entries" / key[:2] / f"{key}.json"
+
+    def blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / sha
+
+    def _load_entry(self, key: str) -> Optional[dict]:
+        p = self._entry_path(key)
+        try:
+            with open(p, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            size = self.blob_path(entry["sha256"]).stat().st_size
+        except OSError:
+            return None
+        return entry if entry.get("size") in (None, size) else None
+
+    def _write_entry(self, key: str, entry: dict) -> None:
+        p = self._entry_path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=1, sort_keys=True)
+        os.replace(tmp, p)
+
+    def _store_bytes(self, content: bytes) -> str:
+        sha = hashlib.sha256(content).hexdigest()
+        bp = self.blob_path(sha)
+        if not bp.exists():
+            bp.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=bp.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, bp)
+        return sha
+
+    def _fresh(self, entry: dict, source: str) -> bool:
+        ttl = self.ttl.get(source, self.ttl["default"])
+        return ttl > 0 and time.time() - entry.get("fetched_at", 0) < ttl
+
+    def _conditional_headers(self, entry: Optional[dict]) -> dict:
+        h = {}
+        if entry:
+            if entry.get("etag"):
+                h["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                h["If-Modified-Since"] = entry["last_modified"]
+        return h
+
+    def _new_entry(self, url, params, resp, sha, size) -> dict:
+        return {
+            "url": url,
+            "params": params or {},
+            "status": resp.status_code,
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
+            "content_type": resp.headers.get("Content-Type", ""),
+            "sha256": sha,
+            "size": size,
+            "fetched_at": time.time(),
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _touch(self, key: str, entry: dict) -> None:
+        entry["fetched_at"] = time.time()
+        self._write_entry(key, entry)
+
+    def _network_get(self, url, params, headers, timeout, stream=False):
+        if self.offline:
+            raise CacheMiss(f"offline and not cached: {url} {params or ''}")
+        if self.throttle:
+            self.throttle()
+        return self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+
+    def _from_entry(self, entry: dict) -> CachedResponse:
+        content = self.blob_path(entry["sha256"]).read_bytes()
+        headers = {"Content-Type": entry.get("content_type", ""), "ETag": entry.get("etag", "")}
+        return CachedResponse(entry["url"], entry.get("status", 200), content, headers, True)
+
+    # ---------- API ----------
+
+    def lookup(self, url: str, params: Optional[dict] = None) -> Optional[dict]:
+        """Cache entry for url/params (no network), or None."""
+        return self._load_entry(cache_key(url, params))
+
+    def get(self, url: str, params: Optional[dict] = None, source: str = "default",
+            timeout: float = 60) -> CachedResponse:
+        """GET with caching; only 200 responses are stored."""
+        key = cache_key(url, params)
+        entry = self._load_entry(key)
+        if entry and (self.offline or self._fresh(entry, source)):
+            self._count("hits")
+            return self._from_entry(entry)
+
+        r = self._network_get(url, params, self._conditional_headers(entry), timeout)
+        if r.status_code == 304 and entry:
+            self._count("revalidated")
+            self._touch(key, entry)
+            return self._from_entry(entry)
+
+        self._count("fetched")
+        content = r.content
+        if r.status_code == 200:
+            sha = self._store_bytes(content)
+            self._write_entry(key, self._new_entry(url, params, r, sha, len(content)))
+        return CachedResponse(r.url, r.status_code, content, dict(r.headers), False)
+
+    def download(self, url: str, dest=None, source: str = "default", timeout: float = 120,
+                 chunk_size: int = 4 << 20, retries: int = 5) -> Tuple[str, bool]:
+        """
+        Stream url into the blob store, hashing while writing. Returns (sha256, from_cache).
+        If dest is given it receives a copy of the blob, so an unchanged file
+        costs no network I/O.
+
+        An interrupted transfer leaves partial/<key>.part behind; the next attempt
+        (retried here, or in a later run) resumes it with a Range request guarded
+        by If-Range, so only the missing bytes are fetched. A 416 answer (the part
+        already holds the whole body, or the file shrank) discards the part and
+        fetches the file in full.
+
+        The transfer itself is skipped only when the entry is fresh or the server
+        answers the conditional request with 304; without a cached validator the
+        body is downloaded and its sha256 is known only afterwards.
+        """
+        key = cache_key(url)
+        entry = self._load_entry(key)
+        if entry and (self.offline or self._fresh(entry, source)):
+            self._count("hits")
+            sha, cached = entry["sha256"], True
+        else:
+            attempt = 0
+            while True:
+                try:
+                    sha, cached = self._download_once(url, key, entry, timeout, chunk_size)
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError):
+                    attempt += 1
+                    if attempt > retries:
+                        raise
+                    time.sleep(min(30, 2 ** attempt))
+        if dest is not None:
+            self.materialize(sha, dest)
+        return sha, cached
+
+    def _download_once(self, url, key, entry, timeout, chunk_size) -> Tuple[str, bool]:
+        part = self.root / "partial" / f"{key}.part"
+        meta = self.root / "partial" / f"{key}.json"
+        part.parent.mkdir(parents=True, exist_ok=True)
+
+        headers = self._conditional_headers(entry)
+        offset = part.stat().st_size if part.exists() else 0
+        validator = ""
+        if offset:
+            try:
+                validator = json.loads(meta.read_text(encoding="utf-8")).get("validator", "")
+            except (OSError, ValueError):
+                validator = ""
+            if validator:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+
+        with self._network_get(url, None, headers, timeout, stream=True) as r:
+            if r.status_code == 416 and "Range" in headers:
+                r.close()
+                part.unlink(missing_ok=True)
+                meta.unlink(missing_ok=True)
+                return self._download_once(url, key, entry, timeout, chunk_size)
+            if r.status_code == 304 and entry:
+                self._count("revalidated")
+                self._touch(key, entry)
+                return entry["sha256"], True
+            r.raise_for_status()
+
+            h = hashlib.sha256()
+            if r.status_code == 206 and validator:
+                # hash the bytes already on disk once, then keep appending
+                with open(part, "rb") as f:
+                    for block in iter(lambda: f.read(chunk_size), b""):
+                        h.update(block)
+                mode, size = "ab", offset
+            else:
+                mode, size = "wb", 0
+
+            etag = r.headers.get("ETag", "")
+            validator = etag if etag and not etag.startswith("W/") else r.headers.get("Last-Modified", "")
+            meta.write_text(json.dumps({"url": url, "validator": validator}), encoding="utf-8")
+
+            with open(part, mode, buffering=chunk_size) as f:
+                for chunk in r.iter_content(chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        h.update(chunk)
+                        size += len(chunk)
+
+            sha = h.hexdigest()
+            bp = self.blob_path(sha)
+            bp.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, bp)
+            if meta.exists():
+                meta.unlink()
+            self._count("fetched")
+            entry = self._new_entry(url, None, r, sha, size)
+            entry["status"] = 200  # a resumed 206 still completes the whole body
+            self._write_entry(key, entry)
+        return sha, False
+
+    def materialize(self, sha: str, dest) -> Path:
+        """
+        Replace dest with a copy of blob sha. Never a hard link: an in-place
+        edit of dest would otherwise rewrite the blob and every file sharing it
+        (a dest left linked by an older version is unlinked first).
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(self.blob_path(sha), tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return dest
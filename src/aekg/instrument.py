@@ -0,0 +1,173 @@
+"""
+Opt-in per-stage resource instrumentation.
+
+Wrap a stage and say how many rows it processed:
+
+    from aekg import instrument
+    with instrument.stage("rankers.r1_cpic") as st:
+        ...
+        st.rows += len(rows)
+
+Nothing is measured unless AEKG_PROFILE is set (scripts/pipeline.py --profile
+sets it for every stage it launches):
+
+    AEKG_PROFILE=1             wall / CPU time, peak RSS, tracemalloc, rows
+    AEKG_PROFILE=cprofile      the above plus a cProfile dump per stage
+    AEKG_PROFILE=pyinstrument  the above plus a pyinstrument HTML page
+                               (falls back to cProfile if it is not installed)
+
+Each stage appends one JSON line to <dir>/profile.jsonl, where <dir> is
+AEKG_PROFILE_DIR, else the report_dir argument, else reports/formal_<today>:
+
+    {"stage", "started", "pid", "argv", "ok", "wall_s", "cpu_s",
+     "cpu_children_s", "rss_peak_mb", "py_peak_mb", "rows",
+     "top_alloc": [{"where", "size_kb", "count"}], "profile"}
+
+rss_peak_mb is the process high-water mark at the end of the stage (None where
+the platform cannot tell). py_peak_mb is the tracemalloc peak within the
+stage, and top_alloc lists the biggest live Python allocations at its end.
+Nested stages are fine; an inner stage's peak still counts for the outer one.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional
+
+TOP_ALLOC = 10
+
+_STACK: List["StageRecord"] = []
+
+
+def mode() -> str:
+    """'' when disabled, otherwise the value of AEKG_PROFILE (lower-cased)."""
+    v = os.environ.get("AEKG_PROFILE", "").strip().lower()
+    return "" if v in ("", "0", "false", "no") else v
+
+
+def enabled() -> bool:
+    return bool(mode())
+
+
+def profile_dir(report_dir=None) -> Path:
+    d = os.environ.get("AEKG_PROFILE_DIR") or report_dir
+    return Path(d) if d else Path("reports") / f"formal_{date.today().isoformat()}"
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)  # bytes on macOS, KiB elsewhere
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1 << 20), 1)
+        except (ImportError, AttributeError):
+            return None
+
+
+class StageRecord:
+    """What the with-block sees; only rows is meant to be written by callers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.child_peak = 0  # tracemalloc peak of nested stages (reset_peak() would hide it)
+
+
+def _top_allocations(n: int) -> List[dict]:
+    snap = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "*cProfile.py"),
+        tracemalloc.Filter(False, "*/profile.py"),
+        tracemalloc.Filter(False, "*pyinstrument*"),
+    ))
+    out = []
+    for st in snap.statistics("lineno")[:n]:
+        fr = st.traceback[0]
+        out.append({"where": f"{fr.filename}:{fr.lineno}", "size_kb": round(st.size / 1024, 1), "count": st.count})
+    return out
+
+
+def _start_profiler(kind: str):
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            p = Profiler()
+            p.start()
+            return "pyinstrument", p
+        except ImportError:
+            print("[instrument] pyinstrument not installed; using cProfile", file=sys.stderr)
+    import cProfile
+    p = cProfile.Profile()
+    p.enable()
+    return "cprofile", p
+
+
+def _stop_profiler(prof, out_dir: Path, stage_name: str) -> str:
+    kind, p = prof
+    stem = f"profile_{stage_name.replace('/', '_')}_{os.getpid()}"
+    if kind == "pyinstrument":
+        p.stop()
+        path = out_dir / (stem + ".html")
+        path.write_text(p.output_html(), encoding="utf-8")
+    else:
+        p.disable()
+        path = out_dir / (stem + ".prof")
+        p.dump_stats(str(path))
+    return str(path)
+
+
+@contextmanager
+def stage(name: str, report_dir=None, top: int = TOP_ALLOC):
+    """Measure the with-block as one stage; a no-op unless AEKG_PROFILE is set."""
+    rec = StageRecord(name)
+    kind = mode()
+    if not kind:
+        yield rec
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if _STACK:
+        _STACK[-1].child_peak = max(_STACK[-1].child_peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    _STACK.append(rec)
+
+    out_dir = profile_dir(report_dir)
+    prof = _start_profiler(kind) if kind in ("cprofile", "pyinstrument") else None
+    started = datetime.now().isoformat(timespec="seconds")
+    t0, c0, ch0 = time.perf_counter(), time.process_time(), os.times()
+    ok = False
+    try:
+        yield rec
+        ok = True
+    finally:
+        wall, cpu, ch1 = time.perf_counter() - t0, time.process_time() - c0, os.times()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        dump = _stop_profiler(prof, out_dir, name) if prof else None
+        _STACK.pop()
+        py_peak = max(rec.child_peak, tracemalloc.get_traced_memory()[1])
+        top_alloc = _top_allocations(top)
+        if started_tracing:
+            tracemalloc.stop()
+        elif _STACK:
+            _STACK[-1].child_peak = max(_STACK[-1].child_peak, py_peak)
+        entry = {
+            "stage": name, "started": started, "pid": os.getpid(), "argv": sys.argv, "ok": ok,
+            "wall_s": round(wall, 4), "cpu_s": round(cpu, 4),
+            "cpu_children_s": round((ch1.children_user - ch0.children_user) + (ch1.children_system - ch0.children_system), 4),
+            "rss_peak_mb": peak_rss_mb(), "py_peak_mb": round(py_peak / (1 << 20), 2),
+            "rows": rec.rows, "top_alloc": top_alloc, "profile": dump,
+        }
+        with open(out_dir / "profile.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -0,0 +1,205 @@
+"""
+Process-wide memoized accessors for the mapping tables.
+
+Each accessor parses its table once per process and hands the same object to
+every caller until the file changes on disk (size or mtime), so a multi-stage
+in-process run reads every table exactly once:
+
+    from aekg import mappings
+    d2p = mappings.drug_proteins()      # {"CHEMBL108": {"P35498", ...}}
+    h2p = mappings.hpo_pt()             # {"HP:0012384": "Ataxia"}
+
+Values go through the same normalization as aekg.mapstore (IDs stripped and
+upper-cased, PT names stripped; pt_prior is keyed by casefold()). Rows come
+from the CSV/TSV files; with AEKG_MAPSTORE=1 in the environment they are read
+from data/interim/mappings.sqlite instead (build it with
+scripts/interim/mapstore.py import). The returned containers are shared. Treat
+them as read-only and copy them before mutating. aekg.vocab.encoded() serves
+the same tables as int arrays for the rankers.
+"""
+
+import csv
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from aekg.mapstore import DEFAULT_DB, MAPPINGS_DIR, TABLES, MapStore, normalize
+
+_CACHE: Dict[Tuple[str, str], Tuple[tuple, object]] = {}
+_LOCK = threading.Lock()
+
+
+def _stat(path: Path) -> tuple:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (None, None)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _memo(name: str, path: Path, build: Callable[[Path], object]):
+    key = (name, str(path))
+    stamp = _stat(path) + _stat(DEFAULT_DB)
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+    value = build(path)
+    with _LOCK:
+        _CACHE[key] = (stamp, value)
+    return value
+
+
+def cache_clear() -> None:
+    with _LOCK:
+        _CACHE.clear()
+
+
+def use_store() -> bool:
+    """Read the default tables from mappings.sqlite (opt-in: AEKG_MAPSTORE=1)."""
+    return os.environ.get("AEKG_MAPSTORE", "") not in ("", "0") and DEFAULT_DB.exists()
+
+
+def _rows(table: str, path: Path, value_cols: Tuple[str, ...] = (), key_cols=None,
+          strict: bool = False) -> List[tuple]:
+    """Normalized (key..., value...) rows of a mapping table; missing file -> []."""
+    return list(_iter_rows(table, path, value_cols, key_cols, strict))
+
+
+def _iter_rows(table: str, path: Path, value_cols: Tuple[str, ...] = (), key_cols=None,
+               strict: bool = False) -> Iterator[tuple]:
+    spec = TABLES[table]
+    accepted = [a if (key_cols is None or key_cols[i] is None) else tuple(key_cols[i])
+                for i, (a, _) in enumerate(spec.keys)]
+    if key_cols is None and path == MAPPINGS_DIR / spec.file and use_store():
+        store = MapStore(DEFAULT_DB)
+        try:
+            yield from store.pairs(table, *value_cols)
+        finally:
+            store.close()
+        return
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rdr = csv.reader(f, delimiter=spec.delimiter)
+        header = [h.replace("\ufeff", "").strip() for h in next(rdr, [])]
+        pos = {h: i for i, h in enumerate(header)}
+        if strict and key_cols is not None:
+            for cols in key_cols:
+                if cols is not None and not any(c in pos for c in cols):
+                    raise KeyError(f"{path}: no column {' / '.join(cols)} (header: {', '.join(header)})")
+        keys = [(pos.get(next((c for c in acc if c in pos), acc[0]), -1), kind)
+                for acc, (_, kind) in zip(accepted, spec.keys)]
+        vals = [pos.get(c, -1) for c in value_cols]
+        # csv.reader + column positions instead of DictReader: same rows, a dict less per line
+        for r in rdr:
+            if not r:
+                continue
+            n = len(r)
+            out = [normalize(kind, r[i] if 0 <= i < n else None) or None for i, kind in keys]
+            for i in vals:
+                v = r[i].strip() if 0 <= i < n else ""
+                try:
+                    out.append(float(v) if v else None)
+                except ValueError:
+                    out.append(None)
+            yield tuple(out)
+
+
+def _index(table: str, path: Optional[Path]) -> Dict[str, Set[str]]:
+    path = Path(path) if path else MAPPINGS_DIR / TABLES[table].file
+
+    def build(p):
+        m: Dict[str, Set[str]] = defaultdict(set)
+        for a, b in _rows(table, p):
+            if a and b:
+                m[a].add(b)
+        return dict(m)
+    return _memo(table, path, build)
+
+
+# ---------- accessors ----------
+
+def iter_rows(table: str, path=None, value_cols: Tuple[str, ...] = (), key_cols=None,
+              strict: bool = False) -> Iterator[tuple]:
+    """
+    Normalized (key..., value...) rows of a table, streamed and not memoized
+    (aekg.vocab encodes them once). key_cols replaces the accepted column
+    names of some key positions, e.g. (None, ("meddra_pt",)); such reads
+    always come from the text file, and with strict=True a file that has
+    none of those columns raises KeyError instead of yielding empty keys.
+    """
+    return _iter_rows(table, Path(path) if path else MAPPINGS_DIR / TABLES[table].file, value_cols, key_cols, strict)
+
+
+def columns(table: str, path=None) -> List[str]:
+    """Header of a table's file ([] if it does not exist)."""
+    path = Path(path) if path else MAPPINGS_DIR / TABLES[table].file
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return [h.replace("\ufeff", "").strip() for h in next(csv.reader(f, delimiter=TABLES[table].delimiter), [])]
+    except FileNotFoundError:
+        return []
+
+
+def drug_proteins(path=None) -> Dict[str, Set[str]]:
+    """drug_id -> {protein_id} (drug_targets.csv)."""
+    return _index("drug_targets", path)
+
+
+def protein_genes(path=None) -> Dict[str, Set[str]]:
+    """protein_id -> {gene symbol} (protein_gene.csv)."""
+    return _index("protein_gene", path)
+
+
+def gene_hpos(path=None) -> Dict[str, Set[str]]:
+    """gene symbol -> {HPO id} (gene_hpo.csv)."""
+    return _index("gene_hpo", path)
+
+
+def drugs(path=None) -> List[str]:
+    """Sorted drug ids that have at least one target."""
+    return sorted(drug_proteins(path))
+
+
+def hpo_pt(path=None, pt_cols: Optional[Tuple[str, ...]] = None) -> Dict[str, str]:
+    """
+    HPO id -> MedDRA PT name (hpo_meddra_map.tsv). The PT comes from pt_name or
+    meddra_pt, whichever the file has; pt_cols=("meddra_pt",) reads only that
+    column, as the rankers and preview scripts always have, and raises KeyError
+    when the file has none of pt_cols (e.g. the pt_name layout build_hpo2pt_map
+    writes). Unmapped rows are skipped.
+    """
+    path = Path(path) if path else MAPPINGS_DIR / TABLES["hpo_meddra_map"].file
+    key_cols = (None, pt_cols) if pt_cols else None
+
+    def build(p):
+        return {h: pt for h, pt in _rows("hpo_meddra_map", p, (), key_cols, strict=bool(pt_cols)) if h and pt}
+    return _memo("hpo_meddra_map" + (":" + ",".join(pt_cols) if pt_cols else ""), path, build)
+
+
+def pt_prior(path=None) -> Dict[str, float]:
+    """casefold(PT name) -> prior (pt_prior.csv)."""
+    path = Path(path) if path else MAPPINGS_DIR / TABLES["pt_prior"].file
+
+    def build(p):
+        return {pt.casefold(): v for pt, v in _rows("pt_prior", p, ("prior",)) if pt and v is not None}
+    return _memo("pt_prior", path, build)
+
+
+def cpic_rows(path=None) -> List[Tuple[str, str, Optional[float]]]:
+    """
+    (drug_id, gene, cpic_weight) rows of drug_gene_pgx.csv in file order,
+    duplicates kept. The weight is None only when the file has no cpic_weight
+    column (each ranker applies its own default); rows whose weight is empty or
+    not a number are dropped, as the rankers' float() parsing did.
+    """
+    path = Path(path) if path else MAPPINGS_DIR / TABLES["drug_gene_pgx"].file
+
+    def build(p):
+        has_weight = "cpic_weight" in columns("drug_gene_pgx", p)
+        return [(d, g, w) for d, g, w in _rows("drug_gene_pgx", p, ("cpic_weight",))
+                if d and g and (w is not None or not has_weight)]
+    return _memo("drug_gene_pgx", path, build)
@@ -0,0 +1,246 @@
+"""
+Typed, indexed store for the mapping tables under data/interim/mappings.
+
+One SQLite file (default data/interim/mappings.sqlite) replaces re-parsing
+six CSV/TSV files in every script. IDs are dictionary-encoded: each kind of
+identifier (drug, protein, gene, hpo, pt) gets a dict_<kind>(code, value)
+table, and the mapping tables store integer codes with an index on every key
+column. Normalization happens once, at import:
+
+    drug / protein / gene / hpo   strip, BOM removed, upper-cased
+    pt                            strip; codes are shared case-insensitively
+                                  (casefold), the first spelling seen is kept
+
+hpo_meddra_map's PT column is read from pt_name or meddra_pt, whichever the
+file has. Columns the store does not type are kept verbatim, and so is the
+original text of any key or number whose normalized form reads differently
+(" hla-a", "1.00"). export_csv() writes every table back in the column order,
+BOM and line ending it was imported with, so a normalized file (as written by
+the interim scripts) round-trips byte for byte and the CSV files stay usable
+by anything that has not moved over yet.
+
+    store = MapStore()                       # read side
+    store.pairs("gene_hpo")                  # [(gene, hpo), ...] decoded
+    store.codes("gene_hpo")                  # [(gene_code, hpo_code), ...]
+    store.dictionary("gene")                 # [value for code 0, 1, ...]
+
+    python scripts/interim/mapstore.py import   # CSV -> SQLite
+    python scripts/interim/mapstore.py export   # SQLite -> CSV
+"""
+
+import csv
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+MAPPINGS_DIR = Path("data/interim/mappings")
+DEFAULT_DB = Path("data/interim/mappings.sqlite")
+
+KINDS = ("drug", "protein", "gene", "hpo", "pt")
+
+
+class TableSpec(NamedTuple):
+    file: str
+    delimiter: str
+    keys: Tuple[Tuple[Tuple[str, ...], str], ...]   # ((accepted column names), kind)
+    values: Tuple[Tuple[str, str], ...]             # (column, SQL type)
+
+
+TABLES: Dict[str, TableSpec] = {
+    "drug_targets":  TableSpec("drug_targets.csv", ",",
+                               ((("drug_id",), "drug"), (("protein_id",), "protein")), ()),
+    "protein_gene":  TableSpec("protein_gene.csv", ",",
+                               ((("protein_id",), "protein"), (("gene_id",), "gene")), ()),
+    "gene_hpo":      TableSpec("gene_hpo.csv", ",",
+                               ((("gene_id",), "gene"), (("hpo_id",), "hpo")),
+                               (("n_annotations", "INTEGER"),)),
+    "hpo_meddra_map": TableSpec("hpo_meddra_map.tsv", "\t",
+                                ((("hpo_id",), "hpo"), (("pt_name", "meddra_pt"), "pt")),
+                                (("n_candidates", "INTEGER"),)),
+    "pt_prior":      TableSpec("pt_prior.csv", ",",
+                               ((("meddra_pt", "pt_name"), "pt"),),
+                               (("prior", "REAL"),)),
+    "drug_gene_pgx": TableSpec("drug_gene_pgx.csv", ",",
+                               ((("drug_id",), "drug"), (("gene_id",), "gene")),
+                               (("cpic_weight", "REAL"),)),
+}
+
+
+def normalize(kind: str, value: str) -> str:
+    v = (value or "").replace("\ufeff", "").strip()
+    return v if kind == "pt" else v.upper()
+
+
+def _fold(kind: str, value: str) -> str:
+    return value.casefold() if kind == "pt" else value
+
+
+def _typed(sql_type: str, raw: str):
+    """Parsed value, or raise ValueError (the caller keeps the raw text instead)."""
+    raw = (raw or "").strip()
+    if raw == "":
+        return None
+    return int(raw) if sql_type == "INTEGER" else float(raw)
+
+
+def _fmt(v) -> str:
+    if v is None:
+        return ""
+    return repr(v) if isinstance(v, float) else str(v)
+
+
+class MapStore:
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = Path(db_path)
+        self._con: Optional[sqlite3.Connection] = None
+        self._dicts: Dict[str, List[str]] = {}
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            self._con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return self._con
+
+    def close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    # ---------- write side ----------
+
+    @staticmethod
+    def import_csv(src_dir=MAPPINGS_DIR, db_path=DEFAULT_DB, tables: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """(Re)build the store from the CSV/TSV files; returns rows imported per table."""
+        src_dir, db_path = Path(src_dir), Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = db_path.with_suffix(db_path.suffix + ".tmp")
+        if tmp.exists():
+            tmp.unlink()
+        con = sqlite3.connect(tmp)
+        con.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;")
+        con.execute("CREATE TABLE meta (tbl TEXT PRIMARY KEY, header TEXT, key_columns TEXT, delimiter TEXT,"
+                    " bom INTEGER, newline TEXT)")
+        codes: Dict[str, Dict[str, int]] = {}
+        values: Dict[str, List[str]] = {}
+        for kind in KINDS:
+            con.execute(f"CREATE TABLE dict_{kind} (code INTEGER PRIMARY KEY, value TEXT NOT NULL, folded TEXT UNIQUE NOT NULL)")
+            codes[kind], values[kind] = {}, []
+
+        def encode(kind, raw):
+            v = normalize(kind, raw)
+            if not v:
+                return None
+            f = _fold(kind, v)
+            c = codes[kind].get(f)
+            if c is None:
+                c = codes[kind][f] = len(codes[kind])
+                values[kind].append(v)
+                con.execute(f"INSERT INTO dict_{kind} VALUES (?, ?, ?)", (c, v, f))
+            return c
+
+        counts = {}
+        for name, spec in TABLES.items():
+            if tables and name not in tables:
+                continue
+            key_cols = [kind for _, kind in spec.keys]
+            cols = [f"{c} INTEGER" for c in key_cols] + [f"{c} {t}" for c, t in spec.values] + ["extra TEXT"]
+            con.execute(f"CREATE TABLE {name} ({', '.join(cols)})")
+            for c in key_cols:
+                con.execute(f"CREATE INDEX {name}_{c} ON {name} ({c})")
+            path = src_dir / spec.file
+            if not path.exists():
+                counts[name] = 0
+                continue
+            with open(path, "rb") as fb:
+                head = fb.read(1 << 16)
+            bom = head.startswith(b"\xef\xbb\xbf")
+            newline = "\r\n" if head.split(b"\n", 1)[0].endswith(b"\r") else "\n"
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                rdr = csv.DictReader(f, delimiter=spec.delimiter)
+                header = [h.replace("\ufeff", "").strip() for h in (rdr.fieldnames or [])]
+                rdr.fieldnames = header
+                src_keys = [next((c for c in accepted if c in header), accepted[0]) for accepted, _ in spec.keys]
+                typed = {c for c, _ in spec.values}
+                extra_cols = [h for h in header if h not in src_keys and h not in typed]
+                rows = []
+                for r in rdr:
+                    key_codes = [encode(kind, r.get(col)) for col, (_, kind) in zip(src_keys, spec.keys)]
+                    extra = {c: r.get(c) or "" for c in extra_cols}
+                    for col, (_, kind), c in zip(src_keys, spec.keys, key_codes):
+                        raw = r.get(col) or ""
+                        if raw != (values[kind][c] if c is not None else ""):
+                            extra[col] = raw  # normalized or shared spelling differs: export the original text
+                    vals = []
+                    for c, t in spec.values:
+                        try:
+                            vals.append(_typed(t, r.get(c)))
+                            if _fmt(vals[-1]) != (r.get(c) or ""):
+                                extra[c] = r.get(c) or ""  # "1" / "1.00" / " 1.0" read as 1.0: keep the text
+                        except ValueError:
+                            vals.append(None)
+                            extra[c] = r.get(c)  # not a number: keep the text as is
+                    rows.append(key_codes + vals + [json.dumps(extra, ensure_ascii=False) if extra else None])
+            con.executemany(f"INSERT INTO {name} VALUES ({','.join('?' * (len(key_cols) + len(spec.values) + 1))})", rows)
+            con.execute("INSERT INTO meta VALUES (?, ?, ?, ?, ?, ?)",
+                        (name, json.dumps(header), json.dumps(src_keys), spec.delimiter, int(bom), newline))
+            counts[name] = len(rows)
+        con.commit()
+        con.close()
+        tmp.replace(db_path)
+        return counts
+
+    def export_csv(self, out_dir=MAPPINGS_DIR) -> Dict[str, Path]:
+        """Write every imported table back in its original column layout, BOM and line ending."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        con = self._connect()
+        written = {}
+        for name, header_json, keys_json, delim, bom, newline in con.execute(
+                "SELECT tbl, header, key_columns, delimiter, bom, newline FROM meta").fetchall():
+            spec = TABLES[name]
+            header, src_keys = json.loads(header_json), json.loads(keys_json)
+            dicts = [self.dictionary(kind) for _, kind in spec.keys]
+            path = out_dir / spec.file
+            with open(path, "w", encoding="utf-8-sig" if bom else "utf-8", newline="") as f:
+                w = csv.writer(f, delimiter=delim, lineterminator=newline or "\n")
+                w.writerow(header)
+                for row in con.execute(f"SELECT * FROM {name} ORDER BY rowid"):
+                    nk, nv = len(spec.keys), len(spec.values)
+                    rec = {col: (d[c] if c is not None else "") for col, d, c in zip(src_keys, dicts, row[:nk])}
+                    rec.update({c: _fmt(v) for (c, _), v in zip(spec.values, row[nk:nk + nv])})
+                    rec.update(json.loads(row[-1]) if row[-1] else {})
+                    w.writerow([rec.get(h, "") for h in header])
+            written[name] = path
+        return written
+
+    # ---------- read side ----------
+
+    def dictionary(self, kind: str) -> List[str]:
+        """value for each code (index = code)."""
+        if kind not in self._dicts:
+            self._dicts[kind] = [v for (v,) in self._connect().execute(f"SELECT value FROM dict_{kind} ORDER BY code")]
+        return self._dicts[kind]
+
+    def code(self, kind: str, value: str) -> Optional[int]:
+        v = normalize(kind, value)
+        row = self._connect().execute(f"SELECT code FROM dict_{kind} WHERE folded = ?", (_fold(kind, v),)).fetchone()
+        return row[0] if row else None
+
+    def codes(self, table: str, *value_columns: str) -> List[tuple]:
+        """Key codes (plus the requested typed columns) of every row, in import order."""
+        con = self._connect()
+        key_cols = [r[1] for r in con.execute(f"PRAGMA table_info({table})")][:len(TABLES[table].keys)]
+        cols = ", ".join(key_cols + list(value_columns))
+        return con.execute(f"SELECT {cols} FROM {table} ORDER BY rowid").fetchall()
+
+    def pairs(self, table: str, *value_columns: str) -> List[tuple]:
+        """Like codes() but with keys decoded to their normalized strings (None stays None)."""
+        dicts = [self.dictionary(kind) for _, kind in TABLES[table].keys]
+        nk = len(dicts)
+        out = []
+        for row in self.codes(table, *value_columns):
+            out.append(tuple(d[c] if c is not None else None for d, c in zip(dicts, row[:nk])) + tuple(row[nk:]))
+        return out
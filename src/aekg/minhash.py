@@ -0,0 +1,108 @@
+"""
+MinHash signatures and LSH banding for sets of int ids (HPO ints from aekg.vocab).
+
+    sets = CSR(indptr, hpo_ints)                    # row i = drug i's HPO set
+    sig = signatures(sets, num_perm=128)            # (n_sets, 128) uint32
+    pairs = candidate_pairs(sig, bands=32)          # (k, 2) int64, i < j
+    jaccard(set_i, set_j)                           # exact check of a candidate
+
+Permutation k is h_k(x) = (a_k * x + b_k) mod (2**31 - 1) with seeded random
+a_k, b_k, so signatures are reproducible and comparable between runs with the
+same seed. signatures() hashes every element of every set at once and takes
+the per-set minimum with np.minimum.reduceat, a chunk of permutations at a
+time.
+
+candidate_pairs() splits the signature into bands of rows = num_perm / bands
+values; two sets become a candidate if they agree on a whole band, which
+happens with probability 1 - (1 - J**rows)**bands for Jaccard J. The curve's
+midpoint is about (1/bands)**(1/rows); bands_for() picks the banding whose
+midpoint is closest to a target threshold. Buckets larger than max_bucket
+(e.g. the many drugs sharing one common target) are skipped for that band.
+"""
+
+from typing import Iterator, Tuple
+
+import numpy as np
+
+PRIME = (1 << 31) - 1
+EMPTY = np.uint32(PRIME)          # signature value of an empty set
+
+
+def _perms(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, PRIME, num_perm, dtype=np.int64),
+            rng.integers(0, PRIME, num_perm, dtype=np.int64))
+
+
+def signatures(sets, num_perm: int = 128, seed: int = 4003, chunk: int = 1 << 22) -> np.ndarray:
+    """(n_sets, num_perm) MinHash matrix of a CSR of int ids (needs .indptr / .indices)."""
+    a, b = _perms(num_perm, seed)
+    indptr, ids = np.asarray(sets.indptr), np.asarray(sets.indices, dtype=np.int64) % PRIME
+    n = len(indptr) - 1
+    sig = np.full((n, num_perm), EMPTY, dtype=np.uint32)
+    nonempty = np.flatnonzero(np.diff(indptr) > 0)
+    if not len(ids) or not len(nonempty):
+        return sig
+    starts = indptr[nonempty]
+    step = max(1, chunk // len(ids))                  # permutations per pass; bounds the temp array
+    for k in range(0, num_perm, step):
+        h = (a[k:k + step, None] * ids[None, :] + b[k:k + step, None]) % PRIME
+        sig[nonempty, k:k + step] = np.minimum.reduceat(h, starts, axis=1).T
+    return sig
+
+
+def bands_for(num_perm: int, threshold: float) -> int:
+    """Number of bands (dividing num_perm) whose S-curve midpoint is closest to threshold."""
+    options = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda b: abs((1 / b) ** (b / num_perm) - threshold))
+
+
+def _band_groups(sig: np.ndarray, bands: int, max_bucket: int) -> Iterator[np.ndarray]:
+    """Row-index arrays of sets that share a band (bucket size 2..max_bucket)."""
+    n, num_perm = sig.shape
+    rows = num_perm // bands
+    live = np.flatnonzero(sig[:, 0] != EMPTY)
+    for band in range(bands):
+        key = np.ascontiguousarray(sig[live, band * rows:(band + 1) * rows])
+        key = key.view(np.dtype((np.void, key.dtype.itemsize * rows))).ravel()
+        order = np.argsort(key, kind="stable")
+        k = key[order]
+        bounds = np.concatenate(([0], np.flatnonzero(k[1:] != k[:-1]) + 1, [len(k)]))
+        size = np.diff(bounds)
+        for s in np.flatnonzero((size >= 2) & (size <= max_bucket)).tolist():
+            yield live[order[bounds[s]:bounds[s + 1]]]
+
+
+def candidate_pairs(sig: np.ndarray, bands: int, max_bucket: int = 500) -> np.ndarray:
+    """Distinct (i, j) with i < j that share at least one band."""
+    if sig.shape[1] % bands:
+        raise ValueError(f"bands ({bands}) must divide num_perm ({sig.shape[1]})")
+    out = []
+    for grp in _band_groups(sig, bands, max_bucket):
+        g = np.sort(grp)
+        i, j = np.triu_indices(len(g), 1)
+        out.append(np.stack([g[i], g[j]], axis=1))
+    if not out:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(out).astype(np.int64)
+    return np.unique(pairs, axis=0)
+
+
+def estimate(sig: np.ndarray, i, j) -> np.ndarray:
+    """MinHash Jaccard estimate for index arrays i, j."""
+    return (sig[i] == sig[j]).mean(axis=1)
+
+
+def jaccard(x: np.ndarray, y: np.ndarray) -> float:
+    """Exact Jaccard of two sorted unique int arrays."""
+    inter = len(np.intersect1d(x, y, assume_unique=True))
+    union = len(x) + len(y) - inter
+    return inter / union if union else 0.0
+
+
+def weighted_jaccard(xi: np.ndarray, xw: np.ndarray, yi: np.ndarray, yw: np.ndarray) -> float:
+    """sum(min) / sum(max) of two non-negative weight vectors given as sorted unique ids + weights."""
+    common, ix, iy = np.intersect1d(xi, yi, assume_unique=True, return_indices=True)
+    mins = np.minimum(xw[ix], yw[iy]).sum()
+    maxs = xw.sum() + yw.sum() - mins
+    return float(mins / maxs) if maxs > 0 else 0.0
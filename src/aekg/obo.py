@@ -0,0 +1,166 @@
+"""
+Streaming OBO parser for hp.obo (plain or .gz).
+
+iter_obo_terms() yields one OboTerm per [Term] stanza and never keeps more
+than the stanza being built; tag values are written straight into the
+record fields instead of buffering the stanza's lines.
+
+build_redirects() turns the alt_id / replaced_by fields into one flat
+dict[old_id] -> primary_id, so callers can canonicalize a whole ID column
+with a single dictionary lookup per value:
+
+    redirects = build_redirects(iter_obo_terms("data/raw/hpo/hp.obo"))
+    ids = [redirects.get(h, h) for h in ids]
+
+is_a_closure() gives the reflexive is_a ancestors of a set of ids straight
+from hp.obo, for callers that need the DAG but not the IC-ordered index of
+aekg.semsim (whose cache also depends on gene_hpo.csv).
+"""
+
+import gzip
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+
+
+class OboTerm(NamedTuple):
+    id: str
+    name: str
+    synonyms: Tuple[str, ...]
+    is_a: Tuple[str, ...]
+    alt_ids: Tuple[str, ...]
+    replaced_by: Tuple[str, ...]
+    consider: Tuple[str, ...]
+    is_obsolete: bool
+
+
+def _open_text(path: str):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8", buffering=1 << 20)
+
+
+def _strip_ref(value: str) -> str:
+    """'HP:0000001 ! All' -> 'HP:0000001' (drop trailing comment / modifiers)."""
+    cut = value.find(" ")
+    return value if cut < 0 else value[:cut]
+
+
+def _quoted(value: str) -> str:
+    """'"Cloudy lens" EXACT []' -> 'Cloudy lens' (handles escaped quotes)."""
+    if not value.startswith('"'):
+        return ""
+    end = value.find('"', 1)
+    while end > 0 and value[end - 1] == "\\":
+        end = value.find('"', end + 1)
+    if end < 0:
+        return ""
+    return value[1:end].replace('\\"', '"').strip()
+
+
+def iter_obo_terms(obo_path: str, include_obsolete: bool = True) -> Iterator[OboTerm]:
+    """
+    Yield an OboTerm for every [Term] stanza that has an 'id:'.
+    [Typedef] and [Instance] stanzas are skipped.
+    """
+    in_term = False
+    tid = name = ""
+    syns: List[str] = []
+    parents: List[str] = []
+    alts: List[str] = []
+    repl: List[str] = []
+    cons: List[str] = []
+    obsolete = False
+
+    with _open_text(obo_path) as f:
+        for line in f:
+            if line[0] == "[":
+                if in_term and tid and (include_obsolete or not obsolete):
+                    yield OboTerm(tid, name, tuple(syns), tuple(parents),
+                                  tuple(alts), tuple(repl), tuple(cons), obsolete)
+                in_term = line.startswith("[Term]")
+                tid = name = ""
+                syns, parents, alts, repl, cons = [], [], [], [], []
+                obsolete = False
+                continue
+            if not in_term:
+                continue
+
+            tag, sep, value = line.partition(": ")
+            if not sep:
+                continue
+            value = value.rstrip("\r\n")
+
+            # ordered by how often each tag appears in hp.obo
+            if tag == "is_a":
+                parents.append(_strip_ref(value))
+            elif tag == "synonym":
+                syn = _quoted(value)
+                if syn:
+                    syns.append(syn)
+            elif tag == "id":
+                tid = value.strip()
+            elif tag == "name":
+                name = value.strip()
+            elif tag == "alt_id":
+                alts.append(_strip_ref(value))
+            elif tag == "is_obsolete":
+                obsolete = value.strip() == "true"
+            elif tag == "replaced_by":
+                repl.append(_strip_ref(value))
+            elif tag == "consider":
+                cons.append(_strip_ref(value))
+
+    if in_term and tid and (include_obsolete or not obsolete):
+        yield OboTerm(tid, name, tuple(syns), tuple(parents),
+                      tuple(alts), tuple(repl), tuple(cons), obsolete)
+
+
+def build_redirects(terms: Iterable[OboTerm]) -> Dict[str, str]:
+    """
+    Return dict[old_id] -> primary_id covering:
+      - every alt_id of a live term
+      - every obsolete term with exactly one replaced_by
+    Chains (obsolete -> obsolete -> live) are collapsed to the final target.
+    """
+    redirects: Dict[str, str] = {}
+    for t in terms:
+        for alt in t.alt_ids:
+            if alt != t.id:
+                redirects[alt] = t.id
+        if t.is_obsolete and len(t.replaced_by) == 1 and t.replaced_by[0] != t.id:
+            redirects[t.id] = t.replaced_by[0]
+
+    for old in list(redirects):
+        target = redirects[old]
+        seen = {old}
+        while target in redirects and target not in seen:
+            seen.add(target)
+            target = redirects[target]
+        redirects[old] = target
+    return redirects
+
+
+def is_a_closure(obo_path: str, ids: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Return dict[id] -> sorted reflexive is_a ancestors for the given ids.
+    An alt_id or obsolete id with a replacement gets its primary term's
+    ancestors plus itself; ids hp.obo does not know are left out. Parents are
+    redirected the same way and only live terms count as ancestors.
+    """
+    terms = list(iter_obo_terms(obo_path))
+    redirects = build_redirects(terms)
+    parents = {t.id: [redirects.get(p, p) for p in t.is_a] for t in terms if not t.is_obsolete}
+
+    out: Dict[str, List[str]] = {}
+    for h in ids:
+        root = redirects.get(h, h)
+        if root not in parents:
+            continue
+        seen: Set[str] = {h, root}
+        stack = [root]
+        while stack:
+            for p in parents[stack.pop()]:
+                if p in parents and p not in seen:
+                    seen.add(p)
+                    stack.append(p)
+        out[h] = sorted(seen)
+    return out
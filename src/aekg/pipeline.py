@@ -0,0 +1,362 @@
+"""
+Fingerprint-driven runner for the build stages under scripts/.
+
+Every stage declares the script it runs, the files it reads and the files it
+writes. A stage is re-run only when something it depends on changed since its
+last successful run:
+
+    - the script itself or its command line
+    - the content (sha256) of any input
+    - an output is missing or no longer what the stage wrote (only checked
+      for the last stage that writes the file; earlier writers such as
+      make_mappings -> gene_hpo.csv just need it to exist)
+
+Fingerprints come from aekg.fingerprint, so an unchanged tree costs one stat()
+per file and a full no-op rerun finishes well under a second. They are
+recorded after each successful run; a stage that edits a file in place (e.g.
+overrides appended to gene_hpo.csv) therefore does not look stale to itself.
+
+The DAG is derived from the declared files, in declaration order: a stage
+waits for every earlier stage that writes one of its inputs, writes one of its
+outputs, or reads one of its outputs. Stages whose dependencies are done run
+concurrently, each in its own subprocess (--jobs at a time), e.g. the SIDER
+prior and the HPO -> PT map are built while the graph is being serialized.
+
+Stages that talk to the network only run with network=True; otherwise they
+are skipped and their dependents use whatever files are already on disk.
+Likewise a stage whose required raw files (Stage.requires; "a|b" means either
+one) are not on disk is reported as "missing input" and skipped, and its
+dependents run on the committed interim files.
+
+A stage that has never run but whose outputs all exist (a fresh checkout ships
+the curated mapping tables) is adopted: its current files are recorded as its
+last run instead of regenerating them, e.g. make_mappings would otherwise
+replace the curated gene_hpo.csv with its two-row seed. Adoption only happens
+when nothing upstream of the stage ran in the same invocation.
+
+Paths are relative to the repo root. "raw:<source>/<name>" resolves through
+aekg.raw_store.raw_path, and "{today}" expands to date.today().isoformat().
+Outputs may be glob patterns.
+
+    python scripts/pipeline.py                  # everything that is stale
+    python scripts/pipeline.py rankers eval     # these and their upstream
+    python scripts/pipeline.py --dry-run        # what would run, and why
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from aekg.fingerprint import StatsCache
+from aekg.raw_store import raw_path
+
+ROOT = Path(__file__).resolve().parents[2]
+STATE_DIR = Path("data/cache/pipeline")
+
+M = "data/interim/mappings/"
+FORMAL = "reports/formal_{today}/"
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    args: Tuple[str, ...] = ()
+    network: bool = False
+    offline_args: Tuple[str, ...] = ()   # appended when the run is offline
+    requires: Tuple[str, ...] = ()       # inputs that must exist ("a|b": one of them) or the stage is skipped
+
+
+STAGES: List[Stage] = [
+    Stage("make_mappings", "scripts/interim/make_mappings.py",
+          (M + "drug_targets_manual.tsv", M + "protein_gene_manual.tsv"),
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv")),
+    Stage("fetch_chembl", "scripts/targets/fetch_chembl_mechanisms.py",
+          (),
+          ("data/raw/chembl/chembl_mechanisms.csv", M + "drug_targets_enriched.csv", M + "drug_targets.csv"),
+          network=True),
+    Stage("uniprot_index", "scripts/targets/fill_missing_protein_gene.py",
+          ("raw:uniprot/idmapping_selected.tab", "raw:uniprot/idmapping_selected.tab.gz",
+           "raw:hgnc/hgnc_complete_set.txt", "raw:hgnc/hgnc_complete_set.txt.gz"),
+          ("data/interim/uniprot/acc2gene.sqlite",),
+          args=("--build-index", "--index-only"),
+          requires=("raw:uniprot/idmapping_selected.tab|raw:uniprot/idmapping_selected.tab.gz",
+                    "raw:hgnc/hgnc_complete_set.txt|raw:hgnc/hgnc_complete_set.txt.gz")),
+    Stage("fill_missing_protein_gene", "scripts/targets/fill_missing_protein_gene.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", "data/interim/uniprot/acc2gene.sqlite"),
+          (M + "protein_gene.csv", FORMAL + "fill_missing_protein_gene.txt"),
+          offline_args=("--offline",)),
+    Stage("make_gene_hpo_from_hpo", "scripts/interim/make_gene_hpo_from_hpo.py",
+          (M + "protein_gene.csv", M + "drug_gene_pgx.csv",
+           "raw:hpo/genes_to_phenotype.txt", "raw:hpo/genes_to_phenotype.txt.gz"),
+          (M + "gene_hpo.csv",),
+          requires=("raw:hpo/genes_to_phenotype.txt|raw:hpo/genes_to_phenotype.txt.gz",)),
+    Stage("overrides", "scripts/interim/apply_gene_hpo_overrides.py",
+          (M + "gene_hpo_overrides.tsv", M + "gene_hpo.csv", M + "hpo_meddra_map.tsv", "raw:hpo/hp.json"),
+          (M + "gene_hpo.csv",)),
+    Stage("build_graph", "scripts/etl/build_graph.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv"),
+          ("rdf/ae_kg.ttl",)),
+    Stage("build_hpo2pt_map", "scripts/eval/build_hpo2pt_map.py",
+          (M + "gene_hpo.csv", "raw:hpo/hp.obo", M + "pt_synonyms.tsv", M + "hpo_meddra_overrides.tsv"),
+          (M + "hpo_meddra_map.tsv", FORMAL + "hpo2pt_coverage.txt"),
+          args=("--gene-hpo", M + "gene_hpo.csv", "--hpo-obo", "raw:hpo/hp.obo",
+                "--pt-synonyms", M + "pt_synonyms.tsv",
+                "--overrides", M + "hpo_meddra_overrides.tsv", "--overrides-pt-col", "meddra_pt",
+                "--out-tsv", M + "hpo_meddra_map.tsv", "--coverage-txt", FORMAL + "hpo2pt_coverage.txt"),
+          requires=("raw:hpo/hp.obo",)),
+    Stage("pt_prior_from_sider", "scripts/eval/pt_prior_from_sider.py",
+          ("raw:sider/meddra_all_se.tsv.gz",),
+          (M + "pt_prior.csv",),
+          requires=("raw:sider/meddra_all_se.tsv.gz",)),
+    Stage("gold", "scripts/eval/prepare_gold_from_sider.py",
+          ("raw:sider/drug_names.tsv", "raw:sider/drug_names.tsv.gz",
+           "raw:sider/meddra_all_se.tsv", "raw:sider/meddra_all_se.tsv.gz"),
+          ("eval/gold/simvastatin.txt", "eval/gold/carbamazepine.txt"),
+          requires=("raw:sider/drug_names.tsv|raw:sider/drug_names.tsv.gz",
+                    "raw:sider/meddra_all_se.tsv|raw:sider/meddra_all_se.tsv.gz")),
+    Stage("rankers", "scripts/rankers/rule_r1_with_cpic.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv",
+           M + "hpo_meddra_map.tsv", M + "pt_prior.csv", M + "drug_gene_pgx.csv"),
+          (FORMAL + "*_ranked_hpo.csv",)),
+    Stage("export_predictions", "scripts/etl/export_predictions.py",
+          (FORMAL + "*_ranked_hpo.csv",),
+          ("rdf/ae_predictions.nt", "rdf/ae_predictions.sqlite")),
+    Stage("drug_similarity", "scripts/analysis/drug_similarity.py",
+          (M + "drug_targets.csv", M + "protein_gene.csv", M + "gene_hpo.csv"),
+          (FORMAL + "drug_neighbors.csv",)),
+    Stage("eval", "scripts/eval/run_eval_formal.py",
+          (FORMAL + "*_ranked_hpo.csv", "eval/gold/simvastatin.txt", "eval/gold/carbamazepine.txt",
+           M + "hpo_meddra_map.tsv"),
+          ("reports/formal_*/eval_metrics.csv",)),   # written next to the newest ranked lists
+    Stage("figs", "scripts/figs/make_midterm_figs.py",
+          ("reports/formal_*/eval_metrics.csv", FORMAL + "hpo2pt_coverage.txt", M + "drug_targets.csv"),
+          ("figs/p10_bar.png", "figs/ndcg_bar.png", "figs/hpo2pt_coverage.png", "figs/targets_per_drug.png")),
+]
+
+
+def expand(spec: str) -> str:
+    """Resolve {today} and the raw:<source>/<name> prefix to a repo-relative path."""
+    spec = spec.replace("{today}", date.today().isoformat())
+    if spec.startswith("raw:"):
+        source, name = spec[4:].split("/", 1)
+        return str(raw_path(source, name))
+    return spec
+
+
+def _files(specs: Iterable[str], root: Path) -> List[str]:
+    out = []
+    for spec in specs:
+        p = expand(spec)
+        if glob.has_magic(p):
+            out += sorted(os.path.relpath(m, root) for m in glob.glob(str(root / p)))
+        else:
+            out.append(p)
+    return out
+
+
+def dependencies(stages: Sequence[Stage]) -> Dict[str, Set[str]]:
+    """stage -> earlier stages it must wait for (read-after-write, write-after-write, write-after-read)."""
+    deps: Dict[str, Set[str]] = {s.name: set() for s in stages}
+    for i, s in enumerate(stages):
+        ins, outs = set(s.inputs), set(s.outputs)
+        for prev in stages[:i]:
+            if set(prev.outputs) & (ins | outs) or set(prev.inputs) & outs:
+                deps[s.name].add(prev.name)
+    return deps
+
+
+def upstream(names: Iterable[str], deps: Dict[str, Set[str]]) -> Set[str]:
+    todo, seen = list(names), set()
+    while todo:
+        n = todo.pop()
+        if n not in seen:
+            seen.add(n)
+            todo += deps[n]
+    return seen
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage] = STAGES, root=ROOT, state_dir=STATE_DIR,
+                 network: bool = False, jobs: int = os.cpu_count() or 2):
+        self.stages = list(stages)
+        self.by_name = {s.name: s for s in self.stages}
+        self.deps = dependencies(self.stages)
+        self.last_writer = {o: s.name for s in self.stages for o in s.outputs}
+        self.root = Path(root)
+        self.state_dir = self.root / state_dir
+        self.state_path = self.state_dir / "state.json"
+        self.network = network
+        self.jobs = max(1, jobs)
+        self.hashes = StatsCache(self.state_dir / "hashes.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    # ---------- fingerprints ----------
+
+    def command(self, s: Stage) -> List[str]:
+        args = list(s.args) + (list(s.offline_args) if not self.network else [])
+        return [s.script] + [expand(a) for a in args]
+
+    def fingerprints(self, s: Stage) -> Tuple[Dict[str, Optional[str]], Dict[str, Optional[str]]]:
+        """({input: sha256 or None}, {output: sha256 or None}); the script counts as an input."""
+        def sha(rel):
+            with self._lock:
+                return self.hashes.sha256(self.root / rel)
+        ins = {p: sha(p) for p in _files((s.script,) + s.inputs, self.root)}
+        outs = {p: sha(p) for p in _files(s.outputs, self.root)}
+        return ins, outs
+
+    def _owned(self, s: Stage) -> Set[str]:
+        """Expanded outputs no later stage overwrites."""
+        return set(_files([o for o in s.outputs if self.last_writer[o] == s.name], self.root))
+
+    def missing_input(self, s: Stage) -> Optional[str]:
+        """First required input with no existing alternative, or None."""
+        for req in s.requires:
+            alts = [expand(a) for a in req.split("|")]
+            if not any((self.root / a).exists() for a in alts):
+                return " | ".join(alts)
+        return None
+
+    def adoptable(self, s: Stage) -> bool:
+        """Never run, but every declared output is on disk."""
+        if s.name in self.state:
+            return False
+        outs = _files(s.outputs, self.root)
+        return bool(outs) and len(outs) >= len(s.outputs) and all((self.root / p).exists() for p in outs)
+
+    def stale_reason(self, s: Stage) -> Optional[str]:
+        """Why s has to run, or None if it is up to date."""
+        prev = self.state.get(s.name)
+        if prev is None:
+            return "never run"
+        if prev.get("command") != self.command(s):
+            return "command changed"
+        ins, outs = self.fingerprints(s)
+        for p, h in ins.items():
+            if prev["inputs"].get(p, None) != h:
+                return f"input changed: {p}"
+        for p in prev["inputs"]:
+            if p not in ins:
+                return f"input gone: {p}"
+        if not outs or any(h is None for h in outs.values()):
+            return "output missing: " + next((p for p, h in outs.items() if h is None), " ".join(s.outputs))
+        for p in self._owned(s):
+            if prev["outputs"].get(p) != outs.get(p):
+                return f"output changed: {p}"
+        return None
+
+    def _record(self, s: Stage, seconds: float, adopted: bool = False) -> None:
+        ins, outs = self.fingerprints(s)
+        with self._lock:
+            self.state[s.name] = {"command": self.command(s), "inputs": ins, "outputs": outs,
+                                  "seconds": round(seconds, 3), "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            if adopted:
+                self.state[s.name]["adopted"] = True
+
+    def save(self) -> None:
+        self.hashes.save()
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    # ---------- execution ----------
+
+    def _execute(self, s: Stage) -> Tuple[int, float, Path]:
+        log = self.state_dir / "logs" / f"{s.name}.log"
+        log.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        with open(log, "w", encoding="utf-8") as f:
+            rc = subprocess.call([sys.executable] + self.command(s), cwd=self.root,
+                                 stdout=f, stderr=subprocess.STDOUT)
+        return rc, time.perf_counter() - t0, log
+
+    def run(self, targets: Optional[Iterable[str]] = None, force: bool = False, dry_run: bool = False,
+            echo=print) -> Dict[str, str]:
+        """Run stale stages (targets and their upstream, default all); returns stage -> status."""
+        names = upstream(targets, self.deps) if targets else set(self.by_name)
+        pending = [s for s in self.stages if s.name in names]
+        status: Dict[str, str] = {}
+        running = {}
+
+        def ready(s):
+            return all(status.get(d, "ok") in ("ok", "fresh", "adopted", "skipped", "missing input", "would run")
+                       for d in self.deps[s.name] if d in names)
+
+        def settled(s):
+            return all(d in status for d in self.deps[s.name] if d in names)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for s in list(pending):
+                    if not settled(s) or len(running) >= self.jobs:
+                        continue
+                    pending.remove(s)
+                    if not ready(s):
+                        status[s.name] = "blocked"
+                        echo(f"[blocked] {s.name}")
+                        continue
+                    if s.network and not self.network:
+                        status[s.name] = "skipped"
+                        echo(f"[skip]    {s.name} (network stage; pass --network)")
+                        continue
+                    missing = self.missing_input(s)
+                    if missing:
+                        status[s.name] = "missing input"
+                        echo(f"[missing] {s.name} (missing input: {missing}; dependents use the files on disk)")
+                        continue
+                    upstream_ran = any(status.get(d) in ("ok", "would run") for d in self.deps[s.name])
+                    if not force and not upstream_ran and self.adoptable(s):
+                        status[s.name] = "adopted"
+                        if not dry_run:
+                            self._record(s, 0.0, adopted=True)
+                        echo(f"[adopt]   {s.name} (never run; recording the existing outputs as current)")
+                        continue
+                    reason = "forced" if force else self.stale_reason(s)
+                    if reason is None and dry_run and upstream_ran:
+                        reason = "upstream will run"
+                    if reason is None:
+                        status[s.name] = "fresh"
+                        echo(f"[fresh]   {s.name}")
+                        continue
+                    if dry_run:
+                        status[s.name] = "would run"
+                        echo(f"[run]     {s.name} ({reason})")
+                        continue
+                    echo(f"[start]   {s.name} ({reason})")
+                    running[pool.submit(self._execute, s)] = s
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    s = running.pop(fut)
+                    rc, secs, log = fut.result()
+                    if rc == 0:
+                        self._record(s, secs)
+                        status[s.name] = "ok"
+                        echo(f"[done]    {s.name} {secs:.1f}s")
+                    else:
+                        status[s.name] = "failed"
+                        tail = log.read_text(encoding="utf-8", errors="replace").splitlines()[-10:]
+                        echo(f"[FAILED]  {s.name} exit {rc} (log: {log})\n" + "\n".join("    " + ln for ln in tail))
+                    self.save()
+        if not dry_run:
+            self.save()
+        return status
@@ -0,0 +1,165 @@
+"""
+Ranked predictions as graph triples (:Evidence / :mayCause) plus a per-drug top-K index.
+
+    rows = iter_ranked(latest_ranked_dir(), top_k=50)           # (drug, rank, hpo_id, score)
+    export(rows, "rdf/ae_predictions.nt", "rdf/ae_predictions.sqlite", source="rule_r1_with_cpic")
+    TopKIndex("rdf/ae_predictions.sqlite").top("CHEMBL1064", k=10, min_weight=0.5)
+
+Every kept row of a <drug>_ranked_hpo.csv becomes
+
+    <drug> :mayCause <phenotype> .
+    <evidence/drug/hpo> a :Evidence ; :about <drug> , <phenotype> ;
+                        :weight "score"^^xsd:float ; :source "..." .
+
+with the drug / phenotype IRIs of scripts/etl/build_graph.py. The lines are
+written to an N-Triples file as they are produced (no rdflib Graph in
+between), and the same rows go into one SQLite table keyed by (drug, rank),
+so "top k phenotypes of drug X with weight >= w" is a range read of that
+drug's rows instead of a scan over every :Evidence node.
+
+Row order in a ranked CSV is its ranking (as in scripts/eval/run_eval_formal.py),
+so only the first top_k rows of each file are read.
+"""
+
+import csv
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+NS = "http://example.org/ae-kg#"
+BASE = "http://example.org/"
+XSD_FLOAT = "http://www.w3.org/2001/XMLSchema#float"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+NT_PATH = Path("rdf/ae_predictions.nt")
+DB_PATH = Path("rdf/ae_predictions.sqlite")
+SUFFIX = "_ranked_hpo.csv"
+
+Row = Tuple[str, int, str, float]   # (drug_id, rank, hpo_id, score)
+
+
+def iri(kind: str, *ids: str) -> str:
+    return f"<{BASE}{kind}/{'/'.join(quote(i, safe=':-_.') for i in ids)}>"
+
+
+def latest_ranked_dir(reports="reports") -> Optional[Path]:
+    """Most recently modified reports/formal_* that holds at least one ranked list, or None."""
+    dirs = sorted(Path(reports).glob("formal_*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return next((d for d in dirs if next(d.glob("*" + SUFFIX), None)), None)
+
+
+def iter_ranked(ranked_dir, top_k: int = 0, min_weight: Optional[float] = None) -> Iterator[Row]:
+    """Rows of every <drug>_ranked_hpo.csv in ranked_dir; rank counts the kept rows from 1."""
+    for f in sorted(Path(ranked_dir).glob("*" + SUFFIX)):
+        drug = f.name[:-len(SUFFIX)]
+        rank = 0
+        with open(f, encoding="utf-8-sig", newline="") as fi:
+            rdr = csv.reader(fi)
+            header = next(rdr, [])
+            if "hpo_id" not in header or "score" not in header:
+                continue
+            ih, isc = header.index("hpo_id"), header.index("score")
+            for r in rdr:
+                try:
+                    h, s = r[ih].strip(), float(r[isc])
+                except (IndexError, ValueError):
+                    continue
+                if not h or not math.isfinite(s) or (min_weight is not None and s < min_weight):
+                    continue
+                rank += 1
+                yield drug, rank, h, s
+                if top_k and rank >= top_k:
+                    break
+
+
+def nt_lines(rows: Iterable[Row], source: str) -> Iterator[str]:
+    """N-Triples for each row (see the module docstring); type triples once per drug / phenotype."""
+    may_cause, evidence = f"<{NS}mayCause>", f"<{NS}Evidence>"
+    about, weight, src = f"<{NS}about>", f"<{NS}weight>", f"<{NS}source>"
+    rdf_type = f"<{RDF_TYPE}>"
+    src_lit = json.dumps(source, ensure_ascii=False)      # N-Triples string escaping is JSON's
+    seen_hpo, last_drug = set(), None
+    for drug, rank, h, s in rows:
+        d, p = iri("drug", drug), iri("phenotype", h)
+        if drug != last_drug:
+            yield f"{d} {rdf_type} <{NS}Drug> .\n"
+            last_drug = drug
+        if h not in seen_hpo:
+            seen_hpo.add(h)
+            yield f"{p} {rdf_type} <{NS}Phenotype> .\n"
+        e = iri("evidence", drug, h)
+        yield (f"{d} {may_cause} {p} .\n"
+               f"{e} {rdf_type} {evidence} .\n"
+               f"{e} {about} {d} .\n"
+               f"{e} {about} {p} .\n"
+               f'{e} {weight} "{s!r}"^^<{XSD_FLOAT}> .\n'
+               f"{e} {src} {src_lit} .\n")
+
+
+class TopKIndex:
+    """SQLite table predictions(drug, rank, hpo, weight) with primary key (drug, rank)."""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        self._con: Optional[sqlite3.Connection] = None
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            self._con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return self._con
+
+    def close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    def meta(self) -> dict:
+        return dict(self._connect().execute("SELECT key, value FROM meta").fetchall())
+
+    def top(self, drug: str, k: int = 10, min_weight: float = float("-inf")) -> List[Tuple[int, str, float]]:
+        """(rank, hpo_id, weight) of the drug's best k predictions with weight >= min_weight."""
+        return self._connect().execute(
+            "SELECT rank, hpo, weight FROM predictions WHERE drug = ? AND weight >= ? ORDER BY rank LIMIT ?",
+            (drug, min_weight, k)).fetchall()
+
+
+def export(rows: Iterable[Row], nt_path=NT_PATH, db_path=DB_PATH, source: str = "", meta: Optional[dict] = None) -> int:
+    """Write rows as N-Triples and into a fresh top-K index in one pass; returns the number of rows."""
+    nt_path, db_path = Path(nt_path), Path(db_path)
+    nt_path.parent.mkdir(parents=True, exist_ok=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    nt_tmp, db_tmp = nt_path.with_suffix(nt_path.suffix + ".tmp"), db_path.with_suffix(db_path.suffix + ".tmp")
+    if db_tmp.exists():
+        db_tmp.unlink()
+    con = sqlite3.connect(db_tmp)
+    con.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;"
+                      "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);"
+                      "CREATE TABLE predictions (drug TEXT NOT NULL, rank INTEGER NOT NULL, hpo TEXT NOT NULL,"
+                      " weight REAL NOT NULL, PRIMARY KEY (drug, rank)) WITHOUT ROWID;")
+    n, batch = 0, []
+
+    def tee(rs):
+        nonlocal n
+        for r in rs:
+            batch.append(r)
+            if len(batch) >= 50000:
+                con.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?)", batch); batch.clear()
+            n += 1
+            yield r
+
+    with open(nt_tmp, "w", encoding="utf-8", newline="\n") as fo:
+        fo.writelines(nt_lines(tee(rows), source))
+    con.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?)", batch)
+    con.executemany("INSERT INTO meta VALUES (?, ?)",
+                    [(k, str(v)) for k, v in {"source": source, "rows": n, **(meta or {})}.items() if v is not None])
+    con.commit()
+    con.close()
+    nt_tmp.replace(nt_path)
+    db_tmp.replace(db_path)
+    return n
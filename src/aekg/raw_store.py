@@ -0,0 +1,191 @@
+"""
+Deduplicated, content-addressed store for raw source files.
+
+Layout under data/raw:
+
+    .store/blobs/<ss>/<sha256>         every distinct file, stored once, read-only
+    .store/manifests/<date>.json       {"date", "files": {"<source>/<name>":
+                                         {"sha256", "size", "url", "date"}}}
+    .store/CURRENT                     date of the manifest ingest scripts read
+    <source>/<date>/<name>             hard link to the blob (browsable view)
+
+A manifest carries forward every file of the newest existing manifest, so a
+daily fetch that changes one source only adds one blob; identical files on
+different days share a blob. Switching snapshots only rewrites CURRENT, and a
+later commit still builds on the newest manifest, not on the one switched to.
+
+Blobs are chmod 0444 and a view is made once, by the commit that adds the
+file (entry "date"): a hard link to the blob, so it is read-only as well and
+costs no space. Carried-forward files keep the view of the day they were
+added; nothing is copied per snapshot.
+
+Ingest scripts ask for files by (source, name) instead of hard-coding paths:
+
+    from aekg.raw_store import raw_path
+    se = raw_path("sider", "meddra_all_se.tsv.gz")
+
+raw_path() returns that view (or the blob itself if the view was deleted or replaced)
+and never writes anything, so it is safe in dry runs. It falls back to the
+legacy flat layout data/raw/<source>/<name> when the file is not in the
+current manifest, so hand-copied files keep working. It reads CURRENT (and
+AEKG_RAW_ROOT) on every call, so scripts resolve their inputs inside main()
+rather than at import time.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def raw_root() -> Path:
+    """Default store root: env AEKG_RAW_ROOT, else data/raw."""
+    return Path(os.environ.get("AEKG_RAW_ROOT") or "data/raw")
+
+
+def _sha256_file(path: Path, bufsize: int = 4 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def _place(src: Path, dest: Path, link: bool = True) -> None:
+    """
+    Atomically make dest a read-only hard link to src (a copy when link is
+    False or linking fails, e.g. across file systems).
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        try:
+            if not link:
+                raise OSError
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.chmod(tmp, READ_ONLY)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class RawStore:
+    def __init__(self, root=None):
+        self.root = Path(root) if root else raw_root()
+        self.store = self.root / ".store"
+
+    # ---------- blobs ----------
+
+    def blob_path(self, sha: str) -> Path:
+        return self.store / "blobs" / sha[:2] / sha
+
+    def add_blob(self, path, sha: Optional[str] = None, link: bool = False) -> str:
+        """
+        Put a file into the blob store (read-only); returns its sha256.
+        link=True adopts it as a hard link instead of copying: for files that are
+        themselves immutable, such as HTTP cache blobs (they become read-only too).
+        """
+        path = Path(path)
+        sha = sha or _sha256_file(path)
+        bp = self.blob_path(sha)
+        if not bp.exists():
+            _place(path, bp, link=link)
+        return sha
+
+    # ---------- manifests ----------
+
+    def current_date(self) -> Optional[str]:
+        p = self.store / "CURRENT"
+        if not p.exists():
+            return None
+        return p.read_text(encoding="utf-8").strip() or None
+
+    def manifest(self, date: Optional[str] = None) -> dict:
+        date = date or self.current_date()
+        if not date:
+            return {"date": None, "files": {}}
+        with open(self.store / "manifests" / f"{date}.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def dates(self):
+        return sorted(p.stem for p in (self.store / "manifests").glob("*.json"))
+
+    def latest_date(self) -> Optional[str]:
+        ds = self.dates()
+        return ds[-1] if ds else None
+
+    def commit(self, date: str, files: Dict[str, dict], base: Optional[str] = None) -> dict:
+        """
+        Write manifest <date> = manifest <base> + files ({"src/name": {"sha256", ...}}),
+        link the views of the added files and make <date> CURRENT. base defaults
+        to the newest manifest by date (whatever CURRENT points at).
+        """
+        base = base or self.latest_date()
+        files = {rel: dict(meta, date=date) for rel, meta in files.items()}
+        merged = dict(self.manifest(base).get("files", {})) if base else {}
+        merged.update(files)
+        man = {"date": date, "files": dict(sorted(merged.items()))}
+        mdir = self.store / "manifests"
+        mdir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=mdir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(man, f, indent=1)
+        os.replace(tmp, mdir / f"{date}.json")
+        for rel, meta in files.items():
+            source, _, name = rel.partition("/")
+            _place(self.blob_path(meta["sha256"]), self.root / source / date / name)
+        self.switch(date)
+        return man
+
+    def switch(self, date: str) -> None:
+        """Make an existing manifest the current snapshot."""
+        if not (self.store / "manifests" / f"{date}.json").exists():
+            raise FileNotFoundError(f"no raw snapshot manifest for {date}")
+        fd, tmp = tempfile.mkstemp(dir=self.store, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(date + "\n")
+        os.replace(tmp, self.store / "CURRENT")
+
+    # ---------- resolver ----------
+
+    def entry(self, source: str, name: str) -> Optional[dict]:
+        return self.manifest().get("files", {}).get(f"{source}/{name}")
+
+    def blob_sha(self, source: str, name: str) -> Optional[str]:
+        e = self.entry(source, name)
+        return e["sha256"] if e else None
+
+    def resolve(self, source: str, name: str) -> Path:
+        """
+        Path of (source, name) in the current snapshot: the view linked when the
+        file was added, else its blob; the legacy flat path if it is not in the
+        snapshot. Never writes.
+        """
+        date = self.current_date()
+        e = self.entry(source, name) if date else None
+        if not e:
+            return self.root / source / name
+        view = self.root / source / e.get("date", date) / name
+        blob = self.blob_path(e["sha256"])
+        try:
+            if os.path.samefile(view, blob):
+                return view
+        except OSError:
+            pass
+        return blob
+
+
+def raw_path(source: str, name: str, root=None) -> Path:
+    """Current path of a raw file, e.g. raw_path("hpo", "hp.obo")."""
+    return RawStore(root).resolve(source, name)
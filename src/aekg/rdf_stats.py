@@ -0,0 +1,94 @@
+"""
+Triple statistics without building an rdflib Graph.
+
+N-Triples files are read line by line. Every other format goes through
+rdflib's own parser, but into a store that only counts what it receives.
+Memory is the set of distinct subjects plus the counters, not the
+indexed graph:
+
+    st = stream_stats(["rdf/schema.ttl", "rdf/ae_kg.ttl"])
+    st.triples, len(st.subjects), st.predicates.most_common(5), st.classes
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Set
+
+from rdflib import Graph
+from rdflib.namespace import RDF
+from rdflib.store import Store
+from rdflib.util import guess_format
+
+_RDF_TYPE = str(RDF.type)
+_RDF_TYPE_NT = f"<{_RDF_TYPE}>"
+
+
+class TripleStats:
+    def __init__(self):
+        self.triples = 0
+        self.subjects: Set[str] = set()
+        self.predicates: Counter = Counter()
+        self.classes: Counter = Counter()  # rdf:type objects -> instance count
+
+    def add(self, s: str, p: str, o: str) -> None:
+        self.triples += 1
+        self.subjects.add(s)
+        self.predicates[p] += 1
+        if p == _RDF_TYPE:
+            self.classes[o] += 1
+
+    def merge(self, other: "TripleStats") -> "TripleStats":
+        self.triples += other.triples
+        self.subjects |= other.subjects
+        self.predicates.update(other.predicates)
+        self.classes.update(other.classes)
+        return self
+
+
+class CountingStore(Store):
+    """rdflib Store that feeds parsed triples into a TripleStats and keeps nothing else."""
+
+    def __init__(self, stats: TripleStats):
+        super().__init__()
+        self.stats = stats
+
+    def add(self, triple, context, quoted=False):
+        s, p, o = triple
+        self.stats.add(str(s), str(p), str(o))
+
+    def triples(self, triple_pattern, context=None):
+        return iter(())
+
+    def __len__(self, context=None):
+        return self.stats.triples
+
+
+def _unbracket(term: str) -> str:
+    return term[1:-1] if term.startswith("<") and term.endswith(">") else term
+
+
+def _nt_stats(path, stats: TripleStats) -> None:
+    with open(path, encoding="utf-8", buffering=1 << 20) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            s, p, rest = line.split(" ", 2)
+            o = rest.rstrip(" .")
+            stats.triples += 1
+            stats.subjects.add(_unbracket(s))
+            stats.predicates[_unbracket(p)] += 1
+            if p == _RDF_TYPE_NT:
+                stats.classes[_unbracket(o)] += 1
+
+
+def stream_stats(paths: Iterable) -> TripleStats:
+    """Count triples / distinct subjects / predicates / classes over several RDF files."""
+    stats = TripleStats()
+    for path in paths:
+        fmt = guess_format(str(path)) or "turtle"
+        if fmt == "nt" or Path(path).suffix == ".nt":
+            _nt_stats(path, stats)
+        else:
+            Graph(store=CountingStore(stats)).parse(str(path), format=fmt)
+    return stats
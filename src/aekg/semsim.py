@@ -0,0 +1,234 @@
+"""
+Semantic similarity of HPO term sets: Resnik / Lin with best-match average.
+
+    ont = load_ontology()                         # hp.obo + gene_hpo.csv, pickled per content
+    profiles = [ont.positions(hpo_ints) for hpo_ints in ...]
+    S = TermSims(ont, np.concatenate(profiles))   # term x term Resnik, computed once
+    S.bma(profiles[0], profiles[1], "lin")        # one pair of profiles
+    S.bma_matrix(profiles, "resnik")              # every pair of profiles
+
+Profiles are sets of ontology positions; Ontology.positions() turns HPO ints
+(aekg.vocab.hpo_int) into them, following alt_ids and replaced_by and dropping
+terms hp.obo does not know.
+
+Information content comes from gene_hpo.csv: p(t) is the share of annotated
+genes annotated to t or to one of its descendants, IC(t) = -ln p(t). A term no
+gene reaches gets the IC of a single gene, ln(n_genes).
+
+Terms are numbered by IC, highest first, and each term's ancestors (itself
+included, over is_a) are kept as a packed uint64 bitset in that order. The
+most informative common ancestor of t and u is then the lowest set bit of
+anc[t] & anc[u], so Resnik(t, u) = IC of that bit and Lin(t, u) = 2 Resnik /
+(IC(t) + IC(u)). TermSims fills the float32 Resnik matrix of a term universe
+(every term of every profile) row by row: the first of t's ancestors, in IC
+order, that each other term also has. All-pairs BMA over hundreds of drug
+profiles then only indexes that matrix instead of walking the DAG per pair.
+
+The parsed index (term order, IC, ancestor lists) is pickled under
+data/cache/semsim/, keyed by the sha256 of hp.obo and gene_hpo.csv.
+"""
+
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from aekg import mappings
+from aekg.fingerprint import StatsCache
+from aekg.mapstore import MAPPINGS_DIR
+from aekg.obo import build_redirects, iter_obo_terms
+from aekg.raw_store import raw_path
+from aekg.vocab import hpo_int
+
+CACHE_DIR = Path("data/cache/semsim")
+MEASURES = ("resnik", "lin")
+_VERSION = 1
+
+
+class Ontology:
+    """HPO terms in IC-descending order with their ancestor bitsets."""
+
+    def __init__(self, hpo_ids: np.ndarray, ic: np.ndarray, anc_indptr: np.ndarray, anc: np.ndarray,
+                 redirects: Dict[int, int], n_genes: int):
+        self.hpo_ids, self.ic = hpo_ids, ic                 # position -> HPO int, IC (non-increasing)
+        self.anc_indptr, self.anc = anc_indptr, anc         # position -> ancestor positions (sorted, self included)
+        self.redirects, self.n_genes = redirects, n_genes
+        self.pos = {h: i for i, h in enumerate(hpo_ids.tolist())}
+        n = len(hpo_ids)
+        self.n_words = max(1, (n + 63) // 64)
+        self.bits = np.zeros((n, self.n_words), dtype=np.uint64)
+        rows = np.repeat(np.arange(n), np.diff(anc_indptr))
+        np.bitwise_or.at(self.bits, (rows, anc >> 6), np.left_shift(np.uint64(1), (anc & 63).astype(np.uint64)))
+
+    def __len__(self) -> int:
+        return len(self.hpo_ids)
+
+    def ancestors(self, i: int) -> np.ndarray:
+        return self.anc[self.anc_indptr[i]:self.anc_indptr[i + 1]]
+
+    def positions(self, hpos: Sequence[int]) -> np.ndarray:
+        """Sorted unique positions of HPO ints (redirected; unknown ones dropped)."""
+        out = {self.pos.get(self.redirects.get(h, h), -1) for h in hpos}
+        out.discard(-1)
+        return np.array(sorted(out), dtype=np.int64)
+
+    def mica(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Position of the most informative common ancestor for each pair a[k], b[k] (-1 if none)."""
+        common = self.bits[a] & self.bits[b]
+        nz = common != 0
+        word = nz.argmax(axis=1)
+        w = common[np.arange(len(a)), word]
+        low = w & (~w + np.uint64(1))                        # lowest set bit
+        bit = np.log2(np.where(low == 0, 1, low).astype(np.float64)).astype(np.int64)
+        return np.where(nz.any(axis=1), word * 64 + bit, -1)
+
+    def resnik(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        m = self.mica(a, b)
+        return np.where(m >= 0, self.ic[np.maximum(m, 0)], 0.0)
+
+
+def _closure(parents: List[List[int]]) -> List[List[int]]:
+    """Ancestor lists (self included) of a DAG given parent lists; cycles are cut."""
+    n = len(parents)
+    anc: List[Optional[frozenset]] = [None] * n
+    for root in range(n):
+        if anc[root] is not None:
+            continue
+        stack, on_path = [(root, 0)], {root}
+        while stack:
+            t, k = stack[-1]
+            ps = parents[t]
+            if k < len(ps):
+                stack[-1] = (t, k + 1)
+                p = ps[k]
+                if anc[p] is None and p not in on_path:
+                    stack.append((p, 0)); on_path.add(p)
+                continue
+            s = {t}
+            for p in ps:
+                if anc[p] is not None:
+                    s |= anc[p]
+            anc[t] = frozenset(s)
+            on_path.discard(t)
+            stack.pop()
+    return [sorted(s) for s in anc]
+
+
+def build_ontology(obo_path, gene_hpo_path=None) -> Ontology:
+    terms = [t for t in iter_obo_terms(str(obo_path)) if not t.is_obsolete]
+    redirects = {hpo_int(k): hpo_int(v) for k, v in build_redirects(iter_obo_terms(str(obo_path))).items()}
+    ids = [hpo_int(t.id) for t in terms]
+    idx = {h: i for i, h in enumerate(ids)}
+    parents = [[idx[p] for p in (redirects.get(hpo_int(x), hpo_int(x)) for x in t.is_a) if p in idx] for t in terms]
+    anc = _closure(parents)
+
+    # 注释频率：每个基因把注释项连同所有祖先各计一次
+    gene_terms: Dict[str, set] = {}
+    for g, h in mappings.iter_rows("gene_hpo", gene_hpo_path):
+        if g and h:
+            i = idx.get(redirects.get(hpo_int(h), hpo_int(h)))
+            if i is not None:
+                gene_terms.setdefault(g, set()).add(i)
+    counts = np.zeros(len(ids), dtype=np.int64)
+    for ts in gene_terms.values():
+        counts[np.unique(np.concatenate([anc[i] for i in ts]))] += 1
+    n_genes = len(gene_terms)
+    ic = np.log(max(n_genes, 1) / np.maximum(counts, 1))      # 未注释的项按 1 个基因计
+
+    # 按 IC 从高到低重新编号，最低位即最具信息量的共同祖先
+    order = np.lexsort((np.array(ids), -ic))
+    new = np.empty(len(ids), dtype=np.int64)
+    new[order] = np.arange(len(ids))
+    lists = [np.sort(new[anc[i]]) for i in order.tolist()]
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in lists], out=indptr[1:])
+    flat = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int64)
+    return Ontology(np.array(ids, dtype=np.int64)[order], ic[order], indptr, flat, redirects, n_genes)
+
+
+def load_ontology(obo_path=None, gene_hpo_path=None, cache_dir=CACHE_DIR) -> Ontology:
+    """build_ontology() through a pickle cache keyed by the content of both inputs."""
+    obo_path = Path(obo_path) if obo_path else raw_path("hpo", "hp.obo")
+    gene_hpo_path = Path(gene_hpo_path) if gene_hpo_path else MAPPINGS_DIR / "gene_hpo.csv"
+    cache_dir = Path(cache_dir)
+    hashes = StatsCache(cache_dir / "hashes.json")
+    key = f"v{_VERSION}_{(hashes.sha256(obo_path) or 'none')[:16]}_{(hashes.sha256(gene_hpo_path) or 'none')[:16]}"
+    hashes.save()
+    path = cache_dir / f"hpo_{key}.pkl"
+    if path.exists():
+        with open(path, "rb") as f:
+            s = pickle.load(f)
+        return Ontology(s["hpo_ids"], s["ic"], s["anc_indptr"], s["anc"], s["redirects"], s["n_genes"])
+    ont = build_ontology(obo_path, gene_hpo_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump({"hpo_ids": ont.hpo_ids, "ic": ont.ic, "anc_indptr": ont.anc_indptr, "anc": ont.anc,
+                     "redirects": ont.redirects, "n_genes": ont.n_genes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+    return ont
+
+
+class TermSims:
+    """Resnik of every pair of terms in a universe, computed once; Lin is derived per block."""
+
+    def __init__(self, ont: Ontology, terms: Sequence[int], block: int = 2048):
+        self.ont = ont
+        self.terms = np.unique(np.asarray(terms, dtype=np.int64))   # positions in ont
+        self.index = {t: k for k, t in enumerate(self.terms.tolist())}
+        self.ic = ont.ic[self.terms]
+        n = len(self.terms)
+        self.resnik = np.zeros((n, n), dtype=np.float32)
+        if not n:
+            return
+        # 只有 universe 里各项的祖先会成为共同祖先；按列（IC 降序）逐个测试位
+        cols = np.unique(np.concatenate([ont.ancestors(t) for t in self.terms.tolist()]))
+        member = np.zeros((n, len(cols)), dtype=bool)
+        for s in range(0, n, block):
+            w = ont.bits[np.ix_(self.terms[s:s + block], cols >> 6)]
+            member[s:s + block] = (w >> (cols & 63).astype(np.uint64)) & np.uint64(1) != 0
+        ic_cols = ont.ic[cols]
+        for r, t in enumerate(self.terms.tolist()):
+            a = np.searchsorted(cols, ont.ancestors(t))       # t's ancestors, most informative first
+            sub = member[:, a]
+            first = sub.argmax(axis=1)
+            hit = sub[np.arange(n), first]
+            self.resnik[r] = np.where(hit, ic_cols[a[first]], 0.0)
+
+    def local(self, positions: np.ndarray) -> np.ndarray:
+        """Row indices in the matrix of ontology positions (every one must be in the universe)."""
+        return np.array([self.index[p] for p in positions.tolist()], dtype=np.int64)
+
+    def block(self, rows: np.ndarray, cols: Optional[np.ndarray] = None, measure: str = "resnik") -> np.ndarray:
+        """Term-pair similarities for local row / column indices (all columns if cols is None)."""
+        if measure not in MEASURES:
+            raise ValueError(f"unknown measure {measure!r}; one of {', '.join(MEASURES)}")
+        sub = self.resnik[rows] if cols is None else self.resnik[np.ix_(rows, cols)]
+        if measure == "resnik":
+            return sub
+        denom = self.ic[rows][:, None] + (self.ic if cols is None else self.ic[cols])[None, :]
+        return np.divide(2 * sub, denom, out=np.zeros_like(sub), where=denom > 0)
+
+    def bma(self, a: np.ndarray, b: np.ndarray, measure: str = "resnik") -> float:
+        """Best-match average of two profiles given as ontology positions."""
+        if not len(a) or not len(b):
+            return 0.0
+        sub = self.block(self.local(a), self.local(b), measure)
+        return float((sub.max(axis=1).mean() + sub.max(axis=0).mean()) / 2)
+
+    def bma_matrix(self, profiles: Sequence[np.ndarray], measure: str = "resnik") -> np.ndarray:
+        """Symmetric matrix of bma() over every pair of profiles."""
+        loc = [self.local(p) for p in profiles]
+        n = len(profiles)
+        out = np.zeros((n, n))
+        for i in range(n):
+            if not len(loc[i]):
+                continue
+            rows = self.block(loc[i], None, measure)          # |p_i| x universe
+            best_i = rows.max(axis=0)                         # best match in p_i for every universe term
+            for j in range(i, n):
+                if not len(loc[j]):
+                    continue
+                out[i, j] = out[j, i] = (rows[:, loc[j]].max(axis=1).mean() + best_i[loc[j]].mean()) / 2
+        return out
@@ -0,0 +1,425 @@
+"""
+Fast-path SHACL validation for simple shapes.
+
+Shapes that only use
+
+    targets:      sh:targetClass, sh:targetNode, sh:targetSubjectsOf, sh:targetObjectsOf
+    constraints:  sh:property with a predicate sh:path, and on it
+                  sh:minCount, sh:maxCount, sh:class, sh:datatype
+    annotations:  sh:name, sh:description, sh:message, sh:severity, sh:order,
+                  sh:group, rdfs:label, rdfs:comment
+
+are compiled into direct index lookups: one pass over each constrained
+predicate gives the value counts of every subject, and class membership is a
+cached set per class. With inference="rdfs" the RDFS entailments pyshacl would
+materialize first are applied on the fly instead: rdfs:subClassOf and
+rdfs:subPropertyOf closure, plus typing from rdfs:domain and rdfs:range, which
+is what makes an untyped object of :actsOn a :Protein. Any other shape is
+validated by pyshacl (only that shape when it has an IRI, otherwise the whole
+shapes graph). The pyshacl results are merged into the same report.
+
+validate() keeps pyshacl's signature and return value:
+
+    from aekg.shacl_fast import validate
+    conforms, results_graph, results_text = validate(data, shacl_graph=shapes, inference="rdfs")
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import RDF, RDFS, SH, XSD
+from rdflib.term import Node
+
+SUPPORTED_TARGETS = {SH.targetClass, SH.targetNode, SH.targetSubjectsOf, SH.targetObjectsOf}
+SUPPORTED_CONSTRAINTS = {SH.minCount, SH.maxCount, SH["class"], SH.datatype}
+ANNOTATIONS = {RDF.type, SH.name, SH.description, SH.message, SH.severity, SH.order,
+               SH.group, RDFS.label, RDFS.comment}
+
+COMPONENT = {
+    SH.minCount: SH.MinCountConstraintComponent,
+    SH.maxCount: SH.MaxCountConstraintComponent,
+    SH["class"]: SH.ClassConstraintComponent,
+    SH.datatype: SH.DatatypeConstraintComponent,
+}
+
+
+class Result(NamedTuple):
+    focus: Node
+    path: URIRef
+    component: URIRef
+    source_shape: Node
+    severity: URIRef
+    value: Optional[Node]
+    message: str
+
+
+class PropertyCheck(NamedTuple):
+    node: Node          # the property shape node (sh:sourceShape)
+    path: URIRef
+    min_count: Optional[int]
+    max_count: Optional[int]
+    cls: Optional[URIRef]
+    datatype: Optional[URIRef]
+    severity: URIRef
+    message: Optional[str]
+
+
+class CompiledShape(NamedTuple):
+    node: Node
+    targets: Tuple[Tuple[URIRef, Node], ...]   # (target predicate, value)
+    checks: Tuple[PropertyCheck, ...]
+
+
+# ---------- shape compilation ----------
+
+def _one(g: Graph, s, p):
+    vals = list(g.objects(s, p))
+    return vals[0] if len(vals) == 1 else (None if not vals else False)
+
+
+def _compile_property(sg: Graph, node) -> Optional[PropertyCheck]:
+    preds = set(sg.predicates(node, None))
+    if not preds <= (SUPPORTED_CONSTRAINTS | ANNOTATIONS | {SH.path}):
+        return None
+    path = _one(sg, node, SH.path)
+    if not isinstance(path, URIRef):
+        return None  # sequence / inverse / alternative paths
+    vals = {}
+    for p in SUPPORTED_CONSTRAINTS | {SH.severity, SH.message}:
+        v = _one(sg, node, p)
+        if v is False:
+            return None  # several sh:class etc. -> let pyshacl handle it
+        vals[p] = v
+    mn, mx = vals[SH.minCount], vals[SH.maxCount]
+    return PropertyCheck(
+        node, path,
+        int(mn) if mn is not None else None,
+        int(mx) if mx is not None else None,
+        vals[SH["class"]], vals[SH.datatype],
+        vals[SH.severity] or SH.Violation,
+        str(vals[SH.message]) if vals[SH.message] is not None else None,
+    )
+
+
+def compile_shapes(sg: Graph) -> Tuple[List[CompiledShape], List[Node]]:
+    """Return (compiled shapes, shape nodes that need pyshacl)."""
+    shape_nodes: Set[Node] = set()
+    for t in SUPPORTED_TARGETS:
+        shape_nodes.update(sg.subjects(t, None))
+    shape_nodes.update(sg.subjects(RDF.type, SH.NodeShape))
+    # implicit class targets (a shape that is also an rdfs:Class) are not compiled
+    shape_nodes.update(s for s in sg.subjects(RDF.type, RDFS.Class) if (s, RDF.type, SH.NodeShape) in sg)
+
+    compiled, fallback = [], []
+    for node in sorted(shape_nodes, key=str):
+        if (node, SH.deactivated, Literal(True)) in sg:
+            continue
+        targets = tuple((t, v) for t in SUPPORTED_TARGETS for v in sg.objects(node, t))
+        if (node, RDF.type, RDFS.Class) in sg:
+            fallback.append(node)
+            continue
+        if not targets:
+            continue  # only reachable through sh:node etc., i.e. from a fallback shape
+        preds = set(sg.predicates(node, None))
+        allowed = SUPPORTED_TARGETS | ANNOTATIONS | {SH.property}
+        if SH.path in preds:  # a property shape with its own targets
+            allowed |= SUPPORTED_CONSTRAINTS | {SH.path}
+        if not preds <= allowed:
+            fallback.append(node)
+            continue
+        props = [node] if SH.path in preds else list(sg.objects(node, SH.property))
+        checks = [_compile_property(sg, p) for p in props]
+        if any(c is None for c in checks):
+            fallback.append(node)
+            continue
+        compiled.append(CompiledShape(node, targets, tuple(checks)))
+    return compiled, fallback
+
+
+# ---------- data-graph index ----------
+
+class _Lazy(dict):
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+
+    def __missing__(self, key):
+        v = self[key] = self.fn(key)
+        return v
+
+
+def _closure(pairs: Iterable[Tuple[Node, Node]]) -> Dict[Node, Set[Node]]:
+    """{super: every sub (transitively), including super itself} from (sub, super) pairs."""
+    down: Dict[Node, Set[Node]] = defaultdict(set)
+    for sub, sup in pairs:
+        down[sup].add(sub)
+
+    def walk(n):
+        seen, stack = {n}, [n]
+        while stack:
+            for c in down.get(stack.pop(), ()):
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+        return seen
+    return _Lazy(walk)
+
+
+class GraphIndex:
+    """Class membership and per-predicate value lookups, with optional RDFS entailment."""
+
+    def __init__(self, data: Graph, ont: Optional[Graph] = None, rdfs: bool = True):
+        self.g = data
+        self.rdfs = rdfs
+        schema = [data] + ([ont] if ont is not None else [])
+        self.subclasses = _closure(p for s in schema for p in s.subject_objects(RDFS.subClassOf))
+        if rdfs:
+            self.subprops = _closure(p for s in schema for p in s.subject_objects(RDFS.subPropertyOf))
+            self.domains = [(p, c) for s in schema for p, c in s.subject_objects(RDFS.domain)]
+            self.ranges = [(p, c) for s in schema for p, c in s.subject_objects(RDFS.range)]
+        else:
+            self.subprops = _Lazy(lambda p: {p})
+            self.domains = self.ranges = []
+        self._instances: Dict[Node, Set[Node]] = {}
+        self._counts: Dict[URIRef, Counter] = {}
+
+    def instances(self, cls) -> Set[Node]:
+        if cls in self._instances:
+            return self._instances[cls]
+        classes = self.subclasses[cls]
+        out: Set[Node] = set()
+        for c in classes:
+            out.update(self.g.subjects(RDF.type, c))
+        for p, c in self.domains:
+            if c in classes:
+                for sp in self.subprops[p]:
+                    out.update(self.g.subjects(sp, None))
+        for p, c in self.ranges:
+            if c in classes:
+                for sp in self.subprops[p]:
+                    out.update(o for o in self.g.objects(None, sp) if not isinstance(o, Literal))
+        self._instances[cls] = out
+        return out
+
+    def values(self, s, path) -> Iterable[Node]:
+        props = self.subprops[path]
+        if len(props) == 1:
+            return self.g.objects(s, path)
+        return {o for p in props for o in self.g.objects(s, p)}
+
+    def count(self, s, path) -> int:
+        """Number of distinct values of path on s (one predicate scan, then dict lookups)."""
+        if path not in self._counts:
+            props = self.subprops[path]
+            c: Counter = Counter()
+            if len(props) == 1:
+                for subj in self.g.subjects(path, None):
+                    c[subj] += 1
+            else:
+                pairs = {(a, b) for p in props for a, b in self.g.subject_objects(p)}
+                c.update(a for a, _ in pairs)
+            self._counts[path] = c
+        return self._counts[path][s]
+
+    def focus_nodes(self, shape: CompiledShape) -> Set[Node]:
+        out: Set[Node] = set()
+        for t, v in shape.targets:
+            if t == SH.targetClass:
+                out |= self.instances(v)
+            elif t == SH.targetNode:
+                out.add(v)
+            elif t == SH.targetSubjectsOf:
+                out.update(self.g.subjects(v, None))
+            elif t == SH.targetObjectsOf:
+                out.update(self.g.objects(None, v))
+        return out
+
+
+# ---------- validation ----------
+
+def _datatype_ok(v, dt) -> bool:
+    if not isinstance(v, Literal) or getattr(v, "ill_typed", False):
+        return False
+    if v.datatype is not None:
+        return v.datatype == dt
+    if v.language:
+        return dt == RDF.langString
+    return dt == XSD.string
+
+
+def check_focus(idx: GraphIndex, shape: CompiledShape, focus, sg: Graph) -> List[Result]:
+    out = []
+    for c in shape.checks:
+        n = None
+        if c.min_count is not None or c.max_count is not None:
+            n = idx.count(focus, c.path)
+        if c.min_count is not None and n < c.min_count:
+            msg = c.message or f"Less than {c.min_count} values on {_fmt(idx.g, focus)}->{_fmt(sg, c.path)}"
+            out.append(Result(focus, c.path, COMPONENT[SH.minCount], c.node, c.severity, None, msg))
+        if c.max_count is not None and n > c.max_count:
+            msg = c.message or f"More than {c.max_count} values on {_fmt(idx.g, focus)}->{_fmt(sg, c.path)}"
+            out.append(Result(focus, c.path, COMPONENT[SH.maxCount], c.node, c.severity, None, msg))
+        if c.cls is not None or c.datatype is not None:
+            members = idx.instances(c.cls) if c.cls is not None else None
+            for v in idx.values(focus, c.path):
+                if members is not None and v not in members:
+                    msg = c.message or f"Value does not have class {_fmt(sg, c.cls)}"
+                    out.append(Result(focus, c.path, COMPONENT[SH["class"]], c.node, c.severity, v, msg))
+                if c.datatype is not None and not _datatype_ok(v, c.datatype):
+                    msg = c.message or f"Value is not Literal with datatype {_fmt(sg, c.datatype)}"
+                    out.append(Result(focus, c.path, COMPONENT[SH.datatype], c.node, c.severity, v, msg))
+    return out
+
+
+def run_compiled(idx: GraphIndex, shapes: List[CompiledShape], sg: Graph,
+                 focus_nodes: Optional[Iterable[Node]] = None,
+                 abort_on_first: bool = False) -> List[Result]:
+    """Validate compiled shapes; restrict to focus_nodes when given."""
+    only = set(focus_nodes) if focus_nodes is not None else None
+    results: List[Result] = []
+    for shape in shapes:
+        nodes = idx.focus_nodes(shape)
+        if only is not None:
+            nodes &= only
+        for f in sorted(nodes, key=str):
+            results.extend(check_focus(idx, shape, f, sg))
+            if abort_on_first and results:
+                return results
+    return results
+
+
+# ---------- report (pyshacl-compatible text and graph) ----------
+
+try:
+    from pyshacl.rdfutil import stringify_node as _stringify
+except ImportError:  # pragma: no cover - pyshacl is optional for the fast path
+    _stringify = None
+
+
+def _fmt(g: Graph, node) -> str:
+    if _stringify is not None:
+        return _stringify(g, node)
+    if isinstance(node, Literal):
+        if node.datatype is not None:
+            return f'Literal("{node}", datatype={node.datatype.n3(g.namespace_manager)})'
+        return f'Literal("{node}", lang={node.language})' if node.language else f'Literal("{node}")'
+    if isinstance(node, BNode):
+        parts = sorted(f"{_fmt(g, p)} {_fmt(g, o)}" for p, o in g.predicate_objects(node))
+        return "[ " + " ; ".join(parts) + " ]"
+    return node.n3(g.namespace_manager)
+
+
+def describe_result(r: Result, data: Graph, sg: Graph) -> str:
+    kind = "Constraint Violation" if r.severity == SH.Violation else "Validation Result"
+    name = str(r.component).split("#")[-1]
+    d = (f"{kind} in {name} ({r.component}):\n\tSeverity: {_fmt(sg, r.severity)}\n"
+         f"\tSource Shape: {_fmt(sg, r.source_shape)}\n\tFocus Node: {_fmt(data, r.focus)}\n")
+    if r.value is not None:
+        d += f"\tValue Node: {_fmt(data, r.value)}\n"
+    d += f"\tResult Path: {_fmt(sg, r.path)}\n\tMessage: {r.message}\n"
+    return d
+
+
+def _copy_cbd(src: Graph, node, dest: Graph) -> None:
+    stack, seen = [node], set()
+    while stack:
+        n = stack.pop()
+        if n in seen:
+            continue
+        seen.add(n)
+        for p, o in src.predicate_objects(n):
+            dest.add((n, p, o))
+            if isinstance(o, BNode):
+                stack.append(o)
+
+
+def build_report(results: List[Result], data: Graph, sg: Graph,
+                 extra: Optional[Tuple[Graph, List[str]]] = None) -> Tuple[bool, Graph, str]:
+    """
+    pyshacl-style (conforms, results_graph, results_text). extra = (results graph,
+    description blocks) from a pyshacl fallback run, merged into the same report.
+    """
+    extra_graph, extra_descs = extra or (None, [])
+    n = len(results) + len(extra_descs)
+    conforms = n == 0
+    vg = Graph(bind_namespaces="core")
+    for p, ns in sg.namespace_manager.namespaces():
+        vg.namespace_manager.bind(p, ns)
+    report = BNode()
+    vg.add((report, RDF.type, SH.ValidationReport))
+    vg.add((report, SH.conforms, Literal(conforms)))
+    for r in results:
+        rn = BNode()
+        vg.add((report, SH.result, rn))
+        vg.add((rn, RDF.type, SH.ValidationResult))
+        vg.add((rn, SH.focusNode, r.focus))
+        vg.add((rn, SH.resultPath, r.path))
+        vg.add((rn, SH.resultSeverity, r.severity))
+        vg.add((rn, SH.sourceConstraintComponent, r.component))
+        vg.add((rn, SH.sourceShape, r.source_shape))
+        vg.add((rn, SH.resultMessage, Literal(r.message)))
+        if r.value is not None:
+            vg.add((rn, SH.value, r.value))
+    for shape in {r.source_shape for r in results}:
+        if isinstance(shape, BNode):
+            _copy_cbd(sg, shape, vg)
+    if extra_graph is not None:
+        for rep in extra_graph.subjects(RDF.type, SH.ValidationReport):
+            for rn in extra_graph.objects(rep, SH.result):
+                vg.add((report, SH.result, rn))
+                _copy_cbd(extra_graph, rn, vg)
+
+    text = f"Validation Report\nConforms: {conforms}\n"
+    if n:
+        text += f"Results ({n}):\n"
+        text += "".join(sorted([describe_result(r, data, sg) for r in results] + list(extra_descs)))
+    return conforms, vg, text
+
+
+def split_descriptions(text: str) -> List[str]:
+    """Result blocks of a pyshacl results_text."""
+    blocks, cur = [], []
+    for line in text.splitlines(keepends=True)[2:]:
+        if line.startswith("Results ("):
+            continue
+        if not line.startswith("\t") and cur:
+            blocks.append("".join(cur)); cur = []
+        cur.append(line)
+    if cur:
+        blocks.append("".join(cur))
+    return blocks
+
+
+def run_pyshacl(data, sg, ont, inference, abort_on_first, shapes=None, focus_nodes=None):
+    from pyshacl import validate as py_validate
+    kw = {}
+    if shapes is not None:
+        kw["use_shapes"] = list(shapes)
+    if focus_nodes is not None:
+        kw["focus_nodes"] = list(focus_nodes)
+    return py_validate(data, shacl_graph=sg, ont_graph=ont, inference=inference,
+                       abort_on_first=abort_on_first, **kw)
+
+
+def validate(data_graph: Graph, shacl_graph: Graph, ont_graph: Optional[Graph] = None,
+             inference: Optional[str] = "rdfs", abort_on_first: bool = False,
+             focus_nodes: Optional[Iterable[Node]] = None) -> Tuple[bool, Graph, str]:
+    """Drop-in for pyshacl.validate() on the constructs listed in the module docstring."""
+    if inference not in (None, "none", "rdfs"):
+        # owlrl / both: entailments beyond RDFS are not modelled here
+        return run_pyshacl(data_graph, shacl_graph, ont_graph, inference, abort_on_first, focus_nodes=focus_nodes)
+    compiled, fallback = compile_shapes(shacl_graph)
+    if any(isinstance(n, BNode) for n in fallback):
+        return run_pyshacl(data_graph, shacl_graph, ont_graph, inference, abort_on_first, focus_nodes=focus_nodes)
+
+    focus = list(focus_nodes) if focus_nodes is not None else None
+    idx = GraphIndex(data_graph, ont_graph, rdfs=(inference == "rdfs"))
+    results = run_compiled(idx, compiled, shacl_graph, focus, abort_on_first)
+
+    extra = None
+    if fallback and not (abort_on_first and results):
+        _, fg, ftext = run_pyshacl(data_graph, shacl_graph, ont_graph, inference, abort_on_first,
+                                shapes=fallback, focus_nodes=focus)
+        extra = (fg, split_descriptions(ftext))
+    return build_report(results, data_graph, shacl_graph, extra)
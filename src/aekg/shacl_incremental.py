@@ -0,0 +1,213 @@
+"""
+Incremental SHACL validation on top of aekg.shacl_fast.
+
+State lives in one directory (default reports/shacl/):
+
+    last_validated.nt   the graph the stored report describes
+    report.json         {"shapes_sha256", "data_sha256", "results": [...]} one
+                        entry per result
+    report.txt          pyshacl-style text of the merged report
+
+When the caller passes the sha256 of the data file and it matches the stored
+one (same shapes and inference), the stored report is returned as is: an
+unchanged graph is neither serialized nor indexed. stored_report() makes the
+same check before the graph is even parsed.
+
+Given a triple delta (added / removed), only focus nodes the delta can affect
+are re-checked against the compiled shapes:
+
+    - subjects and IRI objects of every changed triple (their values, their
+      rdf:type, and domain/range typing all hang off these nodes)
+    - nodes that reach a changed node through the path of an sh:class
+      constraint (the value's class membership may have changed)
+
+Their old results are dropped and replaced; every other stored result is kept.
+A delta touching rdfs:subClassOf / subPropertyOf / domain / range, a changed
+shapes file or a missing state falls back to a full run. So does a delta with
+a blank node in it: blank-node labels are not stable across parses, so such a
+line does not identify a node of the current graph (a graph with blank nodes
+that is re-read from disk is therefore always validated in full). Shapes that pyshacl
+handles (see shacl_fast) are re-run in full on every non-empty delta, because
+their dependencies are not local (with an unnamed one among them, all shapes are).
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from rdflib import BNode, Graph, Literal
+from rdflib.namespace import RDFS
+from rdflib.term import Node
+
+from aekg.shacl_fast import (GraphIndex, compile_shapes, describe_result, run_compiled,
+                             run_pyshacl, split_descriptions)
+
+DEFAULT_STATE = Path("reports/shacl")
+SCHEMA_PREDICATES = {RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range}
+
+Triple = Tuple[Node, Node, Node]
+
+
+def nt_lines(g: Graph) -> Set[str]:
+    data = g.serialize(format="nt", encoding="utf-8").decode("utf-8")
+    return {ln for ln in data.splitlines() if ln.strip()}
+
+
+def read_nt_lines(path: Path) -> Set[str]:
+    with open(path, encoding="utf-8") as f:
+        return {ln.rstrip("\n") for ln in f if ln.strip()}
+
+
+def graph_delta(old: Set[str], new: Set[str]) -> Tuple[Graph, Graph]:
+    """(added, removed) between two N-Triples line sets."""
+    added = Graph().parse(data="\n".join(new - old), format="nt")
+    removed = Graph().parse(data="\n".join(old - new), format="nt")
+    return added, removed
+
+
+def affected_focus_nodes(idx: GraphIndex, compiled, delta: Iterable[Triple]) -> Optional[Set[Node]]:
+    """Focus nodes whose compiled-shape results may change; None means 'revalidate everything'."""
+    touched: Set[Node] = set()
+    for s, p, o in delta:
+        if p in SCHEMA_PREDICATES or isinstance(s, BNode) or isinstance(o, BNode):
+            return None
+        touched.add(s)
+        if not isinstance(o, Literal):
+            touched.add(o)
+    affected = set(touched)
+    class_paths = {c.path for shape in compiled for c in shape.checks if c.cls is not None}
+    for path in class_paths:
+        for sp in idx.subprops[path]:
+            for n in touched:
+                affected.update(idx.g.subjects(sp, n))
+    return affected
+
+
+def _result_entry(r, data, sg) -> dict:
+    return {
+        "engine": "fast",
+        "focus": r.focus.n3(),
+        "path": r.path.n3(),
+        "component": str(r.component),
+        "severity": str(r.severity),
+        "value": r.value.n3() if r.value is not None else None,
+        "message": r.message,
+        "text": describe_result(r, data, sg),
+    }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def report_text(entries: List[dict]) -> Tuple[bool, str]:
+    conforms = not entries
+    text = f"Validation Report\nConforms: {conforms}\n"
+    if entries:
+        text += f"Results ({len(entries)}):\n" + "".join(sorted(e["text"] for e in entries))
+    return conforms, text
+
+
+def _load_report(state_dir: Path, shapes_sha256: str, inference: str) -> Optional[dict]:
+    """Stored report.json if it is usable for these shapes and inference."""
+    rep = state_dir / "report.json"
+    if not (rep.exists() and (state_dir / "last_validated.nt").exists()):
+        return None
+    try:
+        with open(rep, encoding="utf-8") as f:
+            prev = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if prev.get("shapes_sha256") != shapes_sha256 or prev.get("inference") != inference:
+        return None
+    return prev
+
+
+def stored_report(shapes_sha256: str, data_sha256: str, state_dir=DEFAULT_STATE,
+                  inference: str = "rdfs") -> Optional[Tuple[bool, str]]:
+    """(conforms, results_text) of the stored report if it describes exactly this data file, else None."""
+    state_dir = Path(state_dir)
+    prev = _load_report(state_dir, shapes_sha256, inference)
+    if prev is None or not data_sha256 or prev.get("data_sha256") != data_sha256:
+        return None
+    return report_text(prev["results"])
+
+
+def validate_incremental(
+    data: Graph,
+    sg: Graph,
+    shapes_sha256: str,
+    state_dir=DEFAULT_STATE,
+    added: Optional[Graph] = None,
+    removed: Optional[Graph] = None,
+    inference: str = "rdfs",
+    data_sha256: Optional[str] = None,
+) -> Tuple[bool, str, dict]:
+    """
+    Validate data, reusing the stored report where the delta allows it.
+    added/removed default to the diff against state_dir/last_validated.nt.
+    data_sha256 (of the file data was parsed from) is stored with the report;
+    when it matches the stored one nothing is re-checked or rewritten.
+    Returns (conforms, results_text, info) and persists the new state.
+    """
+    state_dir = Path(state_dir)
+    snap, rep = state_dir / "last_validated.nt", state_dir / "report.json"
+    prev = _load_report(state_dir, shapes_sha256, inference)
+    if prev is not None and data_sha256 and prev.get("data_sha256") == data_sha256:
+        conforms, text = report_text(prev["results"])
+        return conforms, text, {"mode": "unchanged", "added": 0, "removed": 0, "focus_checked": 0}
+
+    compiled, fallback = compile_shapes(sg)
+    if any(isinstance(n, BNode) for n in fallback):
+        compiled, fallback = [], None  # pyshacl must see the whole shapes graph
+    idx = GraphIndex(data, rdfs=(inference == "rdfs"))
+
+    affected = None
+    snapshot = None  # N-Triples lines of data, written back as the new last_validated.nt
+    info = {"mode": "full", "added": 0, "removed": 0, "focus_checked": None}
+    if prev is not None:
+        old = read_nt_lines(snap)
+        if added is None and removed is None:
+            snapshot = nt_lines(data)
+            added, removed = graph_delta(old, snapshot)
+        else:
+            # explicit delta: patch the stored snapshot instead of re-serializing data
+            added = added if added is not None else Graph()
+            removed = removed if removed is not None else Graph()
+            snapshot = (old - nt_lines(removed)) | nt_lines(added)
+        info.update(added=len(added), removed=len(removed))
+        affected = affected_focus_nodes(idx, compiled, list(added) + list(removed))
+        if affected is not None:
+            info["mode"] = "incremental"
+            info["focus_checked"] = len(affected)
+        else:
+            snapshot = None  # full run: store data as is (a patched snapshot may hold stale blank-node labels)
+
+    if affected is None:
+        entries = [_result_entry(r, data, sg) for r in run_compiled(idx, compiled, sg)]
+        rerun_fallback = True
+    else:
+        keys = {n.n3() for n in affected}
+        entries = [e for e in prev["results"] if e["engine"] == "fast" and e["focus"] not in keys]
+        entries += [_result_entry(r, data, sg) for r in run_compiled(idx, compiled, sg, affected)]
+        rerun_fallback = bool(info["added"] or info["removed"])
+        if not rerun_fallback:
+            entries += [e for e in prev["results"] if e["engine"] == "pyshacl"]
+
+    if fallback != [] and rerun_fallback:
+        _, _, ftext = run_pyshacl(data, sg, None, inference, False, shapes=fallback)
+        entries += [{"engine": "pyshacl", "text": t} for t in split_descriptions(ftext)]
+
+    conforms, text = report_text(entries)
+    _write_atomic(rep, json.dumps({"shapes_sha256": shapes_sha256, "data_sha256": data_sha256,
+                                   "inference": inference, "conforms": conforms, "results": entries}, indent=1))
+    _write_atomic(state_dir / "report.txt", text)
+    _write_atomic(snap, "\n".join(sorted(snapshot if snapshot is not None else nt_lines(data))) + "\n")
+    return conforms, text, info
+
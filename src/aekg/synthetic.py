@@ -0,0 +1,243 @@
+"""
+Synthetic, production-sized inputs for benchmarking the pipeline.
+
+generate(root, scale) writes a self-contained workspace that the scripts can
+run in (cwd=root) with the same relative paths as the repo:
+
+    data/interim/mappings/   drug_targets.csv, protein_gene.csv, gene_hpo.csv,
+                             drug_gene_pgx.csv, drug_target_actions.tsv,
+                             pt_synonyms.tsv (llt, pt), hpo_meddra_overrides.tsv,
+                             hpo_meddra_map.tsv (extended layout), pt_prior.csv
+    data/raw/hpo/hp.obo      is_a tree, synonyms, alt_id and obsolete terms
+    data/raw/sider/          meddra_all_se.tsv.gz (LLT + PT rows), drug_names.tsv
+    eval/gold/               simvastatin.txt, carbamazepine.txt
+    rdf/                     (empty, for build_graph)
+    synthetic.json           parameters and row counts
+
+Column layouts match the real files. The real anchors (CHEMBL1064 / CHEMBL108,
+HMGCR, SCN1A, SLCO1B1, HLA-B) are always present so run_eval_formal has work.
+HPO popularity in gene_hpo and PT frequency in SIDER are heavy-tailed, and a
+fraction of HPO labels are LLT strings, so build_hpo2pt_map sees realistic
+hit / miss / ambiguous ratios. Output is deterministic for a given seed.
+"""
+
+import csv
+import gzip
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny":   dict(drugs=50,     proteins=100,    genes=100,    gene_hpo=1_500,   hpo_terms=2_000,
+                   llts=800,     pts=300,     sider_drugs=40,    sider_rows=5_000),
+    "small":  dict(drugs=1_000,  proteins=2_000,  genes=1_900,  gene_hpo=30_000,  hpo_terms=8_000,
+                   llts=8_000,   pts=2_500,   sider_drugs=300,   sider_rows=60_000),
+    "medium": dict(drugs=3_000,  proteins=6_000,  genes=6_000,  gene_hpo=100_000, hpo_terms=12_000,
+                   llts=30_000,  pts=10_000,  sider_drugs=800,   sider_rows=150_000),
+    "large":  dict(drugs=10_000, proteins=20_000, genes=19_000, gene_hpo=300_000, hpo_terms=18_000,
+                   llts=80_000,  pts=24_000,  sider_drugs=1_500, sider_rows=310_000),
+}
+
+ANCHOR_DRUGS = [("CHEMBL1064", "simvastatin"), ("CHEMBL108", "carbamazepine")]
+ANCHOR_GENES = [("P04035", "HMGCR"), ("P35498", "SCN1A"), ("Q9Y6L6", "SLCO1B1"), ("P01889", "HLA-B")]
+ACTIONS = ["inhibitor", "antagonist", "agonist", "blocker", "modulator", "opener", "positive allosteric modulator"]
+
+_SYL = ["ab", "ac", "al", "an", "ar", "ba", "ca", "de", "di", "en", "er", "fa", "ga", "he", "hy", "ic",
+        "id", "in", "la", "le", "lo", "ma", "me", "mi", "my", "na", "ne", "no", "ob", "op", "os", "pa",
+        "pe", "ph", "ra", "re", "ro", "sa", "se", "si", "ta", "te", "th", "to", "tr", "ul", "ur", "va"]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYL) for _ in range(rng.randint(2, 4)))
+
+
+def _unique(rng, n, make, taken=()):
+    seen, out = set(taken), []
+    while len(out) < n:
+        v = make(rng)
+        if v not in seen:
+            seen.add(v)
+            out.append(v)
+    return out
+
+
+def _skewed(rng: random.Random, n: int, k: float = 2.0) -> int:
+    """Index in [0, n), low indices more popular (k=1 is uniform; at k=2 the top 1% get ~10% of draws)."""
+    return int(n * rng.random() ** k)
+
+
+def _write_csv(path: Path, header, rows, delimiter=",") -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=delimiter)
+        w.writerow(header)
+        for r in rows:
+            w.writerow(r)
+            n += 1
+    return n
+
+
+def generate(root, scale="small", seed: int = 4003, **overrides) -> dict:
+    """Write the synthetic workspace under root; returns the synthetic.json content."""
+    params = dict(SCALES[scale], **overrides)
+    rng = random.Random(seed)
+    root = Path(root)
+    mp = root / "data/interim/mappings"
+    counts: Dict[str, int] = {}
+
+    # ---------- IDs ----------
+    drugs = [d for d, _ in ANCHOR_DRUGS] + _unique(
+        rng, params["drugs"] - len(ANCHOR_DRUGS), lambda r: f"CHEMBL{r.randint(200, 5_000_000)}",
+        {d for d, _ in ANCHOR_DRUGS})
+    prot_anchor = [p for p, _ in ANCHOR_GENES]
+    proteins = prot_anchor + _unique(
+        rng, params["proteins"] - len(prot_anchor),
+        lambda r: r.choice("ABCDEFGHIJKLMNRSTUVWXYZ") + f"{r.randint(0, 99999):05d}", prot_anchor)
+    gene_anchor = [g for _, g in ANCHOR_GENES]
+    genes = gene_anchor + _unique(
+        rng, params["genes"] - len(gene_anchor),
+        lambda r: "".join(r.choice("ABCDEFGHIKLMNPRSTVWXYZ") for _ in range(r.randint(3, 5))) + str(r.randint(1, 30)),
+        gene_anchor)
+    hpos = [f"HP:{i:07d}" for i in rng.sample(range(1, 3_999_999), params["hpo_terms"])]
+
+    # ---------- MedDRA side: PTs and LLTs ----------
+    pts = _unique(rng, params["pts"], lambda r: " ".join(_word(r) for _ in range(r.randint(1, 3))).capitalize())
+    llt_rows = [(pt.lower(), pt) for pt in pts]
+    llt_rows += [(t, rng.choice(pts)) for t in _unique(
+        rng, max(0, params["llts"] - len(pts)), lambda r: " ".join(_word(r) for _ in range(r.randint(1, 4))),
+        {pt.lower() for pt in pts})]
+    counts["pt_synonyms"] = _write_csv(mp / "pt_synonyms.tsv", ["llt", "pt"], llt_rows, "\t")
+
+    # ---------- hp.obo ----------
+    labels: Dict[str, str] = {}
+    obo = root / "data/raw/hpo/hp.obo"
+    obo.parent.mkdir(parents=True, exist_ok=True)
+    with open(obo, "w", encoding="utf-8") as f:
+        f.write("format-version: 1.2\ndata-version: hp/synthetic\nontology: hp\n\n")
+        for i, h in enumerate(hpos):
+            if rng.random() < 0.6:
+                labels[h] = rng.choice(llt_rows)[0].capitalize()      # mappable through an LLT
+            else:
+                labels[h] = " ".join(_word(rng) for _ in range(rng.randint(2, 4))).capitalize()
+            f.write(f"[Term]\nid: {h}\nname: {labels[h]}\n")
+            if rng.random() < 0.05:
+                f.write(f"alt_id: HP:{rng.randint(4_000_000, 9_999_999):07d}\n")
+            for _ in range(rng.choice((0, 0, 1, 2))):
+                syn = rng.choice(llt_rows)[0] if rng.random() < 0.3 else _word(rng) + " " + _word(rng)
+                f.write(f'synonym: "{syn}" EXACT []\n')
+            if i:
+                parent = hpos[rng.randrange(max(1, i // 2), i) if i > 1 else 0]
+                f.write(f"is_a: {parent} ! {labels[parent]}\n")
+            f.write("\n")
+        for h in rng.sample(hpos, max(1, len(hpos) // 200)):          # obsolete terms pointing at live ones
+            f.write(f"[Term]\nid: HP:{rng.randint(4_000_000, 9_999_999):07d}\nname: obsolete {labels[h]}\n"
+                    f"is_obsolete: true\nreplaced_by: {h}\n\n")
+    counts["hpo_terms"] = len(hpos)
+
+    # ---------- mapping tables ----------
+    dt = {(d, p) for d, p in zip([d for d, _ in ANCHOR_DRUGS], prot_anchor)}
+    for d in drugs:
+        for _ in range(1 + min(8, int(rng.expovariate(0.7)))):
+            dt.add((d, proteins[_skewed(rng, len(proteins), 1.5)]))
+    dt = sorted(dt)
+    counts["drug_targets"] = _write_csv(mp / "drug_targets.csv", ["drug_id", "protein_id"], dt)
+    counts["drug_target_actions"] = _write_csv(
+        mp / "drug_target_actions.tsv", ["drug_id", "protein_id", "action"],
+        ((d, p, rng.choice(ACTIONS)) for d, p in dt), "\t")
+
+    pg = list(ANCHOR_GENES)
+    free_genes = genes[len(gene_anchor):]
+    for i, p in enumerate(proteins[len(prot_anchor):]):
+        pg.append((p, free_genes[i % len(free_genes)] if i < len(free_genes) else rng.choice(genes)))
+    counts["protein_gene"] = _write_csv(mp / "protein_gene.csv", ["protein_id", "gene_id"], pg)
+
+    gh = set()
+    while len(gh) < params["gene_hpo"]:
+        gh.add((genes[_skewed(rng, len(genes), 2.0)], hpos[_skewed(rng, len(hpos), 2.0)]))
+    counts["gene_hpo"] = _write_csv(mp / "gene_hpo.csv", ["gene_id", "hpo_id"], sorted(gh))
+
+    pgx = [("CHEMBL1064", "SLCO1B1", "1.0", "simvastatin myopathy risk"),
+           ("CHEMBL108", "HLA-B", "1.0", "carbamazepine SJS/TEN risk")]
+    for d in rng.sample(drugs[2:], max(1, len(drugs) // 20)):
+        for g in rng.sample(genes, rng.randint(1, 3)):
+            pgx.append((d, g, rng.choice(("1.0", "0.5", "0.8", "0.3")), "synthetic"))
+    counts["drug_gene_pgx"] = _write_csv(mp / "drug_gene_pgx.csv", ["drug_id", "gene_id", "cpic_weight", "note"], pgx)
+
+    # hpo_meddra_map.tsv as build_hpo2pt_map writes it (exact label match only)
+    llt2pts: Dict[str, set] = {}
+    for llt, pt in llt_rows:
+        llt2pts.setdefault(llt, set()).add(pt)
+    used = sorted({h for _, h in gh})
+    map_rows = []
+    for h in used:
+        cands = sorted(llt2pts.get(labels[h].lower(), ()))
+        chosen = cands[0] if len(cands) == 1 else ""
+        method = "unique_auto_match" if len(cands) == 1 else ("ambiguous" if cands else "no_match")
+        map_rows.append((h, labels[h], chosen, chosen, method, len(cands), "|".join(cands), "|".join(cands)))
+    counts["hpo_meddra_map"] = _write_csv(
+        mp / "hpo_meddra_map.tsv",
+        ["hpo_id", "hpo_strings", "pt_code", "pt_name", "method", "n_candidates",
+         "candidate_pt_codes", "candidate_pt_names"], map_rows, "\t")
+    counts["hpo_meddra_overrides"] = _write_csv(
+        mp / "hpo_meddra_overrides.tsv", ["hpo_id", "meddra_pt"],
+        ((h, rng.choice(pts)) for h in rng.sample(used, min(len(used), 30))), "\t")
+
+    # ---------- SIDER ----------
+    sider = root / "data/raw/sider"
+    sider.mkdir(parents=True, exist_ok=True)
+    stitch = [f"CID1{rng.randint(0, 99_999_999):08d}" for _ in range(params["sider_drugs"])]
+    names = [n for _, n in ANCHOR_DRUGS] + _unique(rng, len(stitch) - len(ANCHOR_DRUGS), _word,
+                                                    {n for _, n in ANCHOR_DRUGS})
+    with open(sider / "drug_names.tsv", "w", encoding="utf-8") as f:
+        for cid, n in zip(stitch, names):
+            f.write(f"{cid}\t{n}\n")
+    counts["drug_names"] = len(stitch)
+    pt_freq: Dict[str, int] = {}
+    gold: Dict[str, set] = {n: set() for _, n in ANCHOR_DRUGS}
+    n_rows = 0
+    with gzip.open(sider / "meddra_all_se.tsv.gz", "wt", encoding="utf-8", compresslevel=1) as f:
+        while n_rows < params["sider_rows"]:
+            i = rng.randrange(len(stitch))
+            llt, pt = llt_rows[_skewed(rng, len(llt_rows), 2.5)]
+            umls = f"C{rng.randint(0, 9_999_999):07d}"
+            flat = stitch[i].replace("CID1", "CID0")
+            f.write(f"{flat}\t{stitch[i]}\t{umls}\tLLT\t{umls}\t{llt}\n")
+            f.write(f"{flat}\t{stitch[i]}\t{umls}\tPT\t{umls}\t{pt}\n")
+            n_rows += 2
+            pt_freq[pt] = pt_freq.get(pt, 0) + 1
+            if names[i] in gold:
+                gold[names[i]].add(pt)
+    counts["sider_rows"] = n_rows
+
+    mx = max(math.log1p(c) for c in pt_freq.values())
+    counts["pt_prior"] = _write_csv(
+        mp / "pt_prior.csv", ["meddra_pt", "prior"],
+        ((pt, round(math.log1p(c) / mx, 6)) for pt, c in sorted(pt_freq.items(), key=lambda kv: -kv[1])))
+
+    # ---------- gold + dirs ----------
+    (root / "eval/gold").mkdir(parents=True, exist_ok=True)
+    for n, terms in gold.items():
+        (root / "eval/gold" / f"{n}.txt").write_text("".join(t + "\n" for t in sorted(terms)), encoding="utf-8")
+    (root / "rdf").mkdir(exist_ok=True)
+
+    meta = {"scale": scale, "seed": seed, "params": params, "counts": counts}
+    (root / "synthetic.json").write_text(json.dumps(meta, indent=1), encoding="utf-8")
+    return meta
+
+
+def load_meta(root) -> dict:
+    try:
+        return json.loads((Path(root) / "synthetic.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def ensure(root, scale="small", seed: int = 4003) -> dict:
+    """generate() unless root already holds this scale and seed."""
+    meta = load_meta(root)
+    if meta.get("scale") == scale and meta.get("seed") == seed and meta.get("params") == SCALES[scale]:
+        return meta
+    return generate(root, scale, seed)
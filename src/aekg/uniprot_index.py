@@ -0,0 +1,189 @@
+"""
+Offline UniProt accession -> gene symbol index (one SQLite file).
+
+Built once from the bulk UniProt mapping files listed in configs/raw_sources.yml:
+
+- idmapping_selected.tab(.gz): col 1 = UniProtKB-AC, col 3 = GeneID (Entrez,
+  "; "-separated). Entrez IDs are turned into symbols with HGNC's
+  hgnc_complete_set.txt (entrez_id -> symbol), whose uniprot_ids column is
+  also indexed directly.
+- idmapping.dat(.gz) is accepted as well: rows "<AC>\tGene_Name\t<symbol>".
+
+idmapping_selected.tab has no gene-symbol column, so it needs the HGNC file;
+build_index() raises ValueError when that file is missing or when nothing
+could be mapped (the previous index is then left in place), and
+FileNotFoundError when the id mapping file itself is missing.
+
+Lookups are batched primary-key queries, so resolving tens of thousands of
+accessions is a few SQL round trips:
+
+    idx = UniProtIndex("data/interim/uniprot/acc2gene.sqlite")
+    genes = idx.lookup(["P04035", "P35498"])   # {"P04035": "HMGCR", ...}
+"""
+
+import csv
+import gzip
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_INDEX = Path("data/interim/uniprot/acc2gene.sqlite")
+
+_BATCH = 500  # stays under SQLite's host-parameter limit
+
+
+def _open_text(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace", buffering=1 << 20)
+
+
+def _base_accession(acc: str) -> str:
+    """'P04035-2' (isoform) -> 'P04035'."""
+    acc = acc.strip()
+    cut = acc.find("-")
+    return acc if cut < 0 else acc[:cut]
+
+
+def load_hgnc(hgnc_path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Return (entrez_id -> symbol, uniprot_ac -> symbol) from hgnc_complete_set.txt."""
+    entrez: Dict[str, str] = {}
+    uniprot: Dict[str, str] = {}
+    with _open_text(hgnc_path) as f:
+        for r in csv.DictReader(f, delimiter="\t"):
+            sym = (r.get("symbol") or "").strip().upper()
+            if not sym:
+                continue
+            eid = (r.get("entrez_id") or "").strip()
+            if eid:
+                entrez[eid] = sym
+            for acc in (r.get("uniprot_ids") or "").replace('"', "").split("|"):
+                acc = acc.strip()
+                if acc:
+                    uniprot[acc] = sym
+    return entrez, uniprot
+
+
+def _is_dat_layout(path) -> bool:
+    """True for idmapping.dat (three columns: AC, id type, id), False for idmapping_selected.tab."""
+    with _open_text(path) as f:
+        for line in f:
+            if line.strip():
+                return line.rstrip("\n").count("\t") == 2
+    return False
+
+
+def _iter_idmapping(path, entrez: Dict[str, str]) -> Iterator[Tuple[str, str]]:
+    """Yield (accession, symbol) from idmapping_selected.tab or idmapping.dat."""
+    with _open_text(path) as f:
+        for line in f:
+            parts = line.split("\t", 3)
+            if len(parts) < 3:
+                continue
+            if parts[1] == "Gene_Name":  # idmapping.dat layout
+                sym = parts[2].strip()
+                if sym:
+                    yield parts[0], sym.upper()
+                continue
+            gene_ids = parts[2]
+            if not gene_ids or not entrez:
+                continue
+            for gid in gene_ids.split(";"):
+                sym = entrez.get(gid.strip())
+                if sym:
+                    yield parts[0], sym
+                    break
+
+
+def build_index(
+    idmapping_path,
+    db_path=DEFAULT_INDEX,
+    hgnc_path=None,
+) -> int:
+    """(Re)build the SQLite index; returns the number of accessions stored."""
+    idmapping_path, db_path = Path(idmapping_path), Path(db_path)
+    if not idmapping_path.exists():
+        raise FileNotFoundError(f"UniProt id mapping file not found: {idmapping_path}")
+
+    entrez: Dict[str, str] = {}
+    hgnc_uniprot: Dict[str, str] = {}
+    if hgnc_path and Path(hgnc_path).exists():
+        entrez, hgnc_uniprot = load_hgnc(hgnc_path)
+    if not entrez and not _is_dat_layout(idmapping_path):
+        why = f"{hgnc_path} does not exist" if hgnc_path else "no HGNC file was given"
+        raise ValueError(
+            f"{idmapping_path.name} maps accessions to Entrez GeneIDs only and {why}; "
+            "hgnc_complete_set.txt is needed to turn them into gene symbols "
+            "(or build from idmapping.dat, which has Gene_Name rows)")
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = db_path.with_suffix(db_path.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    con = sqlite3.connect(tmp)
+    con.executescript(
+        """
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE acc_gene (accession TEXT PRIMARY KEY, gene TEXT NOT NULL) WITHOUT ROWID;
+        """
+    )
+    # HGNC's curated uniprot_ids win; bulk rows only fill accessions HGNC does not list
+    con.executemany("INSERT INTO acc_gene VALUES (?, ?)", hgnc_uniprot.items())
+    batch = []
+    for row in _iter_idmapping(idmapping_path, entrez):
+        batch.append(row)
+        if len(batch) >= 100_000:
+            con.executemany("INSERT OR IGNORE INTO acc_gene VALUES (?, ?)", batch)
+            batch.clear()
+    if batch:
+        con.executemany("INSERT OR IGNORE INTO acc_gene VALUES (?, ?)", batch)
+    con.commit()
+    (n,) = con.execute("SELECT COUNT(*) FROM acc_gene").fetchone()
+    con.close()
+    if not n:
+        tmp.unlink()
+        raise ValueError(f"no accession -> gene rows could be read from {idmapping_path}")
+    tmp.replace(db_path)
+    return n
+
+
+class UniProtIndex:
+    """Read-only view over an index written by build_index()."""
+
+    def __init__(self, db_path=DEFAULT_INDEX):
+        self.db_path = Path(db_path)
+        self._con: Optional[sqlite3.Connection] = None
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            self._con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return self._con
+
+    def lookup(self, accessions: Iterable[str]) -> Dict[str, str]:
+        """Return {accession: gene} for every accession found (isoforms fall back to the base AC)."""
+        wanted = {a.strip(): _base_accession(a) for a in accessions if a and a.strip()}
+        if not wanted or not self.exists():
+            return {}
+        keys = sorted(set(wanted) | set(wanted.values()))
+        found: Dict[str, str] = {}
+        con = self._connect()
+        for i in range(0, len(keys), _BATCH):
+            chunk = keys[i:i + _BATCH]
+            q = "SELECT accession, gene FROM acc_gene WHERE accession IN (%s)" % ",".join("?" * len(chunk))
+            found.update(con.execute(q, chunk))
+        out: Dict[str, str] = {}
+        for acc, base in wanted.items():
+            gene = found.get(acc) or found.get(base)
+            if gene:
+                out[acc] = gene
+        return out
+
+    def close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
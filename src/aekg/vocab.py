@@ -0,0 +1,377 @@
+"""
+Interned identifiers: every drug, protein, gene and PT string becomes a small
+int once, and rankers/eval work on int arrays instead of dicts of string sets.
+
+    hpo_int("HP:0001234") -> 1234          hpo_str(1234) -> "HP:0001234"
+    vocab("gene").code(" hla-a ") -> 17    vocab("gene").value(17) -> "HLA-A"
+
+HPO ids need no table: the integer part is the id. Other kinds are backed by
+data/interim/vocab/<kind>.txt, one value per line, line number = code. The
+files are append-only, so a code keeps its meaning across runs and across
+mapping rebuilds; values new to a process get final codes when save() merges
+them into the file (save() takes a lock file, so parallel stages can share the
+vocabulary). Normalization is mapstore.normalize(), applied once at intern
+time; PT codes are shared case-insensitively and keep the first spelling seen.
+
+encoded() returns the ranking tables as CSR int arrays (numpy), memoized per
+process like aekg.mappings and built from the same normalized rows:
+
+    E = encoded()
+    for d in E.drugs:                       # drug codes, sorted by drug id
+        genes = E.protein_gene.rows(E.drug_protein.row(d))
+        hpos = E.gene_hpo.rows(genes)        # dense HPO positions; E.hpo_ids[pos] is the int id
+
+A gene -> HPO edge is one int32 (plus 4 bytes of indptr per gene) instead of a
+set entry holding a string, which is what lets gene_hpo grow to the full
+annotation set.
+"""
+
+import os
+import re
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from aekg import mappings
+from aekg.mapstore import DEFAULT_DB, MAPPINGS_DIR, TABLES, normalize
+
+VOCAB_DIR = Path("data/interim/vocab")
+KINDS = ("drug", "protein", "gene", "pt")
+
+_HPO = re.compile(r"^HP:?(\d+)$")
+
+
+def hpo_int(value: str) -> int:
+    """Integer part of an HPO id ('HP:0001234', 'hp:1234', '0001234'); -1 if it is not one."""
+    v = normalize("hpo", value)
+    m = _HPO.match(v)
+    if m:
+        return int(m.group(1))
+    return int(v) if v.isdigit() else -1
+
+
+def hpo_str(i: int) -> str:
+    return f"HP:{int(i):07d}"
+
+
+def _hpo_int_normalized(v: str) -> int:
+    return int(v[3:]) if v[:3] == "HP:" and v[3:].isdigit() else hpo_int(v)
+
+
+class Vocab:
+    """Append-only string <-> int table for one identifier kind."""
+
+    def __init__(self, kind: str, path=None):
+        if kind not in KINDS:
+            raise ValueError(f"unknown vocabulary kind {kind!r}; one of {', '.join(KINDS)}")
+        self.kind = kind
+        self.path = Path(path) if path else VOCAB_DIR / f"{kind}.txt"
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._saved = 0
+        self._lock = threading.Lock()
+        self._extend(self._read())
+        self._saved = len(self.values)
+
+    def _key(self, value: str) -> str:
+        return value.casefold() if self.kind == "pt" else value
+
+    def _read(self) -> List[str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return [line.rstrip("\n") for line in f]
+        except FileNotFoundError:
+            return []
+
+    def _extend(self, values: Iterable[str]) -> None:
+        for v in values:
+            k = self._key(v)
+            if k not in self._codes:
+                self._codes[k] = len(self.values)
+                self.values.append(v)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str, add: bool = True) -> int:
+        """Code of the normalized value; -1 for an empty value, or an unknown one with add=False."""
+        return self.intern(normalize(self.kind, value), add)
+
+    def intern(self, v: str, add: bool = True) -> int:
+        """code() for a value that is already normalized (rows from aekg.mappings are)."""
+        if not v:
+            return -1
+        k = self._key(v)
+        c = self._codes.get(k)
+        if c is None and add:
+            with self._lock:
+                c = self._codes.get(k)
+                if c is None:
+                    c = self._codes[k] = len(self.values)
+                    self.values.append(v)
+        return -1 if c is None else c
+
+    def value(self, code: int) -> str:
+        return self.values[code]
+
+    def save(self) -> Dict[int, int]:
+        """
+        Append this process's new values to the file. If another process
+        extended the file since it was read, its values keep their codes and
+        ours move after them; the returned {old: new} code map (empty when
+        nothing moved) says how to fix codes handed out before save().
+        """
+        if self._saved == len(self.values):
+            return {}
+        remap: Dict[int, int] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.path.with_name(self.path.name + ".lock")):
+            on_disk = self._read()
+            if on_disk[:self._saved] != self.values[:self._saved]:
+                raise RuntimeError(f"{self.path} was rewritten while in use; vocabulary files are append-only")
+            if len(on_disk) > self._saved:
+                ours = self.values[self._saved:]
+                self.values, self._codes = [], {}
+                self._extend(on_disk)
+                self._extend(ours)
+                remap = {self._saved + i: self._codes[self._key(v)] for i, v in enumerate(ours)}
+            with open(self.path, "a", encoding="utf-8", newline="\n") as f:
+                f.writelines(v + "\n" for v in self.values[len(on_disk):])
+            self._saved = len(self.values)
+        return remap
+
+
+class _file_lock:
+    """Exclusive lock file (O_EXCL works on every platform); stale after `stale` seconds."""
+
+    def __init__(self, path: Path, stale: float = 60.0):
+        self.path, self.stale = path, stale
+
+    def __enter__(self):
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(self.path).st_mtime > self.stale:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+_VOCABS: Dict[str, Vocab] = {}
+_VLOCK = threading.Lock()
+
+
+def vocab(kind: str) -> Vocab:
+    """Process-wide Vocab for kind (data/interim/vocab/<kind>.txt)."""
+    with _VLOCK:
+        v = _VOCABS.get(kind)
+        if v is None:
+            v = _VOCABS[kind] = Vocab(kind)
+        return v
+
+
+# ---------- int-array ranking tables ----------
+
+class CSR:
+    """
+    Adjacency of row codes 0..n-1 to int targets (optionally weighted), sorted
+    and deduplicated per row; with dedup=False every input pair is kept, in
+    input order within its row.
+    """
+
+    def __init__(self, indptr, indices, weights=None):
+        self.indptr, self.indices, self.weights = indptr, indices, weights
+
+    @classmethod
+    def from_pairs(cls, n_rows: int, src, dst, weights=None, dedup: bool = True) -> "CSR":
+        import numpy as np
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        ok = (src >= 0) & (dst >= 0)
+        src, dst = src[ok], dst[ok]
+        w = None if weights is None else np.asarray(weights, dtype=np.float64)[ok]
+        if dedup:
+            order = np.lexsort((dst, src))
+            src, dst = src[order], dst[order]
+            keep = np.ones(len(src), dtype=bool)
+            keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            if w is not None:
+                # 重复边取最大权重
+                w = np.maximum.reduceat(w[order], np.flatnonzero(keep)) if len(w) else w
+            src, dst = src[keep], dst[keep]
+        else:
+            order = np.argsort(src, kind="stable")
+            src, dst = src[order], dst[order]
+            w = None if w is None else w[order]
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, dst.astype(np.int32), w)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row(self, i: int):
+        if i < 0 or i >= self.n_rows:
+            return self.indices[:0]
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def row_weights(self, i: int):
+        if i < 0 or i >= self.n_rows:
+            return self.weights[:0]
+        return self.weights[self.indptr[i]:self.indptr[i + 1]]
+
+    def rows(self, codes):
+        """Concatenated targets of several rows (duplicates kept: one entry per edge)."""
+        import numpy as np
+        codes = np.asarray(codes, dtype=np.int64)
+        codes = codes[(codes >= 0) & (codes < self.n_rows)]
+        if not len(codes):
+            return self.indices[:0]
+        starts, ends = self.indptr[codes], self.indptr[codes + 1]
+        lens = ends - starts
+        # 每条边在 indices 里的位置 = 行起点 + 行内偏移
+        offs = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        return self.indices[offs]
+
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + (self.weights.nbytes if self.weights is not None else 0)
+
+
+class Encoded(NamedTuple):
+    drugs: "object"          # int32 drug codes that have a target, ordered by drug id
+    drug_protein: CSR        # drug code -> protein codes
+    protein_gene: CSR        # protein code -> gene codes
+    gene_hpo: CSR            # gene code -> dense HPO positions
+    hpo_ids: "object"        # dense HPO position -> HPO int (sorted ascending)
+    hpo_names: List[str]     # dense HPO position -> "HP:0001234"
+    hpo_pt: "object"         # dense HPO position -> PT code (meddra_pt column), -1 if unmapped
+    hpo_prior: "object"      # dense HPO position -> PT prior (0.0 if none)
+    drug_gene_pgx: CSR       # drug code -> gene codes in file order, duplicates kept; weights = cpic_weight (1.0 without the column)
+
+    def hpo_strs(self, positions) -> List[str]:
+        names = self.hpo_names
+        return [names[i] for i in positions.tolist()]
+
+
+_ENC: Dict[tuple, tuple] = {}
+
+
+def _stamp(paths) -> tuple:
+    return tuple(mappings._stat(p) for p in paths) + mappings._stat(DEFAULT_DB)
+
+
+def encoded(mappings_dir=None) -> Encoded:
+    """Ranking tables as int arrays; rebuilt only when one of the six mapping files changes."""
+    d = Path(mappings_dir) if mappings_dir else MAPPINGS_DIR
+    names = ("drug_targets", "protein_gene", "gene_hpo", "hpo_meddra_map", "pt_prior", "drug_gene_pgx")
+    paths = [d / TABLES[n].file for n in names]
+    key = tuple(map(str, paths))
+    stamp = _stamp(paths)
+    with _VLOCK:
+        hit = _ENC.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+    value = _build(*paths)
+    with _VLOCK:
+        _ENC[key] = (stamp, value)
+    return value
+
+
+def file_order(E: Encoded, mappings_dir=None):
+    """
+    E.drug_protein, E.protein_gene and E.gene_hpo with every file row kept, in
+    file order within each row. rule_r1_paths_plus_weights sums one weight per
+    path, so a repeated row is a second path and the order of the additions is
+    the order of the files.
+    """
+    import numpy as np
+    d = Path(mappings_dir) if mappings_dir else MAPPINGS_DIR
+    dt_drug, dt_prot = _columns("drug_targets", d / TABLES["drug_targets"].file, ("drug", "protein"))
+    pg_prot, pg_gene = _columns("protein_gene", d / TABLES["protein_gene"].file, ("protein", "gene"))
+    gh_gene, gh_hpo = _columns("gene_hpo", d / TABLES["gene_hpo"].file, ("gene", "hpo"))
+    pos = np.searchsorted(E.hpo_ids, gh_hpo).clip(0, max(len(E.hpo_ids) - 1, 0))
+    ok = (gh_hpo >= 0) & (E.hpo_ids[pos] == gh_hpo) if len(E.hpo_ids) else np.zeros(len(gh_hpo), dtype=bool)
+    return (CSR.from_pairs(len(vocab("drug")), dt_drug, dt_prot, dedup=False),
+            CSR.from_pairs(len(vocab("protein")), pg_prot, pg_gene, dedup=False),
+            CSR.from_pairs(len(vocab("gene")), gh_gene, np.where(ok, pos, -1), dedup=False))
+
+
+def _columns(table: str, path: Path, kinds, value_col: Optional[str] = None, key_cols=None) -> list:
+    """One streamed pass over a table: a code array per key column (plus a float array of value_col)."""
+    import numpy as np
+    enc = [_hpo_int_normalized if k == "hpo" else vocab(k).intern for k in kinds]
+    cols = [array("q") for _ in kinds]
+    vals = array("d")
+    for r in mappings.iter_rows(table, path, (value_col,) if value_col else (), key_cols):
+        for c, f, v in zip(cols, enc, r):
+            c.append(f(v) if v else -1)
+        if value_col:
+            vals.append(float("nan") if r[-1] is None else r[-1])
+    out = [np.array(c, dtype=np.int64) for c in cols]
+    if value_col:
+        out.append(np.array(vals, dtype=np.float64))
+    return out
+
+
+def _build(p_dt, p_pg, p_gh, p_map, p_prior, p_pgx) -> Encoded:
+    import numpy as np
+    dt_drug, dt_prot = _columns("drug_targets", p_dt, ("drug", "protein"))
+    pg_prot, pg_gene = _columns("protein_gene", p_pg, ("protein", "gene"))
+    gh_gene, gh_hpo = _columns("gene_hpo", p_gh, ("gene", "hpo"))
+    # 排序器一直只读 meddra_pt 列（pt_name 不参与 PT 先验）
+    hm_hpo, hm_pt = _columns("hpo_meddra_map", p_map, ("hpo", "pt"), key_cols=(None, ("meddra_pt",)))
+    pr_pt, pr_val = _columns("pt_prior", p_prior, ("pt",), "prior")
+    pgx = mappings.cpic_rows(p_pgx)
+    pgx_drug = np.array([vocab("drug").intern(d) for d, _, _ in pgx], dtype=np.int64)
+    pgx_gene = np.array([vocab("gene").intern(g) for _, g, _ in pgx], dtype=np.int64)
+    pgx_w = np.array([1.0 if w is None else w for _, _, w in pgx], dtype=np.float64)
+
+    # 词表落盘；若别的进程同时追加过，本进程新登记的编码会被挪后，这里把数组改过来
+    for kind, arrays in (("drug", (dt_drug, pgx_drug)), ("protein", (dt_prot, pg_prot)),
+                         ("gene", (pg_gene, gh_gene, pgx_gene)), ("pt", (hm_pt, pr_pt))):
+        remap = vocab(kind).save()
+        if remap:
+            lut = np.arange(len(vocab(kind)))
+            lut[list(remap)] = list(remap.values())
+            for a in arrays:
+                a[a >= 0] = lut[a[a >= 0]]
+    n = {k: len(vocab(k)) for k in KINDS}
+
+    drug_protein = CSR.from_pairs(n["drug"], dt_drug, dt_prot)
+    protein_gene = CSR.from_pairs(n["protein"], pg_prot, pg_gene)
+    hpo_ids = np.unique(gh_hpo[gh_hpo >= 0]).astype(np.int32)
+    gene_hpo = CSR.from_pairs(n["gene"], gh_gene, np.where(gh_hpo >= 0, np.searchsorted(hpo_ids, gh_hpo), -1))
+    del gh_gene, gh_hpo
+
+    prior_by_pt = np.zeros(n["pt"])
+    ok = (pr_pt >= 0) & ~np.isnan(pr_val)
+    prior_by_pt[pr_pt[ok]] = pr_val[ok]
+    hpo_pt = np.full(len(hpo_ids), -1, dtype=np.int32)
+    if len(hpo_ids):
+        j = np.searchsorted(hpo_ids, hm_hpo).clip(0, len(hpo_ids) - 1)
+        ok = (hm_hpo >= 0) & (hm_pt >= 0) & (hpo_ids[j] == hm_hpo)
+        hpo_pt[j[ok]] = hm_pt[ok]                  # 重复行后写的生效，同 mappings.hpo_pt
+    hpo_prior = np.where(hpo_pt >= 0, prior_by_pt[hpo_pt], 0.0)
+
+    # CPIC 行保持文件顺序、不去重：每行各加一次 β·w（同 rule_r1_with_cpic 的原实现）
+    drug_gene_pgx = CSR.from_pairs(n["drug"], pgx_drug, pgx_gene, pgx_w, dedup=False)
+
+    names = vocab("drug").values
+    with_target = np.flatnonzero(np.diff(drug_protein.indptr))
+    drugs = np.array(sorted(with_target.tolist(), key=names.__getitem__), dtype=np.int32)
+    return Encoded(drugs, drug_protein, protein_gene, gene_hpo, hpo_ids, [hpo_str(i) for i in hpo_ids.tolist()],
+                   hpo_pt, hpo_prior, drug_gene_pgx)
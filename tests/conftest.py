@@ -0,0 +1,55 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+class StubServer:
+    """
+    Local HTTP server for the fetch clients. routes maps a path (without the
+    query string) to handler(request) -> (status, headers, body); every request
+    is appended to log as (method, path with query, headers).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.log = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.log.append(("GET", self.path, dict(self.headers)))
+                route = stub.routes.get(self.path.split("?", 1)[0])
+                status, headers, body = route(self) if route else (404, {}, b"")
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def requests_to(self, path):
+        return [entry for entry in self.log if entry[1].split("?", 1)[0] == path]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
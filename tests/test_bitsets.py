@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from aekg.bitsets import MODES, GeneBitsets, SupportCounter, popcount
+from aekg.vocab import CSR
+
+
+def random_gene_hpo(rng, n_genes=300, n_hpo=80, edges=2000):
+    return CSR.from_pairs(n_genes, rng.integers(0, n_genes, edges), rng.integers(0, n_hpo, edges)), n_hpo
+
+
+def brute(gene_hpo, genes):
+    c = {}
+    for g in set(genes):
+        for h in gene_hpo.row(g).tolist():
+            c[h] = c.get(h, 0) + 1
+    return sorted(c.items())
+
+
+def test_popcount():
+    w = np.array([0, 1, 0xFF, (1 << 64) - 1, 0x8000000000000001], dtype=np.uint64)
+    assert popcount(w).tolist() == [0, 1, 8, 64, 2]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_modes_agree_with_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    gene_hpo, n_hpo = random_gene_hpo(rng)
+    counters = {m: SupportCounter(gene_hpo, n_hpo, m) for m in MODES}
+    # 1 gene, a few, duplicates, genes spread over every 64-gene word, out-of-range codes
+    for genes in ([5], [0, 63, 64, 299], rng.integers(0, 300, 40).tolist(), list(range(300)), [-1, 7, 7, 300]):
+        want = brute(gene_hpo, [g for g in genes if 0 <= g < 300])
+        for m, c in counters.items():
+            hpos, sup = c.supports(genes)
+            assert list(zip(hpos.tolist(), sup.tolist())) == want, m
+    assert counters["bitset"].used == {"bitset": 5, "csr": 0}
+    assert counters["csr"].used == {"bitset": 0, "csr": 5}
+    assert sum(counters["auto"].used.values()) == 5
+
+
+def test_empty_gene_set_and_bad_mode():
+    gene_hpo, n_hpo = random_gene_hpo(np.random.default_rng(3))
+    for m in MODES:
+        hpos, sup = SupportCounter(gene_hpo, n_hpo, m).supports([])
+        assert len(hpos) == len(sup) == 0
+    assert GeneBitsets(gene_hpo, n_hpo).n_words == 5
+    with pytest.raises(ValueError):
+        SupportCounter(gene_hpo, n_hpo, "dense")
@@ -0,0 +1,114 @@
+import csv
+import importlib.util
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "targets" / "fetch_chembl_mechanisms.py"
+
+
+@pytest.fixture
+def chembl(tmp_path, monkeypatch):
+    """The script as a module, with data/ and the HTTP cache under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("AEKG_OFFLINE", raising=False)
+    spec = importlib.util.spec_from_file_location("fetch_chembl_mechanisms", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def mechanisms(*rows):
+    """Route answering /mechanism.json with one mechanism per (molecule, target) row."""
+    def route(req):
+        mol = req.path.split("molecule_chembl_id=")[1].split("&")[0]
+        mechs = [{"molecule_chembl_id": m, "target_chembl_id": t, "action_type": "INHIBITOR",
+                  "mechanism_of_action": "x", "target_components": []} for m, t in rows if m == mol]
+        return 200, {"Content-Type": "application/json"}, json.dumps({"mechanisms": mechs}).encode()
+    return route
+
+
+def target(accession, failures=0, status=503):
+    """Route answering /target/<id>.json; the first `failures` requests get `status` (Retry-After: 0)."""
+    seen = []
+
+    def route(req):
+        seen.append(req.path)
+        if len(seen) <= failures:
+            return status, {"Retry-After": "0"}, b""
+        body = {"target_components": [{"accession": accession}]}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+    return route
+
+
+def run(mod, monkeypatch, server, *drugs):
+    monkeypatch.setattr(sys, "argv", ["fetch", *drugs, "--base-url", server.url, "--rate", "1000", "--workers", "2"])
+    return mod.main()
+
+
+def test_token_bucket_limits_rate(chembl):
+    bucket = chembl.TokenBucket(rate=20, burst=1)
+    t0 = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - t0 >= 0.45
+
+
+def test_429_and_5xx_are_retried(chembl, stub_server):
+    stub_server.routes["/target/T1.json"] = target("P00001", failures=2, status=429)
+    stub_server.routes["/target/T2.json"] = target("P00002", failures=1, status=503)
+    client = chembl.ChemblClient(stub_server.url, rate=1000, backoff=0)
+    assert client.accessions("T1") == ["P00001"]
+    assert client.accessions("T2") == ["P00002"]
+    assert len(stub_server.requests_to("/target/T1.json")) == 3
+    assert len(stub_server.requests_to("/target/T2.json")) == 2
+
+
+def test_failed_lookup_is_not_memoized(chembl, stub_server):
+    stub_server.routes["/target/T1.json"] = target("P00001", failures=3, status=503)
+    client = chembl.ChemblClient(stub_server.url, rate=1000, retries=1, backoff=0)
+    with pytest.raises(Exception):
+        client.accessions("T1")
+    assert "T1" not in client.memo
+    assert client.accessions("T1") == ["P00001"]          # fourth request succeeds
+    stub_server.routes["/target/T9.json"] = lambda req: (404, {}, b"")
+    assert client.accessions("T9") == []                  # a missing target is a real "no accessions"
+
+
+def test_transient_failure_is_retried_on_resume(chembl, stub_server, monkeypatch):
+    stub_server.routes["/mechanism.json"] = mechanisms(("CHEMBL1", "T1"), ("CHEMBL2", "T2"))
+    stub_server.routes["/target/T1.json"] = target("P00001")
+    stub_server.routes["/target/T2.json"] = target("P00002", failures=100, status=503)
+
+    assert run(chembl, monkeypatch, stub_server, "CHEMBL1", "CHEMBL2") == 1
+    ck = [json.loads(line)["drug_id"] for line in chembl.CHECKPOINT.read_text().splitlines()]
+    assert ck == ["CHEMBL1"]                               # the failed molecule is not checkpointed
+    assert not (chembl.OUTM / "drug_targets.csv").exists()
+
+    stub_server.routes["/target/T2.json"] = target("P00002")
+    n_before = len(stub_server.log)
+    assert run(chembl, monkeypatch, stub_server, "CHEMBL1", "CHEMBL2") == 0
+    again = [p for _, p, _ in stub_server.log[n_before:]]
+    assert not any("CHEMBL1" in p or "T1" in p for p in again)   # resumed: only CHEMBL2 is fetched
+    with open(chembl.OUTM / "drug_targets.csv", encoding="utf-8") as f:
+        assert sorted((r["drug_id"], r["protein_id"]) for r in csv.DictReader(f)) == \
+            [("CHEMBL1", "P00001"), ("CHEMBL2", "P00002")]
+    assert not chembl.CHECKPOINT.exists()
+
+
+def test_completed_run_does_not_resume(chembl, stub_server, monkeypatch):
+    stub_server.routes["/mechanism.json"] = mechanisms(("CHEMBL1", "T1"))
+    stub_server.routes["/target/T1.json"] = target("P00001")
+    assert run(chembl, monkeypatch, stub_server, "CHEMBL1") == 0
+    assert not chembl.CHECKPOINT.exists()
+    # upstream changed; with the HTTP cache out of the way the next run must see it
+    stub_server.routes["/mechanism.json"] = mechanisms(("CHEMBL1", "T1"), ("CHEMBL1", "T2"))
+    stub_server.routes["/target/T2.json"] = target("P00002")
+    shutil.rmtree("data/cache/http")
+    assert run(chembl, monkeypatch, stub_server, "CHEMBL1") == 0
+    with open(chembl.OUTM / "drug_targets.csv", encoding="utf-8") as f:
+        assert sorted(r["protein_id"] for r in csv.DictReader(f)) == ["P00001", "P00002"]
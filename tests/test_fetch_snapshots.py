@@ -0,0 +1,27 @@
+import importlib.util
+import os
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "raw" / "fetch_snapshots.py"
+BODY = b"hp.obo body\n" * 1000
+
+
+def test_snapshot_is_linked_not_copied(tmp_path, monkeypatch, stub_server):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("AEKG_OFFLINE", raising=False)
+    spec = importlib.util.spec_from_file_location("fetch_snapshots", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    stub_server.routes["/hp.obo"] = lambda req: (200, {"ETag": '"1"'}, BODY)
+    cfg = tmp_path / "sources.yml"
+    cfg.write_text(f"hpo:\n  - {{name: hp.obo, url: \"{stub_server.url}/hp.obo\"}}\n")
+
+    assert mod.main(cfg) == 0
+    store = mod.RawStore(mod.RAW)
+    sha = store.blob_sha("hpo", "hp.obo")
+    view = store.resolve("hpo", "hp.obo")
+    http_blob = mod.HttpCache().blob_path(sha)
+    assert view.read_bytes() == BODY
+    # one inode: HTTP cache blob, store blob and dated view
+    assert os.path.samefile(http_blob, store.blob_path(sha)) and os.path.samefile(view, http_blob)
+    assert len(stub_server.requests_to("/hp.obo")) == 1
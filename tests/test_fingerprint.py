@@ -0,0 +1,17 @@
+from aekg.fingerprint import StatsCache
+
+
+def test_get_with_keys_on_dependency_content(tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("x\ny\nz\n")
+    b.write_text("y\n")
+    overlap = lambda p: len(set(p.read_text().split()) & set(b.read_text().split()))
+    cache = StatsCache(tmp_path / "cache.json")
+    assert cache.get_with(a, [b], "overlap:v1", overlap) == 1
+    assert cache.get_with(a, [b], "overlap:v1", overlap) == 1 and cache.hits == 1
+    b.write_text("y\nz\nextra\n")
+    assert cache.get_with(a, [b], "overlap:v1", overlap) == 2
+    cache.save()
+    kinds = list(StatsCache(tmp_path / "cache.json").data[str(a)]["stats"])
+    assert len(kinds) == 1 and kinds[0].startswith("overlap:v1@")   # the entry for the old b is gone
+    assert cache.get_with(tmp_path / "missing", [b], "overlap:v1", overlap, default=-1) == -1
@@ -0,0 +1,129 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aekg.http_cache import CacheMiss, HttpCache, cache_key
+
+BODY = bytes(range(256)) * 64
+ETAG = '"v1"'
+
+
+def serve_file(body=BODY, etag=ETAG):
+    """Route serving body with ETag, Range and If-Range like a static file server."""
+    def route(req):
+        rng, if_range = req.headers.get("Range"), req.headers.get("If-Range")
+        if req.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        if rng and (if_range is None or if_range == etag):
+            start = int(rng.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                return 416, {"Content-Range": f"bytes */{len(body)}"}, b""
+            return 206, {"ETag": etag, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}, body[start:]
+        return 200, {"ETag": etag}, body
+    return route
+
+
+def write_part(cache, url, data, validator=ETAG):
+    key = cache_key(url)
+    part = cache.root / "partial" / f"{key}.part"
+    part.parent.mkdir(parents=True, exist_ok=True)
+    part.write_bytes(data)
+    (cache.root / "partial" / f"{key}.json").write_text(json.dumps({"url": url, "validator": validator}))
+    return part
+
+
+def test_resume_fetches_only_missing_bytes(tmp_path, stub_server):
+    stub_server.routes["/f"] = serve_file()
+    cache = HttpCache(tmp_path / "http")
+    url = stub_server.url + "/f"
+    write_part(cache, url, BODY[:1000])
+    sha, cached = cache.download(url)
+    assert sha == hashlib.sha256(BODY).hexdigest() and not cached
+    assert stub_server.log[-1][2].get("Range") == "bytes=1000-"
+    assert cache.blob_path(sha).read_bytes() == BODY
+    assert cache.lookup(url)["status"] == 200          # the 206 completed the whole body
+    assert HttpCache(tmp_path / "http", offline=True).get(url).status_code == 200
+
+
+def test_complete_part_416_restarts_with_full_get(tmp_path, stub_server):
+    stub_server.routes["/f"] = serve_file()
+    cache = HttpCache(tmp_path / "http")
+    url = stub_server.url + "/f"
+    part = write_part(cache, url, BODY)               # the whole body, but never moved into the store
+    sha, cached = cache.download(url)
+    assert sha == hashlib.sha256(BODY).hexdigest() and not cached
+    ranges = [h.get("Range") for _, _, h in stub_server.requests_to("/f")]
+    assert ranges == ["bytes=%d-" % len(BODY), None]
+    assert not part.exists() and not part.with_suffix(".json").exists()
+    # later runs revalidate the stored entry instead of failing on the stale part
+    assert cache.download(url) == (sha, True)
+
+
+def test_materialized_file_is_independent_of_the_blob(tmp_path, stub_server):
+    stub_server.routes["/f"] = serve_file()
+    cache = HttpCache(tmp_path / "http")
+    url = stub_server.url + "/f"
+    a, b = tmp_path / "raw" / "a.bin", tmp_path / "raw" / "b.bin"
+    sha, _ = cache.download(url, a)
+    cache.materialize(sha, b)
+    with open(a, "ab") as f:                          # in-place append to one materialized file
+        f.write(b"tail")
+    assert cache.blob_path(sha).read_bytes() == BODY
+    assert b.read_bytes() == BODY
+    assert cache.download(url, a) == (sha, True) and a.read_bytes() == BODY
+
+
+def test_entry_with_altered_blob_is_a_miss(tmp_path, stub_server):
+    stub_server.routes["/f"] = serve_file()
+    cache = HttpCache(tmp_path / "http", ttl={"default": 3600})
+    url = stub_server.url + "/f"
+    sha, _ = cache.download(url)
+    with open(cache.blob_path(sha), "ab") as f:
+        f.write(b"tail")
+    assert cache.lookup(url) is None
+    assert cache.download(url) == (sha, False)       # fetched again instead of served corrupt
+    assert cache.blob_path(sha).read_bytes() == BODY
+
+
+def test_offline_serves_cache_only(tmp_path, stub_server):
+    stub_server.routes["/j"] = lambda req: (200, {"Content-Type": "application/json"}, b'{"a": 1}')
+    url = stub_server.url + "/j"
+    HttpCache(tmp_path / "http").get(url)
+    offline = HttpCache(tmp_path / "http", offline=True)
+    n = len(stub_server.log)
+    assert offline.get(url).json() == {"a": 1}
+    with pytest.raises(CacheMiss):
+        offline.get(stub_server.url + "/other")
+    assert len(stub_server.log) == n
+    assert (offline.hits, offline.fetched) == (1, 0)
+
+
+def test_counters_are_thread_safe(tmp_path, stub_server):
+    stub_server.routes["/j"] = lambda req: (200, {}, b"x")
+    cache = HttpCache(tmp_path / "http", ttl={"default": 3600})
+    url = stub_server.url + "/j"
+    cache.get(url)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: cache.get(url), range(2000)))
+    assert (cache.hits, cache.fetched) == (2000, 1)
+
+
+def test_root_from_env_per_instance(tmp_path, monkeypatch):
+    monkeypatch.setenv("AEKG_HTTP_CACHE", str(tmp_path / "a"))
+    assert HttpCache().root == tmp_path / "a"
+    monkeypatch.setenv("AEKG_HTTP_CACHE", str(tmp_path / "b"))
+    assert HttpCache().root == tmp_path / "b"
+
+
+def test_snapshot_downloads_are_always_revalidated(tmp_path, stub_server):
+    stub_server.routes["/f"] = serve_file()
+    cache = HttpCache(tmp_path / "http")
+    url = stub_server.url + "/f"
+    sha, _ = cache.download(url, source="snapshot")
+    assert cache.download(url, source="snapshot") == (sha, True)
+    assert stub_server.log[-1][2].get("If-None-Match") == ETAG   # revalidated, not served from TTL
+    n = len(stub_server.log)
+    cache.download(url, source="uniprot")                         # REST-style TTL: served from disk
+    assert len(stub_server.log) == n
@@ -0,0 +1,49 @@
+import csv
+import gzip
+import importlib.util
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "interim" / "make_gene_hpo_from_hpo.py"
+
+
+def load(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("make_gene_hpo_from_hpo", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_sorted_runs_merge_to_one_count_per_pair(tmp_path, monkeypatch):
+    mod = load(monkeypatch, tmp_path)
+    rnd = random.Random(7)
+    rows = [(str(rnd.randint(1, 50)), rnd.choice(["BRCA1", "tp53", "CYP2C9 ", "MTHFR"]),
+             f"HP:{rnd.randint(1, 30):07d}") for _ in range(500)]
+    rows += [("1", "BRCA1", "ORPHA:1")] * 3   # not an HPO id: dropped
+    src = tmp_path / "genes_to_phenotype.txt.gz"
+    with gzip.open(src, "wt", encoding="utf-8") as f:
+        f.write("ncbi_gene_id\tgene_symbol\thpo_id\thpo_name\n")
+        f.writelines(f"{e}\t{g}\t{h}\tx\n" for e, g, h in rows)
+    out = tmp_path / "gene_hpo.csv"
+    # chunks of 37 rows: many sorted runs, equal keys spread over several of them
+    monkeypatch.setattr(sys, "argv", ["x", "--input", str(src), "--out", str(out), "--chunksize", "37",
+                                      "--all-genes", "--with-evidence", "--tmp-dir", str(tmp_path)])
+    assert mod.main() == len(rows) + 1          # the header line counts as a (dropped) row
+    with open(out, encoding="utf-8") as f:
+        got = [(r["gene_id"], r["hpo_id"], int(r["n_annotations"])) for r in csv.DictReader(f)]
+    want = Counter((g.strip().upper(), h) for _, g, h in rows if h.startswith("HP:"))
+    assert got == sorted((g, h, n) for (g, h), n in want.items())
+    assert not list(tmp_path.glob("gene_hpo_run_*")) and not [p for p in tmp_path.iterdir() if p.is_dir()]
+
+
+def test_merge_runs_sums_counts_across_runs(tmp_path, monkeypatch):
+    mod = load(monkeypatch, tmp_path)
+    runs = []
+    for i, lines in enumerate([["A\tHP:1\t2", "B\tHP:1\t1"], ["A\tHP:1\t3", "A\tHP:2\t1"], []]):
+        p = tmp_path / f"run{i}.tsv"
+        p.write_text("".join(ln + "\n" for ln in lines))
+        runs.append(str(p))
+    assert list(mod.merge_runs(runs)) == [("A", "HP:1", 5), ("A", "HP:2", 1), ("B", "HP:1", 1)]
@@ -0,0 +1,26 @@
+import pytest
+
+from aekg import mappings
+
+PT_NAME = "hpo_id\tpt_code\tpt_name\nHP:0003326\t10028411\tMyalgia\nHP:0000988\t\t\n"
+MEDDRA_PT = "hpo_id\tmeddra_pt\nHP:0003326\tMyalgia\nHP:0000988\t\n"
+
+
+def test_hpo_pt_layouts(tmp_path):
+    a, b = tmp_path / "a.tsv", tmp_path / "b.tsv"
+    a.write_text(PT_NAME)
+    b.write_text(MEDDRA_PT)
+    assert mappings.hpo_pt(a) == {"HP:0003326": "Myalgia"}
+    assert mappings.hpo_pt(b) == {"HP:0003326": "Myalgia"}
+    assert mappings.hpo_pt(b, pt_cols=("meddra_pt",)) == {"HP:0003326": "Myalgia"}
+
+
+def test_requested_pt_column_missing_raises(tmp_path):
+    a = tmp_path / "a.tsv"
+    a.write_text(PT_NAME)
+    with pytest.raises(KeyError, match="meddra_pt"):
+        mappings.hpo_pt(a, pt_cols=("meddra_pt",))
+    with pytest.raises(KeyError):
+        list(mappings.iter_rows("hpo_meddra_map", a, key_cols=(None, ("meddra_pt",)), strict=True))
+    # non-strict reads (aekg.vocab) still treat the column as empty
+    assert all(pt is None for _, pt in mappings.iter_rows("hpo_meddra_map", a, key_cols=(None, ("meddra_pt",))))
@@ -0,0 +1,41 @@
+import shutil
+from pathlib import Path
+
+from aekg.mapstore import MAPPINGS_DIR, TABLES, MapStore
+
+REPO = Path(__file__).resolve().parents[1]
+
+
+def test_round_trip_repo_tables(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    for spec in TABLES.values():
+        if (REPO / MAPPINGS_DIR / spec.file).exists():
+            shutil.copy(REPO / MAPPINGS_DIR / spec.file, src / spec.file)
+    MapStore.import_csv(src, tmp_path / "m.sqlite")
+    store = MapStore(tmp_path / "m.sqlite")
+    written = store.export_csv(out)
+    store.close()
+    assert written
+    for name, path in written.items():
+        assert path.read_bytes() == (src / TABLES[name].file).read_bytes(), name
+
+
+def test_round_trip_keeps_bom_crlf_and_original_text(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    text = ("drug_id,gene_id,cpic_weight,note\r\n"
+            "CHEMBL1, hla-a ,1.00,first\r\n"
+            "chembl1,SLCO1B1,1,second\r\n"
+            "CHEMBL2,HLA-B,,\r\n"
+            "CHEMBL2,HLA-B,n/a,\"quoted, note\"\r\n")
+    (src / "drug_gene_pgx.csv").write_bytes(b"\xef\xbb\xbf" + text.encode())
+    (src / "pt_prior.csv").write_text("meddra_pt,prior\nNausea,0.5\nnausea,0.25\n", encoding="utf-8")
+    MapStore.import_csv(src, tmp_path / "m.sqlite")
+    store = MapStore(tmp_path / "m.sqlite")
+    assert store.pairs("drug_gene_pgx", "cpic_weight")[:2] == [("CHEMBL1", "HLA-A", 1.0), ("CHEMBL1", "SLCO1B1", 1.0)]
+    assert store.pairs("pt_prior", "prior") == [("Nausea", 0.5), ("Nausea", 0.25)]
+    store.export_csv(out)
+    store.close()
+    for f in ("drug_gene_pgx.csv", "pt_prior.csv"):
+        assert (out / f).read_bytes() == (src / f).read_bytes(), f
@@ -0,0 +1,56 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from aekg.minhash import EMPTY, bands_for, candidate_pairs, estimate, jaccard, signatures
+from aekg.vocab import CSR
+
+
+def csr(sets):
+    indptr = np.concatenate(([0], np.cumsum([len(s) for s in sets])))
+    return CSR(indptr, np.concatenate([np.array(sorted(s), dtype=np.int64) for s in sets] or [np.zeros(0)]))
+
+
+def banded_pairs(sig, bands):
+    """Pairs sharing a whole band, by comparing every pair."""
+    rows = sig.shape[1] // bands
+    live = [i for i in range(len(sig)) if sig[i, 0] != EMPTY]
+    return {(i, j) for i, j in combinations(live, 2)
+            if any((sig[i, b * rows:(b + 1) * rows] == sig[j, b * rows:(b + 1) * rows]).all() for b in range(bands))}
+
+
+def test_candidate_pairs_is_exact_banding():
+    rng = np.random.default_rng(1)
+    base = set(rng.integers(0, 1000, 40).tolist())
+    sets = [base, set(base), base | {5000}, set(list(base)[:20]) | {7000, 7001}, set(), {1, 2, 3}, {1, 2, 4}]
+    sets += [set(rng.integers(0, 10**6, 30).tolist()) for _ in range(20)]
+    sig = signatures(csr(sets), num_perm=64)
+    assert (sig[4] == EMPTY).all()
+    for bands in (8, 16, 32):
+        got = {tuple(p) for p in candidate_pairs(sig, bands).tolist()}
+        assert got == banded_pairs(sig, bands)
+        assert (0, 1) in got and all(4 not in p for p in got)
+    assert candidate_pairs(sig, 16, max_bucket=1).shape == (0, 2)
+    with pytest.raises(ValueError):
+        candidate_pairs(sig, 5)
+
+
+def test_signatures_are_seeded_and_estimate_jaccard():
+    rng = np.random.default_rng(2)
+    a = set(rng.integers(0, 5000, 300).tolist())
+    b = set(list(a)[:200]) | set(rng.integers(5000, 9000, 100).tolist())
+    sets = csr([a, b])
+    sig = signatures(sets, num_perm=256)
+    assert (sig == signatures(sets, num_perm=256, chunk=7)).all()       # chunking does not change the result
+    assert not (sig == signatures(sets, num_perm=256, seed=1)).all()
+    exact = jaccard(np.array(sorted(a)), np.array(sorted(b)))
+    assert abs(estimate(sig, np.array([0]), np.array([1]))[0] - exact) < 0.1
+
+
+@pytest.mark.parametrize("num_perm,threshold", [(128, 0.5), (128, 0.8), (64, 0.3), (100, 0.6)])
+def test_bands_for_picks_closest_midpoint(num_perm, threshold):
+    b = bands_for(num_perm, threshold)
+    assert num_perm % b == 0
+    mid = lambda k: (1 / k) ** (k / num_perm)
+    assert all(abs(mid(b) - threshold) <= abs(mid(k) - threshold) for k in range(1, num_perm + 1) if num_perm % k == 0)
@@ -0,0 +1,84 @@
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDFS
+
+from aekg.obo import OboTerm, build_redirects, is_a_closure, iter_obo_terms
+
+OBO = """format-version: 1.2
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000118
+name: Phenotypic abnormality
+is_a: HP:0000001 ! All
+
+[Term]
+id: HP:0000707
+name: Abnormality of the nervous system
+alt_id: HP:0000700
+is_a: HP:0000118 ! Phenotypic abnormality
+
+[Term]
+id: HP:0001250
+name: Seizure
+is_a: HP:0000707 ! Abnormality of the nervous system
+is_a: HP:0000999 ! obsolete parent
+
+[Term]
+id: HP:0000999
+name: obsolete thing
+is_obsolete: true
+replaced_by: HP:0000118
+
+[Typedef]
+id: part_of
+"""
+
+
+def test_is_a_closure_reflexive_and_redirected(tmp_path):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(OBO)
+    c = is_a_closure(str(obo), ["HP:0001250", "HP:0000700", "HP:0000999", "HP:9999999"])
+    assert c["HP:0001250"] == ["HP:0000001", "HP:0000118", "HP:0000707", "HP:0001250"]
+    # alt / obsolete ids: the replacement's ancestors and the id itself
+    assert c["HP:0000700"] == ["HP:0000001", "HP:0000118", "HP:0000700", "HP:0000707"]
+    assert c["HP:0000999"] == ["HP:0000001", "HP:0000118", "HP:0000999"]
+    assert "HP:9999999" not in c
+
+
+def term(id_, alt_ids=(), replaced_by=(), obsolete=False):
+    return OboTerm(id_, "", (), (), tuple(alt_ids), tuple(replaced_by), (), obsolete)
+
+
+def test_build_redirects_collapses_chains():
+    r = build_redirects([
+        term("HP:1", alt_ids=["HP:10"]),
+        term("HP:2", replaced_by=["HP:3"], obsolete=True),
+        term("HP:3", replaced_by=["HP:10"], obsolete=True),   # -> alt id of HP:1
+        term("HP:4", replaced_by=["HP:1", "HP:5"], obsolete=True),   # ambiguous: not redirected
+        term("HP:6", replaced_by=["HP:7"], obsolete=True),
+        term("HP:7", replaced_by=["HP:6"], obsolete=True),    # cycle: stops instead of looping
+    ])
+    assert r["HP:10"] == r["HP:3"] == r["HP:2"] == "HP:1"
+    assert "HP:4" not in r and "HP:1" not in r
+    assert {r["HP:6"], r["HP:7"]} <= {"HP:6", "HP:7"}
+
+
+def test_is_a_closure_matches_subclassof_star(tmp_path):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(OBO)
+    terms = list(iter_obo_terms(str(obo)))
+    redirects = build_redirects(terms)
+    live = [t.id for t in terms if not t.is_obsolete]
+    g = Graph()
+    for t in terms:
+        if not t.is_obsolete:
+            for p in t.is_a:
+                p = redirects.get(p, p)
+                if p in live:
+                    g.add((URIRef(t.id), RDFS.subClassOf, URIRef(p)))
+    c = is_a_closure(str(obo), live)
+    for h in live:
+        assert c[h] == sorted(str(x) for x in g.transitive_objects(URIRef(h), RDFS.subClassOf))
@@ -0,0 +1,64 @@
+import os
+import time
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import XSD
+
+from aekg.predictions import NS, TopKIndex, export, iter_ranked, latest_ranked_dir
+
+RANKED = {
+    "CHEMBL1064": [("HP:0003326", 0.9), ("HP:0001250", 0.75), ("HP:0000988", "nan"), ("HP:0002017", 0.5), ("", 0.4)],
+    "CHEMBL108": [("HP:0001250", 1.25), ("HP:0000988", 0.3)],
+}
+
+
+def write_ranked(d):
+    d.mkdir(parents=True, exist_ok=True)
+    for drug, rows in RANKED.items():
+        (d / f"{drug}_ranked_hpo.csv").write_text(
+            "hpo_id,score\n" + "".join(f"{h},{s}\n" for h, s in rows), encoding="utf-8")
+
+
+def test_export_round_trip(tmp_path):
+    write_ranked(tmp_path / "ranked")
+    rows = list(iter_ranked(tmp_path / "ranked"))
+    assert rows == [("CHEMBL1064", 1, "HP:0003326", 0.9), ("CHEMBL1064", 2, "HP:0001250", 0.75),
+                    ("CHEMBL1064", 3, "HP:0002017", 0.5), ("CHEMBL108", 1, "HP:0001250", 1.25),
+                    ("CHEMBL108", 2, "HP:0000988", 0.3)]
+    nt, db = tmp_path / "p.nt", tmp_path / "p.sqlite"
+    assert export(iter(rows), nt, db, source="r1", meta={"top_k": 0}) == 5
+
+    idx = TopKIndex(db)
+    assert idx.top("CHEMBL1064", k=2) == [(1, "HP:0003326", 0.9), (2, "HP:0001250", 0.75)]
+    assert idx.top("CHEMBL1064", k=10, min_weight=0.6) == [(1, "HP:0003326", 0.9), (2, "HP:0001250", 0.75)]
+    assert idx.top("CHEMBL999") == []
+    assert idx.meta() == {"source": "r1", "rows": "5", "top_k": "0"}
+    idx.close()
+
+    g = Graph().parse(nt, format="nt")
+    drug = URIRef("http://example.org/drug/CHEMBL108")
+    assert set(g.objects(drug, URIRef(NS + "mayCause"))) == {
+        URIRef("http://example.org/phenotype/HP:0001250"), URIRef("http://example.org/phenotype/HP:0000988")}
+    e = URIRef("http://example.org/evidence/CHEMBL108/HP:0001250")
+    assert g.value(e, URIRef(NS + "weight")) == Literal("1.25", datatype=XSD.float)
+    assert g.value(e, URIRef(NS + "source")) == Literal("r1")
+    weights = sorted(float(w) for w in g.objects(None, URIRef(NS + "weight")))
+    assert weights == sorted(r[3] for r in rows)
+
+
+def test_top_k_and_min_weight_when_reading(tmp_path):
+    write_ranked(tmp_path)
+    assert [r[1:3] for r in iter_ranked(tmp_path, top_k=1)] == [(1, "HP:0003326"), (1, "HP:0001250")]
+    assert [r[2] for r in iter_ranked(tmp_path, min_weight=0.7)] == ["HP:0003326", "HP:0001250", "HP:0001250"]
+
+
+def test_latest_ranked_dir(tmp_path):
+    assert latest_ranked_dir(tmp_path) is None
+    old, new, empty = (tmp_path / f"formal_{d}" for d in ("2025-01-01", "2025-02-01", "2025-03-01"))
+    write_ranked(old)
+    write_ranked(new)
+    empty.mkdir()
+    t = time.time()
+    os.utime(new, (t - 100, t - 100))
+    os.utime(old, (t, t))          # the most recently written one wins, not the latest name
+    assert latest_ranked_dir(tmp_path) == old
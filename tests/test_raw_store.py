@@ -0,0 +1,59 @@
+import os
+import stat
+
+from aekg.raw_store import RawStore, raw_path
+
+
+def add(store, tmp_path, rel, data):
+    src = tmp_path / "incoming" / rel.replace("/", "_")
+    src.parent.mkdir(parents=True, exist_ok=True)
+    src.write_bytes(data)
+    sha = store.add_blob(src)
+    return {rel: {"sha256": sha, "size": len(data), "url": ""}}
+
+
+def tree(root):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*"))
+
+
+def test_views_are_readonly_links_made_once(tmp_path):
+    store = RawStore(tmp_path / "raw")
+    meta = add(store, tmp_path, "hpo/hp.obo", b"format-version: 1.2\n")
+    store.commit("2026-01-01", meta)
+    store.commit("2026-02-01", add(store, tmp_path, "sider/se.tsv", b"se"))
+    blob = store.blob_path(meta["hpo/hp.obo"]["sha256"])
+    view = tmp_path / "raw" / "hpo" / "2026-01-01" / "hp.obo"
+    assert os.path.samefile(view, blob)
+    assert stat.S_IMODE(blob.stat().st_mode) == 0o444
+    # the carried-forward file keeps the view of the day it was added; resolving writes nothing
+    before = tree(tmp_path / "raw")
+    assert store.resolve("hpo", "hp.obo") == view
+    assert not (tmp_path / "raw" / "hpo" / "2026-02-01").exists()
+    view.unlink()
+    assert store.resolve("hpo", "hp.obo") == blob
+    assert tree(tmp_path / "raw") == [p for p in before if p != "hpo/2026-01-01/hp.obo"]
+
+
+def test_commit_builds_on_newest_manifest_after_switch(tmp_path):
+    store = RawStore(tmp_path / "raw")
+    store.commit("2026-01-01", add(store, tmp_path, "hpo/hp.obo", b"v1"))
+    store.commit("2026-02-01", add(store, tmp_path, "sider/meddra_all_se.tsv.gz", b"se"))
+    store.switch("2026-01-01")
+    assert store.entry("sider", "meddra_all_se.tsv.gz") is None
+    man = store.commit("2026-03-01", add(store, tmp_path, "hpo/hp.obo", b"v2"))
+    assert sorted(man["files"]) == ["hpo/hp.obo", "sider/meddra_all_se.tsv.gz"]
+    assert store.current_date() == "2026-03-01"
+    assert store.resolve("sider", "meddra_all_se.tsv.gz").read_bytes() == b"se"
+    man = store.commit("2026-04-01", {}, base="2026-01-01")
+    assert sorted(man["files"]) == ["hpo/hp.obo"]
+
+
+def test_raw_path_reads_env_and_current_per_call(tmp_path, monkeypatch):
+    store = RawStore(tmp_path / "raw")
+    store.commit("2026-01-01", add(store, tmp_path, "hpo/hp.obo", b"v1"))
+    store.commit("2026-02-01", add(store, tmp_path, "hpo/hp.obo", b"v2"))
+    monkeypatch.setenv("AEKG_RAW_ROOT", str(tmp_path / "raw"))
+    assert raw_path("hpo", "hp.obo").read_bytes() == b"v2"
+    store.switch("2026-01-01")
+    assert raw_path("hpo", "hp.obo").read_bytes() == b"v1"
+    assert raw_path("hpo", "other.obo") == tmp_path / "raw" / "hpo" / "other.obo"
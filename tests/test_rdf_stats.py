@@ -0,0 +1,51 @@
+from collections import Counter
+from pathlib import Path
+
+from rdflib import Graph
+from rdflib.namespace import RDF
+
+from aekg.rdf_stats import stream_stats
+
+ROOT = Path(__file__).resolve().parents[1]
+TTL = """
+@prefix : <http://example.org/ae-kg#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+<http://example.org/drug/D1> a :Drug ; :actsOn <http://example.org/protein/P1> , <http://example.org/protein/P2> .
+<http://example.org/protein/P1> a :Protein ; :encodedBy <http://example.org/gene/G1> ; :label "p1"@en .
+<http://example.org/protein/P2> a :Protein ; :weight "0.5"^^xsd:float .
+[] a :Evidence ; :about <http://example.org/drug/D1> .
+"""
+
+
+def graph_stats(g: Graph):
+    return (len(g), {str(s) for s in g.subjects(unique=True)}, Counter(str(p) for p in g.predicates()),
+            Counter(str(o) for o in g.objects(None, RDF.type)))
+
+
+def same(st, g: Graph, bnodes: bool = False):
+    n, subjects, predicates, classes = graph_stats(g)
+    assert (st.triples, st.predicates, st.classes) == (n, predicates, classes)
+    assert len(st.subjects) == len(subjects)
+    if not bnodes:
+        assert st.subjects == subjects
+
+
+def test_counting_store_matches_rdflib_graph(tmp_path):
+    ttl = tmp_path / "g.ttl"
+    ttl.write_text(TTL)
+    same(stream_stats([ttl]), Graph().parse(ttl, format="turtle"), bnodes=True)
+
+
+def test_nt_fast_path_matches_rdflib_graph(tmp_path):
+    g = Graph().parse(data=TTL.replace("[] a", "<http://example.org/evidence/E1> a"), format="turtle")
+    nt = tmp_path / "g.nt"
+    g.serialize(nt, format="nt", encoding="utf-8")
+    same(stream_stats([nt]), g)
+
+
+def test_repo_graph_files():
+    paths = [ROOT / "rdf" / "schema.ttl", ROOT / "rdf" / "ae_kg.ttl"]
+    g = Graph()
+    for p in paths:
+        g.parse(p, format="turtle")
+    same(stream_stats(paths), g, bnodes=True)
@@ -0,0 +1,37 @@
+import csv
+import shutil
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+RANKERS = ROOT / "scripts" / "rankers"
+DRUGS = ("CHEMBL1064", "CHEMBL108")
+
+
+def scores(rows):
+    return {r["hpo_id"]: round(float(r["score"]), 6) for r in rows}
+
+
+def test_single_drug_combo_equals_rule_r1_with_cpic(tmp_path):
+    shutil.copytree(ROOT / "data" / "interim" / "mappings", tmp_path / "data" / "interim" / "mappings")
+    run = lambda *a: subprocess.run([sys.executable, *map(str, a)], cwd=tmp_path, check=True, capture_output=True)
+    run(RANKERS / "rule_r1_with_cpic.py")
+    run(RANKERS / "rule_r1_combo.py", "--top-k", "0", "--out", "combo.csv",
+        *[x for d in DRUGS for x in ("--drugs", d)], "--drugs", f"{DRUGS[0]}+{DRUGS[0]}")
+
+    with open(tmp_path / "combo.csv", encoding="utf-8") as f:
+        combo = {}
+        for r in csv.DictReader(f):
+            combo.setdefault(r["combination"], []).append(r)
+    assert set(combo) == set(DRUGS)   # a drug combined with itself is that drug
+    for d in DRUGS:
+        with open(tmp_path / "reports" / f"formal_{date.today()}" / f"{d}_ranked_hpo.csv", encoding="utf-8") as f:
+            single = scores(csv.DictReader(f))
+        rows = combo[d]
+        n = len(single)
+        assert single and scores(rows[:n]) == single
+        if d == DRUGS[0]:
+            assert len(rows) == 2 * n and scores(rows[n:]) == single
+        assert all(r["shared_genes"] == "0" for r in combo[d])
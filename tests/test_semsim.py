@@ -0,0 +1,82 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from aekg.semsim import TermSims, build_ontology
+from aekg.vocab import hpo_str
+
+N_TERMS = 150   # > 64: ancestor bitsets span several words
+
+
+@pytest.fixture(scope="module")
+def onto(tmp_path_factory):
+    """A random is_a DAG with gene annotations, and its ancestor sets / IC computed the slow way."""
+    d = tmp_path_factory.mktemp("semsim")
+    rnd = random.Random(47)
+    parents = {1: []}
+    for t in range(2, N_TERMS + 1):
+        parents[t] = rnd.sample(range(1, t), min(t - 1, rnd.choice([1, 1, 2, 3])))
+    with open(d / "hp.obo", "w", encoding="utf-8") as f:
+        for t, ps in parents.items():
+            f.write(f"[Term]\nid: {hpo_str(t)}\nname: t{t}\n" + "".join(f"is_a: {hpo_str(p)}\n" for p in ps) + "\n")
+    genes = {f"G{g}": rnd.sample(range(1, N_TERMS + 1), rnd.randint(1, 6)) for g in range(40)}
+    with open(d / "gene_hpo.csv", "w", encoding="utf-8") as f:
+        f.write("gene_id,hpo_id\n" + "".join(f"{g},{hpo_str(h)}\n" for g, hs in genes.items() for h in hs))
+
+    anc = {}
+    for t in parents:   # parents have smaller ids, so they are done first
+        anc[t] = {t}.union(*(anc[p] for p in parents[t]))
+    counts = {t: sum(any(t in anc[h] for h in hs) for hs in genes.values()) for t in parents}
+    ic = {t: math.log(len(genes) / max(c, 1)) for t, c in counts.items()}
+    return build_ontology(d / "hp.obo", d / "gene_hpo.csv"), anc, ic
+
+
+def brute_resnik(anc, ic, t, u):
+    return max(ic[a] for a in anc[t] & anc[u])
+
+
+def test_ancestors_and_ic(onto):
+    ont, anc, ic = onto
+    assert len(ont) == N_TERMS
+    assert list(ont.ic) == sorted(ont.ic, reverse=True)
+    for p in range(len(ont)):
+        t = int(ont.hpo_ids[p])
+        assert {int(ont.hpo_ids[a]) for a in ont.ancestors(p)} == anc[t]
+        assert ont.ic[p] == pytest.approx(ic[t])
+
+
+def test_mica_and_term_sims_match_brute_force(onto):
+    ont, anc, ic = onto
+    rnd = random.Random(1)
+    terms = sorted(rnd.sample(range(1, N_TERMS + 1), 60))
+    S = TermSims(ont, ont.positions(terms))
+    loc = S.local(ont.positions(terms))
+    res, lin = S.block(loc, loc, "resnik"), S.block(loc, loc, "lin")
+    pos = ont.positions(terms)
+    mica_ic = ont.resnik(np.repeat(pos, len(pos)), np.tile(pos, len(pos))).reshape(len(pos), -1)
+    by_pos = [int(ont.hpo_ids[p]) for p in pos]
+    for i, t in enumerate(by_pos):
+        for j, u in enumerate(by_pos):
+            r = brute_resnik(anc, ic, t, u)
+            assert res[i, j] == pytest.approx(r, rel=1e-5, abs=1e-6)
+            assert mica_ic[i, j] == pytest.approx(r)
+            denom = ic[t] + ic[u]
+            assert lin[i, j] == pytest.approx(2 * r / denom if denom else 0.0, rel=1e-5, abs=1e-6)
+
+
+def test_bma_matrix_matches_pairwise_bma(onto):
+    ont, anc, ic = onto
+    rnd = random.Random(2)
+    profiles = [ont.positions(rnd.sample(range(1, N_TERMS + 1), rnd.randint(1, 8))) for _ in range(6)]
+    profiles.append(ont.positions([]))
+    S = TermSims(ont, np.concatenate(profiles))
+    for measure in ("resnik", "lin"):
+        M = S.bma_matrix(profiles, measure)
+        for i, a in enumerate(profiles):
+            for j, b in enumerate(profiles):
+                assert M[i, j] == pytest.approx(S.bma(a, b, measure), rel=1e-6)
+    a, b = ([int(ont.hpo_ids[p]) for p in x] for x in profiles[:2])
+    best = lambda xs, ys: np.mean([max(brute_resnik(anc, ic, x, y) for y in ys) for x in xs])
+    assert S.bma(profiles[0], profiles[1]) == pytest.approx((best(a, b) + best(b, a)) / 2, rel=1e-5)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from pyshacl import validate as py_validate
+from rdflib import Graph
+from rdflib.namespace import SH
+
+from aekg.shacl_fast import validate
+
+ROOT = Path(__file__).resolve().parents[1]
+SHAPES = """
+@prefix sh:  <http://www.w3.org/ns/shacl#> .
+@prefix :    <http://example.org/ae-kg#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+:DrugShape a sh:NodeShape ; sh:targetClass :Drug ;
+  sh:property [ sh:path :actsOn ; sh:minCount 1 ; sh:class :Protein ] .
+:ProteinShape a sh:NodeShape ; sh:targetClass :Protein ;
+  sh:property [ sh:path :encodedBy ; sh:minCount 1 ; sh:maxCount 1 ] ;
+  sh:property [ sh:path :weight ; sh:datatype xsd:float ; sh:severity sh:Warning ] .
+:SubjectsShape a sh:NodeShape ; sh:targetSubjectsOf :hasPhenotype ;
+  sh:property [ sh:path :hasPhenotype ; sh:class :Phenotype ] .
+:LabelShape a sh:NodeShape ; sh:targetClass :Gene ;
+  sh:property [ sh:path :label ; sh:pattern "^[A-Z0-9]+$" ] .
+"""
+DATA = """
+@prefix :    <http://example.org/ae-kg#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+:actsOn rdfs:range :Protein .
+:Kinase rdfs:subClassOf :Protein .
+<http://example.org/drug/D1> a :Drug ; :actsOn <http://example.org/protein/P1> .
+<http://example.org/drug/D2> a :Drug .
+<http://example.org/drug/D3> a :Drug ; :actsOn <http://example.org/gene/G1> .
+<http://example.org/protein/P1> :encodedBy <http://example.org/gene/G1> , <http://example.org/gene/G2> .
+<http://example.org/protein/P2> a :Kinase ; :weight "high" .
+<http://example.org/protein/P3> a :Protein ; :encodedBy <http://example.org/gene/G1> ; :weight "0.5"^^xsd:float .
+<http://example.org/gene/G1> a :Gene ; :label "tp53" ; :hasPhenotype <http://example.org/phenotype/HP:1> .
+<http://example.org/gene/G2> a :Gene ; :label "BRCA1" ; :hasPhenotype <http://example.org/phenotype/HP:2> .
+<http://example.org/phenotype/HP:2> a :Phenotype .
+"""
+
+
+def results(g: Graph):
+    return sorted((str(g.value(r, SH.focusNode)), str(g.value(r, SH.resultPath)),
+                   str(g.value(r, SH.sourceConstraintComponent)), str(g.value(r, SH.resultSeverity)),
+                   str(g.value(r, SH.value)))
+                  for r in g.subjects(SH.resultSeverity, None))
+
+
+@pytest.mark.parametrize("inference", ["rdfs", "none"])
+def test_fast_path_matches_pyshacl(inference):
+    data = Graph().parse(data=DATA, format="turtle")
+    sg = Graph().parse(data=SHAPES, format="turtle")
+    ok, fast_g, fast_text = validate(data, shacl_graph=sg, inference=inference)
+    py_ok, py_g, py_text = py_validate(data, shacl_graph=sg, inference=inference)
+    assert ok == py_ok is False
+    assert results(fast_g) == results(py_g)
+    assert fast_text.count("Constraint Violation") == py_text.count("Constraint Violation")
+
+
+def test_repo_graph_matches_pyshacl():
+    data = Graph().parse(ROOT / "rdf" / "ae_kg.ttl", format="turtle")
+    sg = Graph().parse(ROOT / "shacl" / "shapes.ttl", format="turtle")
+    ok, fast_g, _ = validate(data, shacl_graph=sg, inference="rdfs")
+    py_ok, py_g, _ = py_validate(data, shacl_graph=sg, inference="rdfs")
+    assert ok == py_ok and results(fast_g) == results(py_g)
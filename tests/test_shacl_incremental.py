@@ -0,0 +1,54 @@
+from rdflib import Graph
+
+from aekg.shacl_incremental import validate_incremental
+
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix :   <http://example.org/ae-kg#> .
+:DrugShape a sh:NodeShape ; sh:targetClass :Drug ;
+  sh:property [ sh:path :actsOn ; sh:minCount 1 ] .
+"""
+DATA = """
+@prefix : <http://example.org/ae-kg#> .
+<http://example.org/drug/D1> a :Drug ; :actsOn <http://example.org/protein/P1> .
+<http://example.org/drug/D2> a :Drug .
+[] a :Drug .
+"""
+
+
+def run(tmp_path, data, **kw):
+    sg = Graph().parse(data=SHAPES, format="turtle")
+    return validate_incremental(data, sg, "shapes-v1", tmp_path / "state", **kw)
+
+
+def test_iri_only_delta_is_incremental(tmp_path):
+    data = Graph().parse(data=DATA.replace("[] a :Drug .", ""), format="turtle")
+    conforms, text, info = run(tmp_path, data)
+    assert not conforms and info["mode"] == "full" and text.count("Focus Node") == 1
+    data.parse(data="<http://example.org/drug/D2> <http://example.org/ae-kg#actsOn> "
+                    "<http://example.org/protein/P2> .", format="nt")
+    conforms, text, info = run(tmp_path, data)
+    assert conforms and info["mode"] == "incremental" and info["added"] == 1
+
+
+def test_blank_node_relabelling_forces_full_run(tmp_path):
+    run(tmp_path, Graph().parse(data=DATA, format="turtle"))
+    # re-parsing gives the blank node a new label, so its lines differ from the snapshot
+    conforms, text, info = run(tmp_path, Graph().parse(data=DATA, format="turtle"))
+    assert info["mode"] == "full"
+    assert text.count("Focus Node") == 2          # D2 and the blank node, each once
+    conforms, text, info = run(tmp_path, Graph().parse(data=DATA, format="turtle"))
+    assert text.count("Focus Node") == 2
+
+
+def test_unchanged_data_file_reuses_report(tmp_path):
+    from aekg.shacl_incremental import stored_report
+    data = Graph().parse(data=DATA, format="turtle")
+    _, text, info = run(tmp_path, data, data_sha256="sha-a")
+    assert info["mode"] == "full"
+    assert stored_report("shapes-v1", "sha-a", tmp_path / "state") == (False, text)
+    assert stored_report("shapes-v1", "sha-b", tmp_path / "state") is None
+    assert stored_report("shapes-v2", "sha-a", tmp_path / "state") is None
+    # same file: nothing is re-checked, even for a graph whose blank nodes got new labels
+    _, again, info = run(tmp_path, Graph().parse(data=DATA, format="turtle"), data_sha256="sha-a")
+    assert info["mode"] == "unchanged" and again == text
@@ -0,0 +1,45 @@
+import pytest
+
+from aekg.uniprot_index import UniProtIndex, build_index
+
+SELECTED = ("P04035\tHMDH_HUMAN\t3156\tNP_000850.1\n"
+            "P35498\tSCN1A_HUMAN\t6323; 99999\tNP_001159435.1\n"
+            "Q99999\tXXXX_HUMAN\t\t\n")
+HGNC = ("hgnc_id\tsymbol\tentrez_id\tuniprot_ids\n"
+        "HGNC:5006\tHMGCR\t3156\tP04035\n"
+        "HGNC:10585\tSCN1A\t6323\t\n")
+
+
+def test_selected_tab_with_hgnc(tmp_path):
+    (tmp_path / "sel.tab").write_text(SELECTED)
+    (tmp_path / "hgnc.txt").write_text(HGNC)
+    db = tmp_path / "idx.sqlite"
+    assert build_index(tmp_path / "sel.tab", db, hgnc_path=tmp_path / "hgnc.txt") == 2
+    idx = UniProtIndex(db)
+    assert idx.lookup(["P04035", "P35498-2", "Q99999"]) == {"P04035": "HMGCR", "P35498-2": "SCN1A"}
+    idx.close()
+
+
+def test_selected_tab_without_hgnc_fails_and_keeps_index(tmp_path):
+    (tmp_path / "sel.tab").write_text(SELECTED)
+    db = tmp_path / "idx.sqlite"
+    db.write_bytes(b"previous index")
+    with pytest.raises(ValueError, match="hgnc_complete_set"):
+        build_index(tmp_path / "sel.tab", db, hgnc_path=tmp_path / "missing.txt")
+    assert db.read_bytes() == b"previous index"
+
+
+def test_dat_layout_needs_no_hgnc(tmp_path):
+    (tmp_path / "idmapping.dat").write_text("P04035\tUniProtKB-ID\tHMDH_HUMAN\nP04035\tGene_Name\tHMGCR\n")
+    db = tmp_path / "idx.sqlite"
+    assert build_index(tmp_path / "idmapping.dat", db) == 1
+    assert UniProtIndex(db).lookup(["P04035"]) == {"P04035": "HMGCR"}
+
+
+def test_missing_inputs(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        build_index(tmp_path / "idmapping_selected.tab", tmp_path / "idx.sqlite")
+    (tmp_path / "empty.dat").write_text("P04035\tUniProtKB-ID\tHMDH_HUMAN\n")
+    with pytest.raises(ValueError, match="no accession"):
+        build_index(tmp_path / "empty.dat", tmp_path / "idx.sqlite")
+    assert not (tmp_path / "idx.sqlite").exists()